@@ -1,183 +1,249 @@
+from startup_timing import STARTUP, timed_import  # first, so the startup report includes the imports below
 import os
+import math
 import ctypes
-import pyautogui
 import asyncio
-import psutil
 import time
-import random
 import logging
-import codecs
-from logging.handlers import RotatingFileHandler
 import signal
-from typing import Optional, List
-import win32gui
-import win32con
-import win32process
-from pywinauto import Application, findwindows
-from pywinauto.findwindows import ElementNotFoundError
+from typing import Callable, Optional, List, Tuple
+from backends import DesktopBackend, Rect, WindowNotFoundError, create_backend
+from blocking_calls import BlockingCallRunner
 from config_manager import ConfigManager, ConfigKeys
+from connection_cache import WindowConnectionCache
+from free_space import FreeSpaceIndex, NoFreeSpaceError
+from fleet import FleetAgent
+from gestures import compile_gesture
+from health import WindowHealth
+from layout import LayoutEngine, rect_matches
+from log_pipeline import start_log_pipeline
+from metrics import MetricsRegistry, MetricsServer
+from profiler import CycleProfiler
+from window_registry import WindowRegistry
+from scheduler import DeadlineScheduler
+from state_store import WindowStateStore
+from supervisor import CommandLauncher, InstanceSupervisor
+
+STARTUP.mark('imports')
 
 # 1. Logging Setup
 class Logger:
+    # File and console I/O happen on the listener thread; the event loop only enqueues records.
+    queue_handler = None
+    listener = None
+
+    # Keys the log pipeline is built from; changing any of them on reload rebuilds it.
+    PIPELINE_KEYS = {ConfigKeys.LOG_FILE_PATH, ConfigKeys.MAX_BYTES, ConfigKeys.BACKUP_COUNT, ConfigKeys.LOG_FORMAT,
+                     ConfigKeys.LOG_CONSOLE, ConfigKeys.LOG_RATE_LIMIT}
+
     def __init__(self, config_manager):
         self.config_manager = config_manager
         self.initialize_logging()
+        config_manager.subscribe(self.on_config_change)
+
+    def on_config_change(self, snapshot, changed_keys):
+        if changed_keys & Logger.PIPELINE_KEYS:
+            self.initialize_logging()
 
     def initialize_logging(self):
         log_file_path = self.config_manager.get(ConfigKeys.LOG_FILE_PATH, 'afk_script.log')
         max_bytes = self.config_manager.get(ConfigKeys.MAX_BYTES, 5242880)
         backup_count = self.config_manager.get(ConfigKeys.BACKUP_COUNT, 5)
 
-        handler = RotatingFileHandler(log_file_path, maxBytes=max_bytes, backupCount=backup_count)
-        handler.setFormatter(logging.Formatter("%(asctime)s:%(levelname)s:%(message)s"))
-        handler.setLevel(logging.INFO)
-
-        handler.setStream(codecs.open(log_file_path, 'a', 'utf-8'))
+        Logger.shutdown()
+        Logger.queue_handler, Logger.listener = start_log_pipeline(
+            log_file_path, max_bytes, backup_count,
+            json_format=self.config_manager.get(ConfigKeys.LOG_FORMAT, 'json') == 'json',
+            console=self.config_manager.get(ConfigKeys.LOG_CONSOLE, True),
+            rate_limit=self.config_manager.get(ConfigKeys.LOG_RATE_LIMIT, 20)
+        )
 
-        logging.getLogger().addHandler(handler)
+        logging.getLogger().addHandler(Logger.queue_handler)
         logging.getLogger().setLevel(logging.INFO)
         Logger.log_info(f"Log file path: {log_file_path}")
         Logger.log_info("Logging initialized")
 
     @staticmethod
-    def log_and_handle_exception(e: Exception, message: str) -> None:
-        Logger.log_exception(e)
-        Logger.log_info(message)
+    def shutdown():
+        """Detach the queue handler and flush everything still queued."""
+        if Logger.queue_handler is not None:
+            logging.getLogger().removeHandler(Logger.queue_handler)
+            Logger.queue_handler = None
+        if Logger.listener is not None:
+            Logger.listener.stop()
+            Logger.listener = None
 
     @staticmethod
-    def log_exception(e: Exception):
-        logging.error(f"Exception occurred: {e}")
-        logging.error("Traceback:", exc_info=True)
-        print(f"Error: {e}")
+    def log_and_handle_exception(e: Exception, message: str, handle: Optional[int] = None) -> None:
+        Logger.log_exception(e, handle=handle)
+        Logger.log_info(message, handle=handle)
 
     @staticmethod
-    def log_info(message: str):
-        logging.info(message)
-        print(message)
+    def log_exception(e: Exception, handle: Optional[int] = None):
+        logging.error(f"Exception occurred: {e}", extra={'handle': handle})
+        logging.error("Traceback:", exc_info=True, extra={'handle': handle})
+
+    @staticmethod
+    def log_info(message: str, handle: Optional[int] = None):
+        logging.info(message, extra={'handle': handle})
 
 
 # 2. Window Management
 class RobloxWindowManager:
-    def __init__(self, config_manager):
+    def __init__(self, config_manager, backend: DesktopBackend, runner: BlockingCallRunner,
+                 metrics: Optional[MetricsRegistry] = None, clock: Callable[[], float] = time.perf_counter):
         self.config_manager = config_manager
+        self.backend = backend
+        self.runner = runner
+        self.metrics = metrics
+        self.clock = clock
         self.width = config_manager.get(ConfigKeys.WINDOW_WIDTH, 816)
         self.height = config_manager.get(ConfigKeys.WINDOW_HEIGHT, 638)
-        self.screen_width, self.screen_height = pyautogui.size()
-        self.cached_positions = None  
+        self.screen_width, self.screen_height = backend.screen_size()
+        self.layout_engine = LayoutEngine(self.width, self.height)
+        self.work_areas = [Rect(0, 0, self.screen_width, self.screen_height)]
+        self.registry = WindowRegistry(backend, backend.create_window_event_source(),
+                                       title="Roblox", class_name="WINDOWSCLIENT", clock=clock)
+        self.transition_timeout = 2.0
+        self.slow_transition_threshold = 0.5
+        self.transition_waits = {}
+        self.layout_skips = 0
+        config_manager.subscribe(self.on_config_change)
+
+    def on_config_change(self, snapshot, changed_keys):
+        if changed_keys & {ConfigKeys.WINDOW_WIDTH, ConfigKeys.WINDOW_HEIGHT, ConfigKeys.WINDOWS_PER_BATCH}:
+            self.width = snapshot.get(ConfigKeys.WINDOW_WIDTH)
+            self.height = snapshot.get(ConfigKeys.WINDOW_HEIGHT)
+            self.layout_engine.set_window_size(self.width, self.height)
+            Logger.log_info("Window layout cache cleared due to configuration changes.")
 
     def allow_set_foreground_window(self):
         try:
-            ctypes.windll.user32.AllowSetForegroundWindow(ctypes.windll.kernel32.GetCurrentProcessId())
+            self.backend.allow_set_foreground_window()
         except Exception as e:
             Logger.log_exception(e)
 
-    def ensure_window_visible(self, hwnd):
-        rect = win32gui.GetWindowRect(hwnd)
-        if rect[0] < 0 or rect[1] < 0:
-            win32gui.SetWindowPos(hwnd, win32con.HWND_TOP, 0, 0, rect[2] - rect[0], rect[3] - rect[1], win32con.SWP_SHOWWINDOW)
-
-    def find_roblox_windows(self):
+    async def update_roblox_windows(self):
+        """Apply pending window events to the registry and return the (added, removed) handles."""
         try:
-            windows = findwindows.find_windows(title="Roblox", class_name="WINDOWSCLIENT")
-            if not windows:
-                Logger.log_info("No Roblox windows found.")
-                return None
-
-            if len(windows) > 1:
-                Logger.log_info(f"Multiple Roblox windows found: {windows}")
-
-            return windows
-        except ElementNotFoundError as e:
+            added, removed = await self.runner.run(self.registry.update)
+            if added:
+                Logger.log_info(f"New Roblox windows found: {added}")
+            if removed:
+                Logger.log_info(f"Roblox windows closed: {removed}")
+            return added, removed
+        except WindowNotFoundError as e:
             Logger.log_exception(e)
-            return None
+            return [], []
         except Exception as e:
             Logger.log_exception(e)
-            return None
-
-    def bring_window_to_front(self, handle):
+            return [], []
+
+    async def wait_for_state(self, handle: int, transition: str, predicate, timeout: Optional[float] = None) -> float:
+        """Poll ``predicate`` with growing intervals until it holds or ``timeout`` expires; returns the wait time."""
+        timeout = self.transition_timeout if timeout is None else timeout
+        start = self.clock()
+        interval = 0.01
+        reached = await self.runner.run(predicate)
+        known = self.transition_waits.get(handle, {}).get(transition)
+        if not reached and known:
+            # The last transition of this kind (measured, or restored from the state store) took ``known`` seconds;
+            # polling much earlier only costs calls.
+            await asyncio.sleep(min(known * 0.8, timeout))
+            reached = await self.runner.run(predicate)
+        while not reached and self.clock() - start < timeout:
+            await asyncio.sleep(interval)
+            interval = min(interval * 2, 0.2)
+            reached = await self.runner.run(predicate)
+
+        waited = self.clock() - start
+        if reached:
+            self.transition_waits.setdefault(handle, {})[transition] = waited
+        if self.metrics is not None:
+            self.metrics.observe(f"wait_{transition}", waited)
+        if not reached:
+            Logger.log_info(f"Window {handle} did not complete '{transition}' within {timeout:.1f} seconds.",
+                            handle=handle)
+        elif waited > self.slow_transition_threshold:
+            Logger.log_info(f"Window {handle} took {waited:.2f} seconds to complete '{transition}'.", handle=handle)
+        return waited
+
+    def raise_window(self, handle) -> Tuple[int, int]:
+        """Attach to the window's input thread and raise it; returns the (foreground, target) thread ids."""
+        self.allow_set_foreground_window()
+
+        # Lấy ID của luồng hiện tại và luồng của cửa sổ mục tiêu
+        foreground_thread = self.backend.get_window_thread_process_id(self.backend.get_foreground_window())[0]
+        target_thread = self.backend.get_window_thread_process_id(handle)[0]
+
+        # Gắn kết các luồng
+        if foreground_thread != target_thread:
+            self.backend.attach_thread_input(foreground_thread, target_thread, True)
+
+        self.backend.set_foreground_window(handle)
+        self.backend.bring_window_to_top(handle)
+        return foreground_thread, target_thread
+
+    async def bring_window_to_front(self, handle):
         try:
-            self.allow_set_foreground_window()
-
-            # Lấy ID của luồng hiện tại và luồng của cửa sổ mục tiêu
-            foreground_thread = win32process.GetWindowThreadProcessId(win32gui.GetForegroundWindow())[0]
-            target_thread = win32process.GetWindowThreadProcessId(handle)[0]
-
-            # Gắn kết các luồng
-            if foreground_thread != target_thread:
-                ctypes.windll.user32.AttachThreadInput(foreground_thread, target_thread, True)
-
-            win32gui.SetForegroundWindow(handle)
-            win32gui.BringWindowToTop(handle)
-            time.sleep(0.5)
+            foreground_thread, target_thread = await self.runner.run(self.raise_window, handle)
+            await self.wait_for_state(handle, 'focus', lambda: self.backend.get_foreground_window() == handle)
 
             # Tách các luồng sau khi hoàn thành
             if foreground_thread != target_thread:
-                ctypes.windll.user32.AttachThreadInput(foreground_thread, target_thread, False)
+                await self.runner.run(self.backend.attach_thread_input, foreground_thread, target_thread, False)
 
-        except win32gui.error as e:
-            Logger.log_exception(e)
         except Exception as e:
-            Logger.log_exception(e)
+            Logger.log_exception(e, handle=handle)
 
-    def ensure_window_active(self, handle):
+    async def ensure_window_active(self, handle):
         try:
-            if win32gui.IsIconic(handle):
-                win32gui.ShowWindow(handle, win32con.SW_RESTORE)
-            self.bring_window_to_front(handle)
-        except win32gui.error as e:
-            Logger.log_exception(e)
+            if await self.runner.run(self.backend.is_iconic, handle):
+                await self.runner.run(self.backend.restore_window, handle)
+                await self.wait_for_state(handle, 'restore', lambda: not self.backend.is_iconic(handle))
+            await self.bring_window_to_front(handle)
+        except Exception as e:
+            Logger.log_exception(e, handle=handle)
+
+    async def window_layout(self, count: int) -> List[Rect]:
+        """Target rectangles for ``count`` windows, laid out over the work areas of all monitors."""
+        try:
+            self.work_areas = await self.runner.run(self.backend.monitor_work_areas) or self.work_areas
         except Exception as e:
             Logger.log_exception(e)
+        return self.layout_engine.layout(count, self.work_areas)
+
+    async def ensure_window_restored(self, handle: int) -> None:
+        """Ensure that the window is restored from minimized or maximized state.
 
-    def position_windows_in_grid(self, handles: List[int], windows_per_batch: int) -> None:
-        if self.cached_positions is None:  # Calculate positions only once
-            num_windows = windows_per_batch  # Use the batch size to determine grid layout
-            cols = min(windows_per_batch, num_windows)
-            rows = (num_windows + cols - 1) // cols  # Ceiling division to ensure enough rows
-
-            # Calculate spacing between windows
-            x_offset = (self.screen_width - (self.width * cols)) // (cols + 1)
-            y_offset = (self.screen_height - (self.height * rows)) // (rows + 1)
-
-            # Precompute positions for a single batch and cache them
-            self.cached_positions = []
-            for i in range(windows_per_batch):
-                row = i // cols
-                col = i % cols
-                x = col * (self.width + x_offset) + x_offset
-                y = row * (self.height + y_offset) + y_offset
-                self.cached_positions.append((x, y))
-
-        # Assign positions to windows, reusing cached positions
-        for i, handle in enumerate(handles):
-            position_index = i % windows_per_batch
-            x, y = self.cached_positions[position_index]
-            Logger.log_info(f"Processing window {i + 1} with handle {handle} at position ({x}, {y})")
-            self.restore_and_resize_window(handle, x, y)
-
-    def ensure_window_restored(self, handle: int) -> None:
-        """Ensure that the window is restored from minimized or maximized state."""
-        if win32gui.IsIconic(handle):
-            win32gui.ShowWindow(handle, win32con.SW_RESTORE)
-            time.sleep(1)
-
-        if win32gui.GetWindowPlacement(handle)[1] == win32con.SW_MAXIMIZE:
-            win32gui.ShowWindow(handle, win32con.SW_RESTORE)
-            time.sleep(1)
-
-    def restore_and_resize_window(self, handle: int, x: int, y: int) -> None:
+        This runs while another window may hold the input, so the window is restored without being activated;
+        ``ensure_window_active`` activates it once its turn for input comes.
+        """
+        if await self.runner.run(self.backend.is_iconic, handle):
+            await self.runner.run(self.backend.restore_window, handle, False)
+            await self.wait_for_state(handle, 'restore', lambda: not self.backend.is_iconic(handle))
+
+        if await self.runner.run(self.backend.is_maximized, handle):
+            await self.runner.run(self.backend.restore_window, handle, False)
+            await self.wait_for_state(handle, 'unmaximize', lambda: not self.backend.is_maximized(handle))
+
+    async def restore_and_resize_window(self, handle: int, x: int, y: int) -> None:
         try:
-            Logger.log_info(f"Attempting to resize window with handle {handle}...")
+            Logger.log_info(f"Attempting to resize window with handle {handle}...", handle=handle)
             
-            self.ensure_window_visible(handle)
-            self.ensure_window_restored(handle)
-            
-            win32gui.SetWindowPos(handle, win32con.HWND_TOP, x, y, self.width, self.height, win32con.SWP_SHOWWINDOW)
-            Logger.log_info(f"Window with handle {handle} resized to {self.width}x{self.height} at position ({x}, {y}).")
-        except win32gui.error as e:
-            Logger.log_exception(e)
+            await self.ensure_window_restored(handle)
+
+            # Moving a window that is already in place still makes the client re-layout, so skip it.
+            target = Rect(x, y, x + self.width, y + self.height)
+            if rect_matches(await self.runner.run(self.backend.get_window_rect, handle), target):
+                self.layout_skips += 1
+                return
+
+            await self.runner.run(self.backend.set_window_pos, handle, x, y, self.width, self.height, False)
+            Logger.log_info(f"Window with handle {handle} resized to {self.width}x{self.height} at position ({x}, {y}).",
+                            handle=handle)
         except Exception as e:
-            Logger.log_exception(e)
+            Logger.log_exception(e, handle=handle)
 
     def minimize_window(self, window):
         try:
@@ -188,60 +254,136 @@ class RobloxWindowManager:
 
 # 3. Mouse Actions
 class MouseActionHandler:
-    def __init__(self, config_manager):
+    def __init__(self, config_manager, backend: DesktopBackend, runner: BlockingCallRunner,
+                 metrics: Optional[MetricsRegistry] = None, clock: Callable[[], float] = time.perf_counter):
         self.config_manager = config_manager
+        self.backend = backend
+        self.runner = runner
+        self.metrics = metrics
+        self.clock = clock
+        self.gesture = config_manager.get(ConfigKeys.GESTURE)
         self.click_wait_time = config_manager.get(ConfigKeys.CLICK_WAIT_TIME, 1)
         self.taskbar_height = config_manager.get(ConfigKeys.TASKBAR_HEIGHT, 70)
-        self.screen_width, self.screen_height = pyautogui.size()
+        self.screen_width, self.screen_height = backend.screen_size()
+        self.click_outside_min_x = config_manager.get(ConfigKeys.CLICK_OUTSIDE_MIN_X, 451)
+        self.free_space: Optional[FreeSpaceIndex] = None
+        self.input_mode = config_manager.get(ConfigKeys.INPUT_MODE, 'foreground')
+        if self.input_mode not in ('foreground', 'background'):
+            Logger.log_info(f"Unknown input mode '{self.input_mode}', using foreground input.")
+            self.input_mode = 'foreground'
+        self.background_rejected = set()
+        # Set by the bot once gesture verification is up; background input is only trusted when it can be verified.
+        self.verifier = None
+        config_manager.subscribe(self.on_config_change)
+
+    def on_config_change(self, snapshot, changed_keys):
+        self.click_wait_time = snapshot.get(ConfigKeys.CLICK_WAIT_TIME)
+        self.taskbar_height = snapshot.get(ConfigKeys.TASKBAR_HEIGHT)
+        self.click_outside_min_x = snapshot.get(ConfigKeys.CLICK_OUTSIDE_MIN_X)
+        self.gesture = snapshot.get(ConfigKeys.GESTURE)
+        if changed_keys & {ConfigKeys.TASKBAR_HEIGHT, ConfigKeys.CLICK_OUTSIDE_MIN_X}:
+            self.free_space = None
+        if ConfigKeys.INPUT_MODE in changed_keys and snapshot.get(ConfigKeys.INPUT_MODE) in ('foreground', 'background'):
+            self.input_mode = snapshot.get(ConfigKeys.INPUT_MODE)
+            self.background_rejected.clear()
 
     def get_taskbar_height(self):
         try:
-            taskbar_hwnd = win32gui.FindWindow("Shell_TrayWnd", None)
-            rect = win32gui.GetWindowRect(taskbar_hwnd)
+            rect = self.backend.get_taskbar_rect()
             taskbar_height = rect[3] - rect[1]
             return taskbar_height
         except Exception as e:
             Logger.log_exception(e)
             return self.taskbar_height
 
+    def update_free_space(self, work_areas: List[Rect], window_rects: List[Rect]) -> None:
+        """Rebuild the free-region index when the work areas or the managed window rectangles changed."""
+        obstacles = [Rect(0, self.screen_height - self.taskbar_height, self.screen_width, self.screen_height)]
+        obstacles += [Rect(area.left, area.top, min(area.right, self.click_outside_min_x), area.bottom)
+                      for area in work_areas if area.left < self.click_outside_min_x]
+        obstacles += window_rects
+        free_space = self.free_space
+        if free_space is None or free_space.work_areas != tuple(work_areas) or free_space.obstacles != tuple(obstacles):
+            self.free_space = FreeSpaceIndex(work_areas, obstacles)
+
     async def click_random_point_outside(self, window):
-        rect = window.rectangle()
-        outside_x, outside_y = self.find_random_outside_point(self.screen_width, self.screen_height, rect)
+        rect = await self.runner.run(window.rectangle)
+        try:
+            outside_x, outside_y = self.find_random_outside_point(rect)
+        except NoFreeSpaceError as e:
+            Logger.log_info(f"Skipping the click outside the window: {e}")
+            return
         try:
-            pyautogui.moveTo(outside_x, outside_y)
+            await self.runner.run(self.backend.move_mouse, outside_x, outside_y)
             await asyncio.sleep(self.click_wait_time)
-            pyautogui.click()
-        except pyautogui.FailSafeException as e:
-            Logger.log_exception(e)
+            await self.runner.run(self.backend.click)
         except Exception as e:
             Logger.log_exception(e)
 
-    def find_random_outside_point(self, screen_width, screen_height, rect):
-        while True:
-            outside_x = random.randint(451, screen_width - 1)
-            outside_y = random.randint(0, screen_height - 1)
-            if not (rect.left <= outside_x <= rect.right and rect.top <= outside_y <= rect.bottom):
-                if outside_y < screen_height - self.taskbar_height:
-                    return outside_x, outside_y
-
-    async def click_specific_item(self, window, rel_x=148, rel_y=387):
-        rect = window.rectangle()
-        abs_x = rect.left + rel_x
-        abs_y = rect.top + rel_y
+    def find_random_outside_point(self, rect):
+        if self.free_space is None:
+            self.update_free_space([Rect(0, 0, self.screen_width, self.screen_height)], [])
+        # Window rectangles exclude their right and bottom edge, like the layout slots the index was built from.
+        window_rect = Rect(rect.left, rect.top, rect.right, rect.bottom)
+        return self.free_space.excluding(window_rect).sample()
+
+    async def click_specific_item(self, window):
+        """Play the configured gesture relative to the window's top-left corner as batched SendInput events."""
         try:
-            pyautogui.moveTo(abs_x, abs_y)
-            await asyncio.sleep(self.click_wait_time)
-            pyautogui.mouseDown()
-            for _ in range(5):
-                pyautogui.moveRel(random.randint(-2, 2), random.randint(-2, 2), duration=0.1)
-            pyautogui.mouseUp()
-            await asyncio.sleep(self.click_wait_time)
-            pyautogui.click()
-        except pyautogui.FailSafeException as e:
-            Logger.log_exception(e)
+            rect = await self.runner.run(window.rectangle)
+            events = compile_gesture(self.gesture, rect.left, rect.top)
+            start = self.clock()
+            await self.runner.run(self.backend.send_input, events)
+            self.report_gesture(getattr(window, 'handle', None), self.clock() - start)
         except Exception as e:
             Logger.log_exception(e)
 
+    def report_gesture(self, handle: Optional[int], seconds: float) -> None:
+        if self.metrics is not None:
+            self.metrics.observe('gesture', seconds)
+        Logger.log_info(f"Gesture on window {handle} took {seconds * 1000:.0f} ms.", handle=handle)
+
+    def uses_background_input(self, handle: int) -> bool:
+        return self.input_mode == 'background' and self.verifier is not None and handle not in self.background_rejected
+
+    async def background_keep_alive(self, handle: int) -> bool:
+        """Deliver the keep-alive gesture as posted mouse messages, without activating the window.
+
+        Posting succeeds whether or not the client acts on the messages, so the gesture only counts when the
+        verifier sees the client area change. A minimized window has no client area to capture, so it is not
+        attempted here: it is served in the foreground this time and left restored behind the other windows, after
+        which its gestures can be verified. A window that refuses the messages or does not visibly react is
+        switched to the foreground path for the rest of the run.
+        """
+        accepted = True
+        start = self.clock()
+        try:
+            if await self.runner.run(self.backend.is_iconic, handle) or \
+                    not await self.runner.run(self.verifier.capture_before, handle):
+                Logger.log_info(f"Window {handle} is minimized, so background input cannot be verified. "
+                                f"Serving it in the foreground.", handle=handle)
+                return False
+            for event in compile_gesture(self.gesture):
+                if event.delay:
+                    await asyncio.sleep(event.delay)
+                accepted = self.backend.post_mouse_event(handle, event.kind, event.x, event.y, pressed=event.pressed)
+                if not accepted:
+                    break
+            if accepted:
+                result = await self.runner.run(self.verifier.verify, handle)
+                accepted = result.ok and result.changed_fraction > 0
+        except Exception as e:
+            Logger.log_exception(e, handle=handle)
+            accepted = False
+        if accepted:
+            self.report_gesture(handle, self.clock() - start)
+
+        if not accepted:
+            self.background_rejected.add(handle)
+            Logger.log_info(f"Window {handle} did not visibly react to background input. Falling back to foreground input.",
+                            handle=handle)
+        return accepted
+
 
 # 4. System Controls
 class SystemController:
@@ -256,165 +398,663 @@ class SystemController:
 
 # 5. AFK Bot Core Logic
 class RobloxAFKBot:
-    def __init__(self, config_manager):
+    def __init__(self, config_manager, backend: Optional[DesktopBackend] = None, runner=None,
+                 clock: Callable[[], float] = time.perf_counter):
         self.config_manager = config_manager
-        self.window_manager = RobloxWindowManager(config_manager)
-        self.mouse_handler = MouseActionHandler(config_manager)
+        if backend is None:
+            with STARTUP.phase('backend init'):
+                backend = create_backend(config_manager.get(ConfigKeys.BACKEND, 'win32'))
+        self.backend = backend
+        self.runner = runner or BlockingCallRunner(max_workers=config_manager.get(ConfigKeys.WORKER_THREADS, 4))
+        self.clock = clock
+        self.pipeline_depth = max(1, config_manager.get(ConfigKeys.PIPELINE_DEPTH, 2))
+        self.input_lock = asyncio.Lock()
+        self.throughput = 0.0
+        self.metrics = MetricsRegistry(clock=clock)
+        self.metrics_server = None
+        self.window_manager = RobloxWindowManager(config_manager, self.backend, self.runner, self.metrics, clock)
+        self.mouse_handler = MouseActionHandler(config_manager, self.backend, self.runner, self.metrics, clock)
+        self.connection_cache = WindowConnectionCache(self.backend)
         self.system_controller = SystemController()
+        self.scheduler = DeadlineScheduler(
+            kick_timeout=config_manager.get(ConfigKeys.KICK_TIMEOUT, 1200),
+            reset_interval=config_manager.get(ConfigKeys.RESET_INTERVAL, 900),
+            safety_margin=config_manager.get(ConfigKeys.SAFETY_MARGIN, 120),
+            clock=clock
+        )
+        self.health = WindowHealth(
+            self.backend,
+            probe_timeout=config_manager.get(ConfigKeys.PROBE_TIMEOUT, 1.0),
+            failure_threshold=config_manager.get(ConfigKeys.QUARANTINE_THRESHOLD, 3),
+            backoff=config_manager.get(ConfigKeys.QUARANTINE_BACKOFF, 60),
+            max_backoff=config_manager.get(ConfigKeys.QUARANTINE_MAX_BACKOFF, 900),
+            clock=clock
+        )
+        launch_command = config_manager.get(ConfigKeys.LAUNCH_COMMAND, [])
+        self.supervisor = InstanceSupervisor(
+            CommandLauncher(launch_command) if launch_command else None,
+            expected=config_manager.get(ConfigKeys.EXPECTED_INSTANCES, 0),
+            max_concurrent=config_manager.get(ConfigKeys.MAX_CONCURRENT_LAUNCHES, 1),
+            stagger=config_manager.get(ConfigKeys.LAUNCH_STAGGER, 30),
+            startup_timeout=config_manager.get(ConfigKeys.LAUNCH_TIMEOUT, 300),
+            clock=clock
+        )
+        # The governor and the verifier (NumPy) start after the first cycle; see init_optional_subsystems.
+        self.governor = None
+        self.verifier = None
+        self.first_cycle = asyncio.Event()
+        self.served_first_window = False
+        config_manager.subscribe(self.on_config_change)
         self.active_windows = []
         self.shutdown_flag = False
         Logger(config_manager)
+        self.state_store = self.open_state_store()
+        self.fleet_agent = self.create_fleet_agent()
+        self.profiler = CycleProfiler(self.resolve_path(config_manager.get(ConfigKeys.PROFILE_DIR, 'profiles')))
         Logger.log_info("RobloxAFKBot initialized.")
 
-    async def process_window(self, handle: int, retry_count: int = 3) -> None:
+    def init_optional_subsystems(self) -> None:
+        if self.config_manager.get(ConfigKeys.GOVERNOR_ENABLED, True) and self.governor is None:
+            self.governor = timed_import('governor').ProcessGovernor(
+                self.backend,
+                cpu_pressure=self.config_manager.get(ConfigKeys.CPU_PRESSURE_PERCENT, 90),
+                memory_pressure=self.config_manager.get(ConfigKeys.MEMORY_PRESSURE_PERCENT, 99),
+                clock=self.clock
+            )
+            self.governor.sync({handle: self.window_pid(handle) for handle in self.active_windows})
+        if self.verifier is None:
+            self.verifier = self.create_verifier()
+            self.mouse_handler.verifier = self.verifier
+            if self.verifier is None and self.mouse_handler.input_mode == 'background':
+                Logger.log_info("Background input is unverified without verify_gesture; using foreground input.")
+
+    def create_fleet_agent(self) -> Optional[FleetAgent]:
+        address = self.config_manager.get(ConfigKeys.FLEET_COORDINATOR, '')
+        if not address:
+            return None
+        return FleetAgent(self, address, name=self.config_manager.get(ConfigKeys.FLEET_AGENT_NAME, ''),
+                          interval=self.config_manager.get(ConfigKeys.FLEET_REPORT_INTERVAL, 10))
+
+    def resolve_path(self, path: str) -> str:
+        return self.config_manager.resolve_data_path(path)
+
+    def request_profile(self, reason: str) -> None:
+        self.profiler.request(self.config_manager.get(ConfigKeys.PROFILE_CYCLES, 3), reason)
+
+    def check_profile_control_file(self) -> None:
+        path = self.config_manager.get(ConfigKeys.PROFILE_CONTROL_FILE, '')
+        if path:
+            cycles = self.config_manager.get(ConfigKeys.PROFILE_CYCLES, 3)
+            self.profiler.check_control_file(self.resolve_path(path), cycles)
+
+    def create_verifier(self):
+        if not self.config_manager.get(ConfigKeys.VERIFY_GESTURE, False):
+            return None
+        template_path = self.config_manager.get(ConfigKeys.VERIFY_TEMPLATE_PATH, '')
+        if template_path and not os.path.isabs(template_path):
+            template_path = os.path.join(self.config_manager.base_dir, template_path)
+        return timed_import('verification').create_verifier(
+            self.backend,
+            min_changed_fraction=self.config_manager.get(ConfigKeys.VERIFY_MIN_CHANGED_FRACTION, 0.01),
+            tolerance=self.config_manager.get(ConfigKeys.VERIFY_PIXEL_TOLERANCE, 16),
+            template_path=template_path
+        )
+
+    def open_state_store(self) -> Optional[WindowStateStore]:
+        path = self.config_manager.get(ConfigKeys.STATE_STORE_PATH, '')
+        if not path:
+            return None
+        path = self.resolve_path(path)
         try:
-            if not self.window_is_still_open(handle):
-                Logger.log_info(f"Roblox window with handle {handle} has been closed unexpectedly.")
+            store = WindowStateStore(path)
+        except Exception as e:
+            Logger.log_and_handle_exception(e, f"Window state store {path} could not be opened. Continuing without it.")
+            return None
+        Logger.log_info(f"Loaded state of {len(store)} window(s) from {path}")
+        return store
+
+    def window_pid(self, handle: int) -> int:
+        info = self.window_manager.registry.get(handle)
+        if info is not None:
+            return info.pid
+        return self.backend.get_window_thread_process_id(handle)[1]
+
+    def resume_window(self, handle: int) -> None:
+        """Start scheduling ``handle`` from its stored last reset, if the store knows this window."""
+        if self.state_store is None:
+            return
+        pid = self.window_pid(handle)
+        state = self.state_store.get(pid, handle)
+        age = self.state_store.seconds_since_reset(pid, handle)
+        if state is None or age is None:
+            return
+        self.scheduler.add_window(handle, last_reset=self.scheduler.clock() - age)
+        self.window_manager.transition_waits[handle] = dict(state.timings)
+        Logger.log_info(f"Resuming window {handle} (pid {pid}): last reset {age:.0f}s ago, "
+                        f"{state.failure_streak} consecutive failure(s).", handle=handle)
+
+    def on_config_change(self, snapshot, changed_keys):
+        self.pipeline_depth = snapshot.get(ConfigKeys.PIPELINE_DEPTH)
+        self.scheduler.kick_timeout = snapshot.get(ConfigKeys.KICK_TIMEOUT)
+        self.scheduler.reset_interval = snapshot.get(ConfigKeys.RESET_INTERVAL)
+        self.scheduler.safety_margin = snapshot.get(ConfigKeys.SAFETY_MARGIN)
+        if ConfigKeys.KICK_TIMEOUT in changed_keys:
+            for handle, last_reset in list(self.scheduler.last_reset.items()):
+                self.scheduler.reschedule(handle, last_reset + self.scheduler.kick_timeout)
+        self.health.probe_timeout = snapshot.get(ConfigKeys.PROBE_TIMEOUT)
+        self.health.failure_threshold = snapshot.get(ConfigKeys.QUARANTINE_THRESHOLD)
+        self.health.backoff = snapshot.get(ConfigKeys.QUARANTINE_BACKOFF)
+        self.health.max_backoff = snapshot.get(ConfigKeys.QUARANTINE_MAX_BACKOFF)
+        self.supervisor.expected = snapshot.get(ConfigKeys.EXPECTED_INSTANCES)
+        self.supervisor.max_concurrent = snapshot.get(ConfigKeys.MAX_CONCURRENT_LAUNCHES)
+        self.supervisor.stagger = snapshot.get(ConfigKeys.LAUNCH_STAGGER)
+        self.supervisor.startup_timeout = snapshot.get(ConfigKeys.LAUNCH_TIMEOUT)
+        if ConfigKeys.LAUNCH_COMMAND in changed_keys:
+            launch_command = snapshot.get(ConfigKeys.LAUNCH_COMMAND)
+            self.supervisor.close()
+            self.supervisor.launcher = CommandLauncher(launch_command) if launch_command else None
+        if ConfigKeys.PROFILE_TRIGGER in changed_keys and snapshot.get(ConfigKeys.PROFILE_TRIGGER):
+            self.request_profile(f"config key {ConfigKeys.PROFILE_TRIGGER.value}")
+        if self.fleet_agent is not None:
+            self.fleet_agent.interval = snapshot.get(ConfigKeys.FLEET_REPORT_INTERVAL)
+        if ConfigKeys.PROFILE_DIR in changed_keys:
+            self.profiler.output_dir = self.resolve_path(snapshot.get(ConfigKeys.PROFILE_DIR))
+        if self.governor is not None:
+            self.governor.cpu_pressure = snapshot.get(ConfigKeys.CPU_PRESSURE_PERCENT)
+            self.governor.memory_pressure = snapshot.get(ConfigKeys.MEMORY_PRESSURE_PERCENT)
+
+    async def window_responds(self, handle: int) -> bool:
+        """Probe the window off the event loop; a frozen client would block every call that sends it a message."""
+        if await self.runner.run(self.health.probe, handle):
+            return True
+        self.metrics.increment('hung', handle)
+        release_time = self.health.release_time(handle)
+        if release_time is None:
+            Logger.log_info(f"Window {handle} did not respond within {self.health.probe_timeout:.1f} seconds.",
+                            handle=handle)
+        else:
+            Logger.log_info(f"Window {handle} keeps timing out. Quarantined for "
+                            f"{release_time - self.health.clock():.0f} seconds.", handle=handle)
+        return False
+
+    async def process_window(self, handle: int, retry_count: int = 3, probe: bool = True) -> bool:
+        try:
+            if not await self.runner.run(self.window_is_still_open, handle):
+                Logger.log_info(f"Roblox window with handle {handle} has been closed unexpectedly.", handle=handle)
                 self.active_windows.remove(handle)
-                return
+                self.scheduler.remove_window(handle)
+                self.connection_cache.evict(handle)
+                self.window_manager.registry.forget(handle)
+                self.metrics.increment('closed', handle)
+                return False
+
+            if probe and not await self.window_responds(handle):
+                return False
+
+            if self.governor is not None:
+                await self.runner.run(self.governor.restore, handle)
+
+            if self.mouse_handler.uses_background_input(handle):
+                with self.metrics.time('background_gesture'):
+                    accepted = await self.mouse_handler.background_keep_alive(handle)
+                if accepted and await self.runner.run(self.window_is_still_open, handle):
+                    return True
+
+            # Only the focus and mouse gesture need the shared desktop; preparation of other windows overlaps it.
+            with self.metrics.time('input_lock_wait'):
+                await self.input_lock.acquire()
+            try:
+                with self.metrics.time('input'):
+                    return await self.process_window_input(handle, retry_count)
+            finally:
+                self.input_lock.release()
+        except Exception as e:
+            Logger.log_and_handle_exception(e, f"Critical failure processing window with handle {handle}. Continuing with next window.",
+                                            handle=handle)
+            return False
 
-            success = False
-            for attempt in range(retry_count):
-                try:
-                    self.window_manager.ensure_window_active(handle)
+    async def process_window_input(self, handle: int, retry_count: int) -> bool:
+        success = False
+        for attempt in range(retry_count):
+            try:
+                with self.metrics.time('activate'):
+                    await self.window_manager.ensure_window_active(handle)
 
-                    app = Application().connect(handle=handle)
-                    window = app.top_window()
-                    window.set_focus()
+                with self.metrics.time('connect'):
+                    window = await self.runner.run(self.connection_cache.get, handle)
+                with self.metrics.time('focus'):
+                    await self.runner.run(window.set_focus)
 
-                    await asyncio.sleep(0.1)
+                await asyncio.sleep(0.1)
 
+                with self.metrics.time('click_outside'):
                     await self.mouse_handler.click_random_point_outside(window)
-                    await asyncio.sleep(0.1)
-
-                    if not self.window_is_still_open(handle):
-                        Logger.log_info(f"Window {handle} lost focus after click_random_point_outside. Attempt {attempt + 1}")
-                        continue
-
+                await asyncio.sleep(0.1)
+
+                if not await self.runner.run(self.window_is_still_open, handle):
+                    Logger.log_info(f"Window {handle} lost focus after click_random_point_outside. Attempt {attempt + 1}",
+                                    handle=handle)
+                    continue
+
+                verifying = self.verifier is not None
+                if verifying:
+                    try:
+                        with self.metrics.time('capture'):
+                            verifying = await self.runner.run(self.verifier.capture_before, handle)
+                    except Exception as e:
+                        Logger.log_and_handle_exception(e, f"Could not capture window {handle}; not verifying this attempt.",
+                                                   handle=handle)
+                        verifying = False
+
+                with self.metrics.time('click_item'):
                     await self.mouse_handler.click_specific_item(window)
-                    await asyncio.sleep(0.1)
-
-                    if not self.window_is_still_open(handle):
-                        Logger.log_info(f"Window {handle} lost focus after click_specific_item. Attempt {attempt + 1}")
+                await asyncio.sleep(0.1)
+
+                if not await self.runner.run(self.window_is_still_open, handle):
+                    Logger.log_info(f"Window {handle} lost focus after click_specific_item. Attempt {attempt + 1}",
+                                    handle=handle)
+                    continue
+
+                if verifying:
+                    with self.metrics.time('verify'):
+                        result = await self.runner.run(self.verifier.verify, handle)
+                    if result.disconnected:
+                        Logger.log_info(f"Window {handle} shows the disconnect dialog. Skipping this window.",
+                                        handle=handle)
+                        self.metrics.increment('disconnected', handle)
+                        break
+                    if not result.ok:
+                        Logger.log_info(f"Gesture on window {handle} changed only {result.changed_fraction:.1%} of the "
+                                        f"client area. Attempt {attempt + 1}", handle=handle)
+                        self.metrics.increment('unverified', handle)
                         continue
 
-                    self.window_manager.minimize_window(window)
+                if not self.mouse_handler.uses_background_input(handle):
+                    # A window served with background input stays restored: minimized windows present no frames to
+                    # verify the posted gesture against.
+                    with self.metrics.time('minimize'):
+                        await self.runner.run(self.window_manager.minimize_window, window)
                     await asyncio.sleep(0.1)
-                    success = True
-                    break  # Break the loop if successful
-                except ElementNotFoundError as e:
-                    Logger.log_info(f"Element not found for window {handle}. Skipping this window.")
-                    break  # Skip to the next window if the element is not found
-                except Exception as e:
-                    Logger.log_exception(e)
-                    if attempt < retry_count - 1:
-                        Logger.log_info(f"Retrying process_window for handle {handle} (Attempt {attempt + 2})")
+                success = True
+                break  # Break the loop if successful
+            except WindowNotFoundError:
+                Logger.log_info(f"Element not found for window {handle}. Skipping this window.", handle=handle)
+                break  # Skip to the next window if the element is not found
+            except Exception as e:
+                Logger.log_exception(e, handle=handle)
+                self.connection_cache.evict(handle)
+                if attempt < retry_count - 1:
+                    Logger.log_info(f"Retrying process_window for handle {handle} (Attempt {attempt + 2})",
+                                    handle=handle)
+                    self.metrics.increment('retry', handle)
+                    with self.metrics.time('retry_backoff'):
                         await asyncio.sleep(0.5 * (2 ** attempt))  # Incremental delay before retrying
-                    else:
-                        Logger.log_info(f"Failed to process window with handle {handle} after {retry_count} attempts.")
-
-            if not success:
-                Logger.log_info(f"Failed to process window with handle {handle}. Moving on to the next window.")
-        except Exception as e:
-            Logger.log_and_handle_exception(e, f"Critical failure processing window with handle {handle}. Continuing with next window.")
+                else:
+                    Logger.log_info(f"Failed to process window with handle {handle} after {retry_count} attempts.",
+                                    handle=handle)
 
+        if not success:
+            Logger.log_info(f"Failed to process window with handle {handle}. Moving on to the next window.",
+                            handle=handle)
+        return success
 
     async def finalize_windows(self):
         try:
-            if self.active_windows:
-                app = Application().connect(handle=self.active_windows[-1])
-                window = app.top_window()
-                await self.mouse_handler.click_random_point_outside(window)
+            responsive = [handle for handle in self.active_windows if not self.health.is_quarantined(handle)]
+            if responsive:
+                window = await self.runner.run(self.connection_cache.get, responsive[-1])
+                async with self.input_lock:
+                    await self.mouse_handler.click_random_point_outside(window)
                 await asyncio.sleep(2)
         except Exception as e:
             Logger.log_exception(e)
 
-    async def process_batches(self) -> None:
+    async def refresh_windows(self) -> bool:
+        """Sync the scheduler with the window registry; returns True when the set of windows changed."""
+        added, removed = await self.window_manager.update_roblox_windows()
+        if not added and not removed:
+            return False
+        self.active_windows = self.window_manager.registry.handles()
+        for handle in added:
+            self.resume_window(handle)
+        for handle, startup in self.supervisor.claim([h for h in added if h not in self.scheduler]):
+            # The client just joined, so its idle timer starts now; serving it while it loads would only fail.
+            self.scheduler.add_window(handle, last_reset=self.scheduler.clock())
+            self.metrics.observe('instance_startup', startup)
+        self.scheduler.sync_windows(self.active_windows)
+        self.connection_cache.retain(self.active_windows)
+        if self.state_store is not None and self.active_windows:
+            # An empty or briefly incomplete enumeration must not wipe the stored state, so a missing window is only
+            # forgotten once it would have been kicked anyway.
+            self.state_store.retain(((self.window_pid(handle), handle) for handle in self.active_windows),
+                                    grace=self.scheduler.kick_timeout)
+        if self.governor is not None:
+            self.governor.sync({handle: self.window_pid(handle) for handle in self.active_windows})
+        for handle in removed:
+            self.metrics.forget_window(handle)
+            self.health.forget(handle)
+        return True
+
+    async def process_due_windows(self) -> int:
+        """Serve the windows the scheduler reports as due, at most one batch at a time."""
         windows_per_batch = self.config_manager.get(ConfigKeys.WINDOWS_PER_BATCH, 1)
-        for batch_start in range(0, len(self.active_windows), windows_per_batch):
-            batch_handles = self.active_windows[batch_start:batch_start + windows_per_batch]
-            self.window_manager.position_windows_in_grid(batch_handles, windows_per_batch=len(batch_handles))
-            await self.process_each_window_in_batch(batch_handles, batch_start, windows_per_batch)
-
-    async def process_each_window_in_batch(self, batch_handles: List[int], batch_start: int, windows_per_batch: int) -> None:
-        for i, handle in enumerate(batch_handles):
-            Logger.log_info(f"[Batch {batch_start // windows_per_batch + 1}] Processing window {i + 1} with handle {handle})")
-            await self.process_window(handle)
+        processed = 0
+        start_time = self.clock()
+        while not self.shutdown_flag:
+            batch_handles = self.scheduler.pop_due(limit=windows_per_batch)
+            if not batch_handles:
+                break
+            background_handles = [h for h in batch_handles if self.mouse_handler.uses_background_input(h)]
+            foreground_handles = [h for h in batch_handles if h not in background_handles]
+
+            # Background input needs neither the screen nor the mouse, so those windows are served concurrently.
+            await asyncio.gather(*(self.serve_window(handle) for handle in background_handles),
+                                 self.process_pipeline(foreground_handles))
+            processed += len(batch_handles)
+            await self.throttle()
+
+        elapsed_time = self.clock() - start_time
+        if processed and elapsed_time > 0:
+            self.throughput = processed * 60 / elapsed_time
+        return processed
+
+    async def throttle(self) -> None:
+        """Pause between batches while the host is under pressure, unless a window is getting close to its kick."""
+        if self.governor is None:
+            return
+        delay = self.governor.throttle_delay()
+        worst_slack = self.scheduler.worst_case_slack()
+        if delay and worst_slack is not None and worst_slack > 2 * self.scheduler.safety_margin:
+            with self.metrics.time('throttle'):
+                await asyncio.sleep(delay)
+
+    async def process_pipeline(self, handles: List[int]) -> None:
+        """Restore and resize up to ``pipeline_depth`` windows ahead of the one currently receiving input.
+
+        With more windows than layout slots the slots are reused, so a window is only prepared once the previous
+        window in its slot has been served; otherwise it would be placed over the window receiving input.
+        """
+        if not handles:
+            return
+        depth = asyncio.Semaphore(self.pipeline_depth)
+        layout = await self.window_manager.window_layout(len(handles))
+        self.mouse_handler.update_free_space(self.window_manager.work_areas, layout)
+        slot_locks = {rect: asyncio.Lock() for rect in layout}
+
+        async def prepare_and_serve(index: int, handle: int) -> None:
+            async with slot_locks[layout[index]], depth:
+                # Probe before preparing: restoring and moving a hung window would stall this pipeline slot.
+                if not await self.window_responds(handle):
+                    await self.record_result(handle, False)
+                    return
+                if self.governor is not None:
+                    # Normal priority and every CPU again before the restore, so the client repaints at full speed.
+                    await self.runner.run(self.governor.restore, handle)
+                x, y = layout[index].left, layout[index].top
+                Logger.log_info(f"Preparing window {index + 1} with handle {handle} at position ({x}, {y})",
+                                handle=handle)
+                with self.metrics.time('prepare'):
+                    await self.window_manager.restore_and_resize_window(handle, x, y)
+                await self.serve_window(handle, probe=False)
+
+        await asyncio.gather(*(prepare_and_serve(i, handle) for i, handle in enumerate(handles)))
+
+    async def serve_window(self, handle: int, probe: bool = True) -> None:
+        Logger.log_info(f"Processing window with handle {handle} (slack {self.scheduler.slack(handle):.0f}s)", handle)
+        with self.metrics.time('process_window'):
+            success = await self.process_window(handle, probe=probe)
+        await self.record_result(handle, success)
+
+    async def record_result(self, handle: int, success: bool) -> None:
+        if success:
+            self.scheduler.record_success(handle)
+            self.metrics.increment('success', handle)
+        else:
+            self.scheduler.record_failure(handle, retry_at=self.health.release_time(handle))
+            self.metrics.increment('failure', handle)
+        if self.state_store is not None:
+            pid = self.window_pid(handle)
+            if success:
+                self.state_store.record_success(pid, handle, self.window_manager.transition_waits.get(handle))
+            else:
+                self.state_store.record_failure(pid, handle)
+        self.profiler.served(handle)
+        if success and not self.served_first_window:
+            self.served_first_window = True
+            STARTUP.mark('first window served')
+        if success and self.governor is not None:
+            await self.runner.run(self.governor.make_idle, handle)
 
     async def reset_afk_timer(self) -> None:
         if self.shutdown_flag:
             Logger.log_info("Shutdown flag detected. Exiting AFK timer reset cycle.")
             return
 
-        start_time = time.time()
-        Logger.log_info("Starting AFK timer reset cycle.")
+        start_time = self.clock()
+        processed = 0
         try:
-            self.active_windows = self.window_manager.find_roblox_windows()
+            await self.refresh_windows()
             if not self.active_windows:
                 Logger.log_info("No Roblox windows found. Skipping this cycle.")
                 return
 
-            await self.process_batches()
+            processed = await self.process_due_windows()
 
-            if not self.shutdown_flag:
+            uses_foreground = (self.mouse_handler.input_mode == 'foreground' or self.mouse_handler.verifier is None
+                               or self.mouse_handler.background_rejected)
+            # The baseline clicked outside once per sweep over all windows; the scheduler serves a few windows per
+            # pass, so the click follows the pass that completes a rotation.
+            if processed and self.scheduler.end_of_rotation() and uses_foreground and not self.shutdown_flag:
                 await self.finalize_windows()
-        except ElementNotFoundError as e:
+        except WindowNotFoundError as e:
             Logger.log_exception(e)
         except Exception as e:
             Logger.log_exception(e)
         finally:
-            elapsed_time = time.time() - start_time
-            Logger.log_info(f"AFK timer reset cycle completed in {elapsed_time:.2f} seconds.")
+            if processed and self.state_store is not None:
+                try:
+                    await self.runner.run(self.state_store.flush)
+                except Exception as e:
+                    Logger.log_exception(e)
+            if processed:
+                elapsed_time = self.clock() - start_time
+                worst_slack = self.scheduler.worst_case_slack()
+                self.metrics.observe('cycle', elapsed_time)
+                self.update_gauges()
+                cache_stats = self.connection_cache.stats()
+                Logger.log_info(f"AFK timer reset cycle served {processed} window(s) in {elapsed_time:.2f} seconds "
+                                f"({self.throughput:.1f} windows/minute). "
+                                f"Worst-case slack before kick: {worst_slack:.0f} seconds. "
+                                f"Connection cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses.")
 
 
     def window_is_still_open(self, handle):
+        # IsWindow never messages the window, so this check cannot block on a hung client before it is probed.
         try:
-            return win32gui.GetWindowText(handle) != ''
+            return self.backend.is_window(handle)
         except Exception as e:
             Logger.log_exception(e)
             return False
 
     async def monitor_resources(self):
         while not self.shutdown_flag:
-            cpu_usage = psutil.cpu_percent(interval=1)
-            memory_usage = psutil.virtual_memory().percent
-            Logger.log_info(f"CPU usage: {cpu_usage}%, Memory usage: {memory_usage}%")
-            if cpu_usage > 90 or memory_usage > 99:
-                Logger.log_info("High resource usage detected. Initiating graceful shutdown.")
-                await asyncio.sleep(30)
-            else:
-                await asyncio.sleep(1800)
+            interval = self.config_manager.get(ConfigKeys.RESOURCE_SAMPLE_INTERVAL, 30)
+            try:
+                if self.governor is not None:
+                    await self.sample_governor()
+                else:
+                    interval = await self.log_system_usage()
+            except Exception as e:
+                Logger.log_exception(e)
+            for _ in range(interval):
+                if self.shutdown_flag:
+                    break
+                await asyncio.sleep(1)
+
+    async def sample_governor(self) -> None:
+        await self.runner.run(self.governor.sample)
+        totals = self.governor.totals()
+        Logger.log_info(f"CPU usage: {self.governor.system_cpu}%, Memory usage: {self.governor.system_memory}%. "
+                        f"Roblox processes: {totals['cpu_percent']:.1f}% CPU, "
+                        f"{totals['rss_bytes'] / 2 ** 20:.0f} MiB resident, {totals['handles']} handles, "
+                        f"{totals['idle_processes']} idle.")
+        if self.governor.under_pressure():
+            trimmed = await self.runner.run(self.governor.trim_idle)
+            Logger.log_info(f"High resource usage detected. Slowing the reset cycle by "
+                            f"{self.governor.throttle_delay():.1f}s per batch and trimmed {trimmed} idle instance(s).")
+
+    async def log_system_usage(self) -> int:
+        """The plain usage log kept when the governor is disabled; returns the seconds until the next sample."""
+        cpu_usage, memory_usage = await self.runner.run(self.backend.system_usage)
+        Logger.log_info(f"CPU usage: {cpu_usage}%, Memory usage: {memory_usage}%")
+        if (cpu_usage > self.config_manager.get(ConfigKeys.CPU_PRESSURE_PERCENT, 90)
+                or memory_usage > self.config_manager.get(ConfigKeys.MEMORY_PRESSURE_PERCENT, 99)):
+            Logger.log_info("High resource usage detected.")
+            return 30
+        return 1800
 
     async def main_loop(self):
         while not self.shutdown_flag:
             try:
-                self.config_manager.dynamic_reload_config()
-                await self.reset_afk_timer()
+                self.config_manager.check_for_changes()
+                self.check_profile_control_file()
+                async with self.profiler.cycle(lambda: self.active_windows):
+                    await self.reset_afk_timer()
+                self.first_cycle.set()
                 if self.shutdown_flag:
                     Logger.log_info("Shutdown flag detected. Exiting script.")
                     break
-                sleep_time = random.randint(900, 960)
-                Logger.log_info(f"Sleeping for {sleep_time} seconds.")
-                for _ in range(sleep_time):
+                sleep_time = self.scheduler.time_until_next_dispatch()
+                if sleep_time is None:
+                    sleep_time = self.window_manager.registry.poll_interval or 30
+                for _ in range(math.ceil(sleep_time)):
                     if self.shutdown_flag:
                         Logger.log_info("Shutdown flag detected during sleep. Exiting script.")
                         break
                     await asyncio.sleep(1)
+                    self.config_manager.check_for_changes()
+                    self.check_profile_control_file()
+                    if await self.refresh_windows():
+                        break
             except Exception as e:
                 Logger.log_exception(e)
+                self.first_cycle.set()
                 await asyncio.sleep(60)
         Logger.log_info("RobloxAFKBot has been gracefully shut down.")
 
+    async def supervise_instances(self):
+        while not self.shutdown_flag:
+            if self.supervisor.launcher is not None and self.supervisor.expected:
+                try:
+                    await self.supervisor.maintain(len(self.active_windows))
+                except Exception as e:
+                    Logger.log_exception(e)
+            await asyncio.sleep(1)
+
+    def update_gauges(self) -> None:
+        self.metrics.set_gauge('deadline_slack_seconds', self.scheduler.worst_case_slack())
+        self.metrics.set_gauge('windows_tracked', len(self.scheduler))
+        self.metrics.set_gauge('throughput_windows_per_minute', self.throughput)
+        self.metrics.set_gauge('layout_moves_skipped', self.window_manager.layout_skips)
+        self.metrics.set_gauge('windows_quarantined', self.health.quarantined())
+        self.metrics.set_gauge('instances_expected', self.supervisor.expected)
+        self.metrics.set_gauge('instances_booting', len(self.supervisor.pending))
+        self.metrics.set_gauge('instance_launch_failures', self.supervisor.failed)
+        if self.governor is not None:
+            for name, value in self.governor.totals().items():
+                self.metrics.set_gauge(f"roblox_{name}", value)
+
+    async def write_metrics_snapshots(self):
+        snapshot_path = self.config_manager.get(ConfigKeys.METRICS_SNAPSHOT_PATH, '')
+        if not snapshot_path:
+            return
+        snapshot_path = self.resolve_path(snapshot_path)
+        interval = self.config_manager.get(ConfigKeys.METRICS_SNAPSHOT_INTERVAL, 60)
+        while not self.shutdown_flag:
+            try:
+                self.update_gauges()
+                self.metrics.write_snapshot(snapshot_path)
+            except Exception as e:
+                Logger.log_exception(e)
+            for _ in range(max(1, interval)):
+                if self.shutdown_flag:
+                    break
+                await asyncio.sleep(1)
+
+    async def start_metrics_server(self):
+        host = self.config_manager.get(ConfigKeys.METRICS_HOST, '127.0.0.1')
+        port = self.config_manager.get(ConfigKeys.METRICS_PORT, 0)
+        if not port:
+            return
+        self.metrics_server = MetricsServer(self.metrics, host=host, port=port, refresh=self.update_gauges)
+        try:
+            await self.metrics_server.start()
+        except OSError as e:
+            Logger.log_and_handle_exception(e, f"Metrics endpoint could not listen on {host}:{port}. Continuing without it.")
+            self.metrics_server = None
+
+    async def preload_backend(self):
+        try:
+            await self.runner.run(self.backend.preload)
+        except Exception as e:
+            Logger.log_exception(e)
+
+    async def start_optional_subsystems(self) -> list:
+        self.init_optional_subsystems()
+        await self.start_metrics_server()
+        tasks = [
+            asyncio.create_task(self.monitor_resources()),
+            asyncio.create_task(self.write_metrics_snapshots()),
+            asyncio.create_task(self.supervise_instances()),
+        ]
+        if self.fleet_agent is not None:
+            tasks.append(asyncio.create_task(self.fleet_agent.run()))
+        STARTUP.mark('optional subsystems')
+        self.report_startup()
+        return tasks
+
+    def report_startup(self) -> None:
+        if STARTUP.reported:
+            return
+        STARTUP.reported = True
+        for line in STARTUP.report():
+            Logger.log_info(line)
+        self.metrics.set_gauge('startup_seconds', sum(seconds for _, seconds in STARTUP.marks))
+
     async def run(self):
         Logger.log_info("Script started")
         try:
-            monitor_task = asyncio.create_task(self.monitor_resources())
             main_loop_task = asyncio.create_task(self.main_loop())
-
-            await asyncio.gather(monitor_task, main_loop_task)
+            tasks = [main_loop_task, asyncio.create_task(self.preload_backend())]
+            # Serve the windows that are already open before starting anything the first gesture does not need.
+            first_cycle = asyncio.create_task(self.first_cycle.wait())
+            await asyncio.wait([main_loop_task, first_cycle], return_when=asyncio.FIRST_COMPLETED)
+            first_cycle.cancel()
+            STARTUP.mark('first cycle')
+            if not main_loop_task.done():
+                tasks += await self.start_optional_subsystems()
+
+            await asyncio.gather(*tasks)
         except asyncio.CancelledError:
             Logger.log_info("Tasks have been cancelled due to shutdown.")
         finally:
+            if self.metrics_server is not None:
+                await self.metrics_server.stop()
+            try:
+                await self.profiler.close()
+            except Exception as e:
+                Logger.log_exception(e)
+            self.window_manager.registry.stop()
+            self.supervisor.close()
+            if self.governor is not None:
+                # Leave no client stuck at low priority on one CPU after the bot exits.
+                self.governor.restore_all()
+            self.runner.shutdown()
+            if self.state_store is not None:
+                try:
+                    self.state_store.close()
+                except Exception as e:
+                    Logger.log_exception(e)
             Logger.log_info("Script has been terminated.")
 
     def shutdown(self):
@@ -427,15 +1067,27 @@ def main():
         print(f"Script interrupted by signal {sig}. Initiating graceful shutdown...")
         bot.shutdown()
 
+    def profile_signal_handler(sig, frame):
+        bot.request_profile(f"signal {sig}")
+
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
+    # SIGUSR1 on POSIX; on Windows, Ctrl+Break in the console window.
+    profile_signal = getattr(signal, 'SIGUSR1', None) or getattr(signal, 'SIGBREAK', None)
+    if profile_signal is not None:
+        signal.signal(profile_signal, profile_signal_handler)
 
     script_dir = os.path.dirname(os.path.abspath(__file__))
     config_path = os.path.join(script_dir, "config.json")
     config_manager = ConfigManager(config_file=config_path)
+    STARTUP.mark('config')
 
     bot = RobloxAFKBot(config_manager)
-    asyncio.run(bot.run())
+    STARTUP.mark('bot init')
+    try:
+        asyncio.run(bot.run())
+    finally:
+        Logger.shutdown()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,174 @@
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+
+class WindowNotFoundError(Exception):
+    """Raised by a backend when a window handle no longer refers to a live window."""
+
+
+class Rect(NamedTuple):
+    left: int
+    top: int
+    right: int
+    bottom: int
+
+    def width(self) -> int:
+        return self.right - self.left
+
+    def height(self) -> int:
+        return self.bottom - self.top
+
+
+class ProcessSample(NamedTuple):
+    cpu_seconds: float
+    rss: int
+    handles: int
+
+
+class DesktopBackend:
+    """Every desktop call the bot makes goes through this interface.
+
+    ``Win32Backend`` talks to the real desktop; ``SimulatedBackend`` models fake windows in memory so
+    the bot can be profiled and regression-tested on machines without Windows or Roblox.
+    """
+
+    name = 'abstract'
+
+    def preload(self) -> None:
+        """Import whatever the backend loads lazily; called on a worker thread at startup."""
+
+    # Window discovery and state
+    def find_windows(self, title: str, class_name: str) -> List[int]:
+        raise NotImplementedError
+
+    def is_window(self, handle: int) -> bool:
+        raise NotImplementedError
+
+    def get_window_text(self, handle: int) -> str:
+        raise NotImplementedError
+
+    def get_class_name(self, handle: int) -> str:
+        raise NotImplementedError
+
+    def get_window_rect(self, handle: int) -> Rect:
+        raise NotImplementedError
+
+    def get_window_thread_process_id(self, handle: int) -> Tuple[int, int]:
+        raise NotImplementedError
+
+    def is_iconic(self, handle: int) -> bool:
+        raise NotImplementedError
+
+    def is_maximized(self, handle: int) -> bool:
+        raise NotImplementedError
+
+    def get_foreground_window(self) -> int:
+        raise NotImplementedError
+
+    # Window state transitions
+    def restore_window(self, handle: int, activate: bool = True) -> None:
+        """Restore a minimized or maximized window; with ``activate=False`` the foreground window keeps focus."""
+        raise NotImplementedError
+
+    def minimize_window(self, handle: int) -> None:
+        raise NotImplementedError
+
+    def set_window_pos(self, handle: int, x: int, y: int, width: int, height: int, activate: bool = True) -> None:
+        raise NotImplementedError
+
+    def allow_set_foreground_window(self) -> None:
+        raise NotImplementedError
+
+    def attach_thread_input(self, thread_id: int, target_thread_id: int, attach: bool) -> None:
+        raise NotImplementedError
+
+    def set_foreground_window(self, handle: int) -> None:
+        raise NotImplementedError
+
+    def bring_window_to_top(self, handle: int) -> None:
+        raise NotImplementedError
+
+    def probe_window(self, handle: int, timeout: float) -> bool:
+        """True if the window's thread processes messages; must return within ``timeout`` seconds."""
+        raise NotImplementedError
+
+    def connect(self, handle: int):
+        """Return a window wrapper exposing ``rectangle()``, ``set_focus()`` and ``minimize()``."""
+        raise NotImplementedError
+
+    def create_window_event_source(self):
+        """Return a ``WindowEventSource`` fed with create/destroy/rename events, or None to rely on polling."""
+        return None
+
+    # Screen and input
+    def screen_size(self) -> Tuple[int, int]:
+        raise NotImplementedError
+
+    def get_taskbar_rect(self) -> Rect:
+        raise NotImplementedError
+
+    def monitor_work_areas(self) -> List[Rect]:
+        """Work area (screen minus taskbar and docked bars) of every monitor, primary first."""
+        raise NotImplementedError
+
+    def move_mouse(self, x: int, y: int) -> None:
+        raise NotImplementedError
+
+    def click(self) -> None:
+        raise NotImplementedError
+
+    def send_input(self, events) -> None:
+        """Deliver a compiled gesture (``gestures.InputEvent`` list) to the desktop, honouring each event's delay.
+
+        Events without a delay between them are submitted together; the call blocks for the gesture's duration.
+        """
+        raise NotImplementedError
+
+    def post_mouse_event(self, handle: int, kind: str, x: int, y: int, pressed: bool = False) -> bool:
+        """Post a ``move``/``down``/``up`` left-button event at client coordinates straight to the window.
+
+        Unlike the global mouse calls this works while the window is minimized or behind others. Returns False
+        when the message could not be posted; True only means it was queued, not that the client acted on it.
+        """
+        raise NotImplementedError
+
+    def client_size(self, handle: int) -> Tuple[int, int]:
+        """Width and height of the window's client area."""
+        raise NotImplementedError
+
+    def capture_client(self, handle: int, out) -> None:
+        """Copy the client area into ``out`` as top-down 32-bit BGRA rows.
+
+        ``out`` is any writable buffer of ``width * height * 4`` bytes, so callers can reuse one allocation.
+        """
+        raise NotImplementedError
+
+    # Processes
+    def system_usage(self) -> Tuple[float, float]:
+        """System-wide CPU percent since the previous call and memory percent in use; must not block."""
+        raise NotImplementedError
+
+    def sample_process(self, pid: int) -> ProcessSample:
+        """Cumulative CPU time, resident memory and open handle count of a process; must not block."""
+        raise NotImplementedError
+
+    def set_process_priority(self, pid: int, low: bool) -> None:
+        """Switch a process between below-normal and normal priority class."""
+        raise NotImplementedError
+
+    def set_process_affinity(self, pid: int, cpus: Optional[Sequence[int]]) -> None:
+        """Restrict a process to ``cpus``; None allows every CPU again."""
+        raise NotImplementedError
+
+    def trim_working_set(self, pid: int) -> None:
+        """Ask the OS to page out as much of the process's working set as it can."""
+        raise NotImplementedError
+
+
+def create_backend(name: str = 'win32', **kwargs) -> DesktopBackend:
+    if name == 'win32':
+        from win32_backend import Win32Backend
+        return Win32Backend(**kwargs)
+    if name == 'simulated':
+        from simulated_backend import SimulatedBackend
+        return SimulatedBackend(**kwargs)
+    raise ValueError(f"Unknown desktop backend: {name}")
@@ -0,0 +1,179 @@
+"""Benchmark the AFK cycle against the simulated desktop backend.
+
+Runs one cold sweep over N simulated Roblox windows for each requested window count and reports cycle time,
+desktop calls per window and how long the event loop was blocked. With ``--baseline`` the run fails when any
+metric regresses by more than ``--tolerance`` against a previous ``--json`` output, so scaling regressions show up
+on a plain Linux CI machine.
+
+    python benchmark.py --windows 5 20 50 --latency restore=0.01 --failure focus=0.05 --json bench.json
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import sys
+import time
+from config_manager import ConfigManager
+from simulated_backend import SimulatedBackend
+from afk_script import Logger, RobloxAFKBot
+
+DEFAULT_LATENCIES = {
+    'find_windows': 0.01,
+    'connect': 0.005,
+    'restore': 0.002,
+    'set_window_pos': 0.002,
+    'focus': 0.001,
+    'click': 0.0005,
+}
+
+
+class EventLoopLagProbe:
+    """Measures how long the event loop fails to run a task that asks to wake every ``interval`` seconds."""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.total_lag = 0.0
+        self.max_lag = 0.0
+        self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = loop.time() - started - self.interval
+            if lag > 0:
+                self.total_lag += lag
+                self.max_lag = max(self.max_lag, lag)
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+
+
+async def run_cycle(bot: RobloxAFKBot, backend: SimulatedBackend, window_count: int, restored: bool = False) -> dict:
+    for handle in list(backend.windows):
+        backend.close_window(handle)
+    for _ in range(window_count):
+        handle = backend.spawn_window()
+        # Background input leaves windows restored after their first (foreground) visit; start from that state.
+        backend.windows[handle].iconic = not restored
+    await bot.refresh_windows()
+    backend.reset_counters()
+    bot.window_manager.transition_waits.clear()
+
+    probe = EventLoopLagProbe()
+    probe.start()
+    start_time = time.perf_counter()
+    processed = await bot.process_due_windows()
+    cycle_time = time.perf_counter() - start_time
+    await probe.stop()
+
+    calls = sum(backend.call_counts.values())
+    reset = sum(1 for window in backend.windows.values() if window.clicks)
+    return {
+        'windows': window_count,
+        'processed': processed,
+        'reset': reset,
+        'cycle_seconds': round(cycle_time, 4),
+        'seconds_per_window': round(cycle_time / max(1, window_count), 4),
+        'windows_per_minute': round(bot.throughput, 2),
+        'calls_per_window': round(calls / max(1, window_count), 2),
+        'loop_blocked_seconds': round(probe.total_lag, 4),
+        'loop_max_block_seconds': round(probe.max_lag, 4),
+        'transition_wait_seconds': round(sum(sum(waits.values()) for waits in
+                                             bot.window_manager.transition_waits.values()), 4),
+        'connection_cache': bot.connection_cache.stats(),
+        'calls': dict(backend.call_counts),
+    }
+
+
+def parse_pairs(pairs, default):
+    values = dict(default)
+    for pair in pairs or []:
+        key, _, value = pair.partition('=')
+        values[key] = float(value)
+    return values
+
+
+def compare_with_baseline(results, baseline_path, tolerance):
+    with open(baseline_path, 'r') as file:
+        baseline = {entry['windows']: entry for entry in json.load(file)}
+    regressions = []
+    for result in results:
+        previous = baseline.get(result['windows'])
+        if previous is None:
+            continue
+        for metric in ('seconds_per_window', 'calls_per_window', 'loop_blocked_seconds'):
+            if result[metric] > previous[metric] * (1 + tolerance) + 1e-3:
+                regressions.append(f"{result['windows']} windows: {metric} {previous[metric]} -> {result[metric]}")
+    return regressions
+
+
+async def main_async(args):
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    config_manager = ConfigManager(config_file=os.path.join(script_dir, "config.json"))
+    # Background input is only used when the gesture can be verified.
+    config_manager.apply_overrides(windows_per_batch=args.windows_per_batch, log_console=False,
+                                   state_store_path='', verify_gesture=args.input_mode == 'background')
+    backend = SimulatedBackend(window_count=0, latencies=parse_pairs(args.latency, DEFAULT_LATENCIES),
+                               failure_rates=parse_pairs(args.failure, {}),
+                               transition_delays=parse_pairs(args.transition, {}),
+                               background_reject_rate=args.background_reject_rate, seed=args.seed)
+    bot = RobloxAFKBot(config_manager, backend=backend)
+    bot.init_optional_subsystems()
+    bot.mouse_handler.click_wait_time = args.click_wait
+    bot.mouse_handler.input_mode = args.input_mode
+    bot.pipeline_depth = args.pipeline_depth
+    try:
+        restored = args.input_mode == 'background'
+        return [await run_cycle(bot, backend, count, restored) for count in args.windows]
+    finally:
+        bot.runner.shutdown()
+        Logger.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--windows', type=int, nargs='+', default=[5, 20], help="window counts to benchmark")
+    parser.add_argument('--latency', action='append', metavar='OP=SECONDS', help="per-call latency override")
+    parser.add_argument('--failure', action='append', metavar='OP=RATE', help="per-call failure rate")
+    parser.add_argument('--transition', action='append', metavar='OP=SECONDS', help="restore/focus state delay")
+    parser.add_argument('--click-wait', type=float, default=0.0, help="click_wait_time used during the run")
+    parser.add_argument('--input-mode', choices=['foreground', 'background'], default='foreground')
+    parser.add_argument('--background-reject-rate', type=float, default=0.0,
+                        help="share of windows refusing background input")
+    parser.add_argument('--windows-per-batch', type=int, default=1)
+    parser.add_argument('--pipeline-depth', type=int, default=2)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', help="write the results to this file")
+    parser.add_argument('--baseline', help="fail if results regress against this earlier --json output")
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    args = parser.parse_args()
+
+    results = asyncio.run(main_async(args))
+    for result in results:
+        print(f"{result['windows']:>5} windows: {result['cycle_seconds']:>8.3f}s cycle, "
+              f"{result['windows_per_minute']:.1f} windows/min, {result['calls_per_window']:.1f} calls/window, "
+              f"loop blocked {result['loop_blocked_seconds']:.3f}s (max {result['loop_max_block_seconds']:.3f}s), "
+              f"{result['reset']}/{result['windows']} reset")
+
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump(results, file, indent=2)
+
+    if args.baseline:
+        regressions = compare_with_baseline(results, args.baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+
+class BlockingCallRunner:
+    """Runs blocking Win32/pywinauto calls on a bounded thread pool so the event loop keeps turning."""
+
+    def __init__(self, max_workers: int = 4):
+        self.max_workers = max_workers
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="win32-call")
+
+    async def run(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+class InlineRunner:
+    """Runs the calls directly on the event loop thread.
+
+    Only for backends whose calls do not really block, e.g. the simulated backend on a virtual clock, where a
+    worker thread would let real time pass that the virtual clock cannot see.
+    """
+
+    async def run(self, func, *args, **kwargs):
+        return func(*args, **kwargs)
+
+    def shutdown(self) -> None:
+        pass
@@ -0,0 +1,66 @@
+import argparse
+import os
+import sys
+
+# Type libraries pywinauto wraps with comtypes when it is imported.
+TYPE_LIBRARIES = ('UIAutomationCore.dll',)
+BUNDLED_DIR_NAME = 'comtypes_cache'
+
+
+def default_cache_dir() -> str:
+    root = os.environ.get('LOCALAPPDATA') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(root, 'roblox_afk', BUNDLED_DIR_NAME)
+
+
+def bundled_dir() -> str:
+    """Pre-generated wrappers shipped with the build: inside the PyInstaller bundle, or next to this file."""
+    base = getattr(sys, '_MEIPASS', os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(base, BUNDLED_DIR_NAME)
+
+
+def configure(cache_dir: str = '') -> None:
+    """Point comtypes at persistent wrapper directories before pywinauto is imported.
+
+    In a PyInstaller bundle ``comtypes.gen`` lives in the temporary extraction directory, so the UI Automation
+    wrappers would be generated again on every start. Wrappers shipped with the build are used first; anything
+    missing is generated once into ``cache_dir``, which survives restarts.
+    """
+    import comtypes.client
+    import comtypes.gen
+
+    cache_dir = cache_dir or default_cache_dir()
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+    except OSError:
+        return
+    for path in (cache_dir, bundled_dir()):
+        if os.path.isdir(path) and path not in comtypes.gen.__path__:
+            comtypes.gen.__path__.insert(0, path)
+    comtypes.client.gen_dir = cache_dir
+
+
+def pregenerate(target_dir: str) -> None:
+    """Generate the wrappers into ``target_dir``; run at build time and bundle the directory."""
+    import comtypes.client
+    import comtypes.gen
+
+    os.makedirs(target_dir, exist_ok=True)
+    if target_dir not in comtypes.gen.__path__:
+        comtypes.gen.__path__.insert(0, target_dir)
+    comtypes.client.gen_dir = target_dir
+    for library in TYPE_LIBRARIES:
+        comtypes.client.GetModule(library)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Pre-generate the comtypes wrappers pywinauto needs, for bundling with PyInstaller "
+                    f"(e.g. --add-data \"{BUNDLED_DIR_NAME};{BUNDLED_DIR_NAME}\").")
+    parser.add_argument('target', nargs='?', default=bundled_dir())
+    args = parser.parse_args()
+    pregenerate(args.target)
+    print(f"comtypes wrappers written to {args.target}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,13 @@
 import json
 import os
-import time
 import sys
+from gestures import DEFAULT_GESTURE, GestureError, validate_gesture
 from enum import Enum
+from types import MappingProxyType
 import logging
 
+logger = logging.getLogger(__name__)
+
 class ConfigKeys(Enum):
     LOG_FILE_PATH = 'log_file_path'
     MAX_BYTES = 'max_bytes'
@@ -14,112 +17,314 @@ class ConfigKeys(Enum):
     CLICK_WAIT_TIME = 'click_wait_time'
     TASKBAR_HEIGHT = 'taskbar_height'
     WINDOWS_PER_BATCH = 'windows_per_batch'
+    KICK_TIMEOUT = 'kick_timeout'
+    RESET_INTERVAL = 'reset_interval'
+    SAFETY_MARGIN = 'safety_margin'
+    BACKEND = 'backend'
+    INPUT_MODE = 'input_mode'
+    PIPELINE_DEPTH = 'pipeline_depth'
+    WORKER_THREADS = 'worker_threads'
+    METRICS_HOST = 'metrics_host'
+    METRICS_PORT = 'metrics_port'
+    METRICS_SNAPSHOT_PATH = 'metrics_snapshot_path'
+    METRICS_SNAPSHOT_INTERVAL = 'metrics_snapshot_interval'
+    LOG_FORMAT = 'log_format'
+    LOG_CONSOLE = 'log_console'
+    LOG_RATE_LIMIT = 'log_rate_limit'
+    CLICK_OUTSIDE_MIN_X = 'click_outside_min_x'
+    STATE_STORE_PATH = 'state_store_path'
+    GOVERNOR_ENABLED = 'governor_enabled'
+    RESOURCE_SAMPLE_INTERVAL = 'resource_sample_interval'
+    CPU_PRESSURE_PERCENT = 'cpu_pressure_percent'
+    MEMORY_PRESSURE_PERCENT = 'memory_pressure_percent'
+    VERIFY_GESTURE = 'verify_gesture'
+    VERIFY_MIN_CHANGED_FRACTION = 'verify_min_changed_fraction'
+    VERIFY_PIXEL_TOLERANCE = 'verify_pixel_tolerance'
+    VERIFY_TEMPLATE_PATH = 'verify_template_path'
+    GESTURE = 'gesture'
+    PROBE_TIMEOUT = 'probe_timeout'
+    QUARANTINE_THRESHOLD = 'quarantine_threshold'
+    QUARANTINE_BACKOFF = 'quarantine_backoff'
+    QUARANTINE_MAX_BACKOFF = 'quarantine_max_backoff'
+    EXPECTED_INSTANCES = 'expected_instances'
+    LAUNCH_COMMAND = 'launch_command'
+    MAX_CONCURRENT_LAUNCHES = 'max_concurrent_launches'
+    LAUNCH_STAGGER = 'launch_stagger'
+    LAUNCH_TIMEOUT = 'launch_timeout'
+    PROFILE_CYCLES = 'profile_cycles'
+    PROFILE_TRIGGER = 'profile_trigger'
+    PROFILE_DIR = 'profile_dir'
+    PROFILE_CONTROL_FILE = 'profile_control_file'
+    FLEET_COORDINATOR = 'fleet_coordinator'
+    FLEET_AGENT_NAME = 'fleet_agent_name'
+    FLEET_REPORT_INTERVAL = 'fleet_report_interval'
+
+# key: (type, default, minimum); keys with a default of None are required in the file
+CONFIG_SCHEMA = {
+    ConfigKeys.LOG_FILE_PATH: (str, None, None),
+    ConfigKeys.MAX_BYTES: (int, None, 0),
+    ConfigKeys.BACKUP_COUNT: (int, None, 0),
+    ConfigKeys.WINDOW_WIDTH: (int, None, 0),
+    ConfigKeys.WINDOW_HEIGHT: (int, None, 0),
+    ConfigKeys.CLICK_WAIT_TIME: (float, None, 0),
+    ConfigKeys.TASKBAR_HEIGHT: (int, None, 0),
+    ConfigKeys.WINDOWS_PER_BATCH: (int, None, 1),
+    ConfigKeys.KICK_TIMEOUT: (int, 1200, 0),
+    ConfigKeys.RESET_INTERVAL: (int, 900, 0),
+    ConfigKeys.SAFETY_MARGIN: (int, 120, 0),
+    ConfigKeys.BACKEND: (str, 'win32', None),
+    ConfigKeys.INPUT_MODE: (str, 'foreground', None),
+    ConfigKeys.PIPELINE_DEPTH: (int, 2, 1),
+    ConfigKeys.WORKER_THREADS: (int, 4, 1),
+    ConfigKeys.METRICS_HOST: (str, '127.0.0.1', None),
+    ConfigKeys.METRICS_PORT: (int, 0, 0),
+    ConfigKeys.METRICS_SNAPSHOT_PATH: (str, '', None),
+    ConfigKeys.METRICS_SNAPSHOT_INTERVAL: (int, 60, 1),
+    ConfigKeys.LOG_FORMAT: (str, 'json', None),
+    ConfigKeys.LOG_CONSOLE: (bool, True, None),
+    ConfigKeys.LOG_RATE_LIMIT: (int, 20, 0),
+    ConfigKeys.CLICK_OUTSIDE_MIN_X: (int, 451, 0),
+    ConfigKeys.STATE_STORE_PATH: (str, '', None),
+    ConfigKeys.GOVERNOR_ENABLED: (bool, True, None),
+    ConfigKeys.RESOURCE_SAMPLE_INTERVAL: (int, 30, 1),
+    ConfigKeys.CPU_PRESSURE_PERCENT: (int, 90, 0),
+    ConfigKeys.MEMORY_PRESSURE_PERCENT: (int, 99, 0),
+    ConfigKeys.VERIFY_GESTURE: (bool, False, None),
+    ConfigKeys.VERIFY_MIN_CHANGED_FRACTION: (float, 0.01, 0),
+    ConfigKeys.VERIFY_PIXEL_TOLERANCE: (int, 16, 0),
+    ConfigKeys.VERIFY_TEMPLATE_PATH: (str, '', None),
+    ConfigKeys.GESTURE: (list, DEFAULT_GESTURE, None),
+    ConfigKeys.PROBE_TIMEOUT: (float, 1.0, 0),
+    ConfigKeys.QUARANTINE_THRESHOLD: (int, 3, 1),
+    ConfigKeys.QUARANTINE_BACKOFF: (int, 60, 0),
+    ConfigKeys.QUARANTINE_MAX_BACKOFF: (int, 900, 0),
+    ConfigKeys.EXPECTED_INSTANCES: (int, 0, 0),
+    ConfigKeys.LAUNCH_COMMAND: (list, [], None),
+    ConfigKeys.MAX_CONCURRENT_LAUNCHES: (int, 1, 1),
+    ConfigKeys.LAUNCH_STAGGER: (int, 30, 0),
+    ConfigKeys.LAUNCH_TIMEOUT: (int, 300, 1),
+    ConfigKeys.PROFILE_CYCLES: (int, 3, 1),
+    ConfigKeys.PROFILE_TRIGGER: (int, 0, 0),
+    ConfigKeys.PROFILE_DIR: (str, 'profiles', None),
+    ConfigKeys.PROFILE_CONTROL_FILE: (str, 'profile.request', None),
+    ConfigKeys.FLEET_COORDINATOR: (str, '', None),
+    ConfigKeys.FLEET_AGENT_NAME: (str, '', None),
+    ConfigKeys.FLEET_REPORT_INTERVAL: (int, 10, 1),
+}
+
+
+class ConfigError(Exception):
+    pass
+
+
+def user_data_dir() -> str:
+    """Per-user directory for files the bot writes when it runs as a PyInstaller bundle."""
+    root = os.environ.get('LOCALAPPDATA') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(root, 'roblox_afk')
+
+
+class ConfigSnapshot:
+    """Immutable, fully validated view of the configuration: file values merged with environment overrides."""
+
+    def __init__(self, values: dict, version: int):
+        self._values = MappingProxyType(dict(values))
+        self.version = version
+
+    def get(self, key: ConfigKeys, default=None):
+        return self._values.get(key.value, default)
+
+    def as_dict(self) -> dict:
+        return dict(self._values)
+
+    def changed_keys(self, other: 'ConfigSnapshot') -> set:
+        keys = set(self._values) | set(other._values)
+        return {ConfigKeys(key) for key in keys if self._values.get(key) != other._values.get(key)}
+
+
+class MtimeConfigWatcher:
+    """Detects config file changes by (mtime, size); ``changed`` is a single stat call.
+
+    Any object with a ``changed() -> bool`` method can be passed to ``ConfigManager`` instead, e.g. one backed by
+    OS change notifications.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.signature = self._signature()
+
+    def _signature(self):
+        try:
+            stat = os.stat(self.path)
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return None
+
+    def changed(self) -> bool:
+        signature = self._signature()
+        if signature == self.signature:
+            return False
+        self.signature = signature
+        return True
+
+
+def coerce_value(key: ConfigKeys, value):
+    expected_type, _, minimum = CONFIG_SCHEMA[key]
+    if isinstance(value, str) and expected_type is not str:
+        text = value.strip()
+        try:
+            if expected_type is list:
+                value = json.loads(text)
+            elif expected_type is bool:
+                if text.lower() not in ('1', 'true', 'yes', 'on', '0', 'false', 'no', 'off'):
+                    raise ValueError(text)
+                value = text.lower() in ('1', 'true', 'yes', 'on')
+            else:
+                value = expected_type(text)
+        except ValueError:
+            raise ConfigError(f"Invalid value for {key.value}: expected {expected_type.__name__}, got {value!r}.")
+    if expected_type is float and isinstance(value, int) and not isinstance(value, bool):
+        value = float(value)
+    if not isinstance(value, expected_type) or (expected_type is int and isinstance(value, bool)):
+        raise ConfigError(f"Invalid type for {key.value}: expected {expected_type.__name__}, "
+                          f"got {type(value).__name__}")
+    if minimum is not None and value < minimum:
+        raise ConfigError(f"Invalid value for {key.value}: must be at least {minimum}.")
+    if key is ConfigKeys.GESTURE:
+        try:
+            validate_gesture(value)
+        except GestureError as e:
+            raise ConfigError(f"Invalid value for {key.value}: {e}")
+    return value
+
 
 class ConfigManager:
-    def __init__(self, config_file='config.json', reload_interval=360):
+    def __init__(self, config_file='config.json', watcher=None):
         self.config_file = config_file
-        self.reload_interval = reload_interval
-        self.last_reload_time = time.time()
+        self.subscribers = []
+        self.overrides = {}
 
         if getattr(sys, 'frozen', False):
             self.base_dir = sys._MEIPASS
+            # The bundle is extracted to a temporary directory that is deleted at exit, so files written there
+            # (log, state store, metrics snapshot, profiles) would not survive; relative paths go to the user's
+            # data directory instead.
+            self.data_dir = user_data_dir()
+            try:
+                os.makedirs(self.data_dir, exist_ok=True)
+            except OSError as e:
+                logger.error(f"Could not create the data directory {self.data_dir}: {e}")
         else:
             self.base_dir = os.path.dirname(os.path.abspath(__file__))
+            self.data_dir = self.base_dir
+
+        self.watcher = watcher or MtimeConfigWatcher(self.config_file)
+        try:
+            self.snapshot = self.load_snapshot(version=1)
+        except ConfigError as e:
+            logger.error(str(e))
+            print(str(e))
+            sys.exit(1)
 
-        self.config = self.load_and_resolve_config()
-
-    def validate_config(self, config: dict):
-        required_keys = {
-            ConfigKeys.LOG_FILE_PATH: str,
-            ConfigKeys.MAX_BYTES: int,
-            ConfigKeys.BACKUP_COUNT: int,
-            ConfigKeys.WINDOW_WIDTH: int,
-            ConfigKeys.WINDOW_HEIGHT: int,
-            ConfigKeys.CLICK_WAIT_TIME: int,
-            ConfigKeys.TASKBAR_HEIGHT: int,
-            ConfigKeys.WINDOWS_PER_BATCH: int
-        }
-
-        for key, expected_type in required_keys.items():
-            value = config.get(key.value)
+    def validate_config(self, config: dict) -> dict:
+        """Merge environment overrides into ``config`` and return the typed values for every known key."""
+        values = {}
+        for key, (expected_type, default, _) in CONFIG_SCHEMA.items():
+            env_key = key.value.upper()
+            value = os.environ.get(env_key, config.get(key.value))
+            if key.value in self.overrides:
+                value = self.overrides[key.value]
             if value is None:
-                logging.error(f"Missing required configuration key: {key}")
-                sys.exit(1)
-            if not isinstance(value, expected_type):
-                logging.error(f"Invalid type for {key}: expected {expected_type.__name__}, got {type(config[key]).__name__}")
-                sys.exit(1)
-
-            if key == ConfigKeys.LOG_FILE_PATH:
-                if not os.path.isabs(value):
-                    config[key.value] = os.path.abspath(value)
-                if not value.startswith(self.base_dir):
-                    logging.error(f"Invalid log file path: {value} is outside the allowed directory.")
-                    sys.exit(1)
-            elif key in {ConfigKeys.WINDOW_WIDTH, ConfigKeys.WINDOW_HEIGHT, ConfigKeys.CLICK_WAIT_TIME}:
-                if value < 0:
-                    logging.error(f"Invalid value for {key.value}: must be a positive integer.")
-                    sys.exit(1)
-
-    def load_and_resolve_config(self) -> dict:
+                if default is None:
+                    raise ConfigError(f"Missing required configuration key: {key}")
+                value = default
+            values[key.value] = coerce_value(key, value)
+
+        if values[ConfigKeys.RESET_INTERVAL.value] >= values[ConfigKeys.KICK_TIMEOUT.value]:
+            raise ConfigError(f"Invalid value for {ConfigKeys.RESET_INTERVAL.value}: must be less than "
+                              f"{ConfigKeys.KICK_TIMEOUT.value} ({values[ConfigKeys.KICK_TIMEOUT.value]}).")
+
+        log_file_path = os.path.abspath(self.resolve_data_path(values[ConfigKeys.LOG_FILE_PATH.value]))
+        if not log_file_path.startswith(self.data_dir):
+            raise ConfigError(f"Invalid log file path: {log_file_path} is outside the allowed directory.")
+        values[ConfigKeys.LOG_FILE_PATH.value] = log_file_path
+        return values
+
+    def resolve_data_path(self, path: str) -> str:
+        """Resolve a configured path the bot writes to; relative paths are taken from ``data_dir``."""
+        return path if os.path.isabs(path) else os.path.join(self.data_dir, path)
+
+    def load_snapshot(self, version: int) -> ConfigSnapshot:
         print(f"Loading configuration from: {self.config_file}")
         try:
-            config_file_path = os.path.join(self.base_dir, self.config_file)
             with open(self.config_file, 'r') as file:
                 config = json.load(file)
-                self.resolve_paths(config)
-                self.validate_config(config)
-                return config
         except FileNotFoundError:
-            print(f"Configuration file '{self.config_file}' not found.")
-            sys.exit(1)
+            raise ConfigError(f"Configuration file '{self.config_file}' not found.")
         except json.JSONDecodeError as e:
-            print(f"Error decoding configuration: {e}")
-            sys.exit(1)
-
-    def resolve_paths(self, config):
-        log_file_path = config.get(ConfigKeys.LOG_FILE_PATH.value, 'afk_script.log')
-        if not os.path.isabs(log_file_path):
-            config[ConfigKeys.LOG_FILE_PATH.value] = os.path.join(self.base_dir, log_file_path)
+            raise ConfigError(f"Error decoding configuration: {e}")
+        return ConfigSnapshot(self.validate_config(config), version)
 
     def get(self, key: ConfigKeys, default=None):
-        env_key = key.value.upper()
-        if env_key in os.environ:
-            return os.environ[env_key]
-        return self.config.get(key.value, default)
-
-    def reload_config(self):
-        old_config = self.config.copy()
-        self.config = self.load_and_resolve_config()
-
-        changes = []
-        for key, old_value in old_config.items():
-            new_value = self.config.get(key)
-            if new_value != old_value:
-                changes.append((key, old_value, new_value))
-
-        if changes:
-            logging.info("Configuration reloaded with the following changes:")
-            for key, old_value, new_value in changes:
-                logging.info(f" - {key}: {old_value} -> {new_value}")
-        else:
-            logging.info("Configuration reloaded with no changes.")
-
-    def dynamic_reload_config(self):
-        current_time = time.time()
-        if current_time - self.last_reload_time > self.reload_interval:
-            config_mod_time = os.path.getmtime(self.config_file)
-            if config_mod_time > self.last_reload_time:
-                logging.info("Detected changes in the configuration file. Reloading configuration...")
-                previous_config = self.config
-                self.reload_config()
-                self.last_reload_time = current_time
-
-                if (self.config[ConfigKeys.WINDOW_WIDTH.value] != previous_config[ConfigKeys.WINDOW_WIDTH.value] or
-                    self.config[ConfigKeys.WINDOW_HEIGHT.value] != previous_config[ConfigKeys.WINDOW_HEIGHT.value] or
-                    self.config[ConfigKeys.WINDOWS_PER_BATCH.value] != previous_config[ConfigKeys.WINDOWS_PER_BATCH.value]):
-                    logging.info("Window positions cache cleared due to configuration changes.")
-            else:
-                logging.info("No changes detected in the configuration file.")
-        else:
-            logging.info(f"Skipping config reload. Next check in {int(self.reload_interval - (current_time - self.last_reload_time))} seconds.")
+        return self.snapshot.get(key, default)
+
+    def subscribe(self, callback) -> None:
+        """Call ``callback(snapshot, changed_keys)`` whenever a reload publishes a different snapshot."""
+        self.subscribers.append(callback)
+
+    def publish(self, snapshot: ConfigSnapshot) -> None:
+        previous, self.snapshot = self.snapshot, snapshot
+        changes = snapshot.changed_keys(previous)
+        if not changes:
+            logger.info("Configuration reloaded with no changes.")
+            return
+
+        logger.info("Configuration reloaded with the following changes:")
+        for key in sorted(changes, key=lambda k: k.value):
+            logger.info(f" - {key.value}: {previous.get(key)} -> {snapshot.get(key)}")
+        for callback in self.subscribers:
+            try:
+                callback(snapshot, changes)
+            except Exception as e:
+                logger.error(f"Configuration subscriber {callback} failed: {e}", exc_info=True)
+
+    def reload_config(self) -> bool:
+        """Re-read the file and publish the new snapshot; an invalid file keeps the current snapshot."""
+        try:
+            snapshot = self.load_snapshot(version=self.snapshot.version + 1)
+        except ConfigError as e:
+            logger.error(f"Configuration reload failed, keeping the current configuration: {e}")
+            return False
+        self.publish(snapshot)
+        return True
+
+    def apply_overrides(self, **values) -> None:
+        """Pin keys to the given values on top of file and environment, e.g. for benchmarks and simulations.
+
+        Raises ``ConfigError``, keeping the previous overrides, if the result is not a valid configuration.
+        """
+        previous = dict(self.overrides)
+        self.overrides.update(values)
+        try:
+            snapshot = ConfigSnapshot(self.validate_config(self.snapshot.as_dict()), self.snapshot.version + 1)
+        except ConfigError:
+            self.overrides = previous
+            raise
+        self.publish(snapshot)
+
+    def remove_overrides(self, *keys: str) -> None:
+        """Unpin keys so they follow the file and environment again."""
+        for key in keys:
+            self.overrides.pop(key, None)
+        try:
+            snapshot = self.load_snapshot(version=self.snapshot.version + 1)
+        except ConfigError as e:
+            logger.error(f"Configuration reload failed, keeping the current configuration: {e}")
+            return
+        self.publish(snapshot)
 
+    def check_for_changes(self) -> bool:
+        """Reload and publish if the watcher reports a change of the config file."""
+        if self.watcher.changed():
+            logger.info("Detected changes in the configuration file. Reloading configuration...")
+            return self.reload_config()
+        return False
@@ -0,0 +1,57 @@
+from typing import Dict, Tuple
+from backends import DesktopBackend, WindowNotFoundError
+
+
+class WindowConnectionCache:
+    """Keeps the connected window wrapper of each handle across cycles.
+
+    ``backend.connect`` enumerates the owning process's windows every time it is called, so the wrapper is kept
+    and re-validated with ``is_window`` plus the owning PID, which are cheap and do not message the window.
+    Entries are evicted when the window is gone or the handle was reused by another process.
+    """
+
+    def __init__(self, backend: DesktopBackend):
+        self.backend = backend
+        self.entries: Dict[int, Tuple[int, object]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _owner_pid(self, handle: int) -> int:
+        if not self.backend.is_window(handle):
+            raise WindowNotFoundError(f"Window {handle} no longer exists")
+        return self.backend.get_window_thread_process_id(handle)[1]
+
+    def get(self, handle: int):
+        pid = self._owner_pid(handle)
+        entry = self.entries.get(handle)
+        if entry is not None:
+            if entry[0] == pid:
+                self.hits += 1
+                return entry[1]
+            self.evict(handle)
+
+        self.misses += 1
+        window = self.backend.connect(handle)
+        self.entries[handle] = (pid, window)
+        return window
+
+    def evict(self, handle: int) -> None:
+        if self.entries.pop(handle, None) is not None:
+            self.evictions += 1
+
+    def retain(self, handles) -> None:
+        """Evict every entry whose handle is not in ``handles``."""
+        keep = set(handles)
+        for handle in [h for h in self.entries if h not in keep]:
+            self.evict(handle)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self.entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,457 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import socket
+import time
+from typing import Callable, Dict, Optional, Tuple
+from config_manager import ConfigError, ConfigKeys, MtimeConfigWatcher, coerce_value
+
+# Messages are JSON objects, one per line. Agents send {"type": "report", ...} every report interval; the
+# coordinator answers each report with {"type": "target", ...} and, whenever the agent has not applied the current
+# fleet configuration yet, first with {"type": "config", "version": ..., "values": {...}}.
+
+DEFAULT_PORT = 9470
+
+# The only keys a coordinator may set: pacing, batching and thresholds. Commands, paths and anything else that
+# would let whoever can reach the agent port run programs or write files on the host are refused.
+FLEET_CONFIG_KEYS = frozenset({
+    ConfigKeys.KICK_TIMEOUT,
+    ConfigKeys.RESET_INTERVAL,
+    ConfigKeys.SAFETY_MARGIN,
+    ConfigKeys.CLICK_WAIT_TIME,
+    ConfigKeys.WINDOWS_PER_BATCH,
+    ConfigKeys.PIPELINE_DEPTH,
+    ConfigKeys.RESOURCE_SAMPLE_INTERVAL,
+    ConfigKeys.CPU_PRESSURE_PERCENT,
+    ConfigKeys.MEMORY_PRESSURE_PERCENT,
+    ConfigKeys.VERIFY_MIN_CHANGED_FRACTION,
+    ConfigKeys.VERIFY_PIXEL_TOLERANCE,
+    ConfigKeys.PROBE_TIMEOUT,
+    ConfigKeys.QUARANTINE_THRESHOLD,
+    ConfigKeys.QUARANTINE_BACKOFF,
+    ConfigKeys.QUARANTINE_MAX_BACKOFF,
+    ConfigKeys.MAX_CONCURRENT_LAUNCHES,
+    ConfigKeys.LAUNCH_STAGGER,
+    ConfigKeys.LAUNCH_TIMEOUT,
+    ConfigKeys.FLEET_REPORT_INTERVAL,
+})
+
+
+def parse_address(address: str) -> Tuple[str, int]:
+    host, _, port = address.rpartition(':')
+    return host or '127.0.0.1', int(port or DEFAULT_PORT)
+
+
+def estimate_capacity(report: dict, target_utilisation: float = 0.7) -> int:
+    """Number of instances the reporting host can keep alive, from the measurements in ``report``.
+
+    Gestures are serialised on a host, so input time per window must fit ``target_utilisation`` of the reset
+    interval. CPU and memory are extrapolated linearly from the current instance count up to the host's pressure
+    thresholds. A host that is already missing deadlines is not given more instances than it has.
+    """
+    instances = report.get('instances', 0)
+    limits = []
+    service_seconds = report.get('service_seconds')
+    if service_seconds:
+        limits.append(report['reset_interval'] * target_utilisation / service_seconds)
+    if instances:
+        for used, threshold in ((report.get('cpu_percent'), report.get('cpu_pressure')),
+                                (report.get('memory_percent'), report.get('memory_pressure'))):
+            if used and threshold:
+                limits.append(instances * threshold / used)
+    capacity = int(min(limits)) if limits else instances
+    slack = report.get('slack')
+    if slack is not None and slack < 0:
+        capacity = min(capacity, instances)
+    return max(0, capacity)
+
+
+def split_proportionally(total: int, weights: Dict[str, int]) -> Dict[str, int]:
+    """Split ``total`` (at most the sum of ``weights``) in proportion to ``weights``, by largest remainder."""
+    weight_sum = sum(weights.values())
+    if weight_sum <= 0:
+        return {name: 0 for name in weights}
+    shares = {name: total * weight // weight_sum for name, weight in weights.items()}
+    by_remainder = sorted(weights, key=lambda name: -(total * weights[name] % weight_sum))
+    for name in by_remainder[:total - sum(shares.values())]:
+        shares[name] += 1
+    return shares
+
+
+def assign_targets(capacities: Dict[str, int], fleet_target: int = 0,
+                   current: Optional[Dict[str, int]] = None) -> Dict[str, int]:
+    """Instances per host for ``fleet_target`` instances in total; 0 fills every host to its capacity.
+
+    Hosts keep ``current`` (what they run or were already told to run), up to capacity, and only the difference is
+    spread over spare capacity, so targets do not shuffle instances between hosts as capacity estimates move.
+    """
+    if fleet_target <= 0 or fleet_target >= sum(capacities.values()):
+        return dict(capacities)
+    kept = {name: min((current or {}).get(name, 0), capacity) for name, capacity in capacities.items()}
+    if sum(kept.values()) >= fleet_target:
+        return split_proportionally(fleet_target, kept)
+    extra = split_proportionally(fleet_target - sum(kept.values()),
+                                 {name: capacity - kept[name] for name, capacity in capacities.items()})
+    return {name: kept[name] + extra[name] for name in capacities}
+
+
+class FleetAgent:
+    """Connects a bot to a fleet coordinator: reports its state and applies the configuration and targets it gets.
+
+    Pushed configuration is applied as overrides on top of the local config file, key by key after validation, so
+    a bad value from the coordinator never replaces a working local one; keys outside ``FLEET_CONFIG_KEYS`` are
+    refused. A key that disappears from the pushed configuration falls back to the local value. An enforced target
+    becomes the bot's ``expected_instances``; a target that is only recommended is logged.
+    """
+
+    def __init__(self, bot, address: str, name: str = '', interval: float = 10, reconnect_delay: float = 5):
+        self.bot = bot
+        self.host, self.port = parse_address(address)
+        self.name = name or socket.gethostname()
+        self.interval = interval
+        self.reconnect_delay = reconnect_delay
+        self.config_version = None
+        self.pushed_keys = set()
+        self.target: Optional[int] = None
+        self.connected = False
+
+    def report(self) -> dict:
+        bot = self.bot
+        input_phase = bot.metrics.phases.get('input')
+        governor = bot.governor
+        return {
+            'type': 'report',
+            'agent': self.name,
+            'time': time.time(),
+            'instances': len(bot.active_windows),
+            'expected': bot.supervisor.expected,
+            'booting': len(bot.supervisor.pending),
+            'quarantined': bot.health.quarantined(),
+            'slack': bot.scheduler.worst_case_slack(),
+            'throughput': bot.throughput,
+            'service_seconds': input_phase.sum / input_phase.count if input_phase and input_phase.count else None,
+            'reset_interval': bot.scheduler.reset_interval,
+            'cpu_percent': governor.system_cpu if governor is not None else None,
+            'memory_percent': governor.system_memory if governor is not None else None,
+            'cpu_pressure': governor.cpu_pressure if governor is not None else None,
+            'memory_pressure': governor.memory_pressure if governor is not None else None,
+            'config_version': self.config_version,
+        }
+
+    def apply_config(self, version: int, values: dict) -> None:
+        accepted = {}
+        for key, value in values.items():
+            try:
+                config_key = ConfigKeys(key)
+                if config_key not in FLEET_CONFIG_KEYS:
+                    raise ConfigError("the fleet coordinator may not set this key")
+                accepted[key] = coerce_value(config_key, value)
+            except (ValueError, ConfigError) as e:
+                logging.error(f"Ignoring fleet configuration value {key}={value!r}: {e}")
+        dropped = self.pushed_keys - set(accepted)
+        if dropped:
+            self.bot.config_manager.remove_overrides(*dropped)
+            self.pushed_keys -= dropped
+        if accepted:
+            try:
+                self.bot.config_manager.apply_overrides(**accepted)
+            except ConfigError as e:
+                logging.error(f"Ignoring fleet configuration version {version}: {e}")
+                return
+        self.pushed_keys = set(accepted)
+        self.config_version = version
+        logging.info(f"Applied fleet configuration version {version} ({len(accepted)} key(s)).")
+
+    def apply_target(self, instances: int, enforce: bool) -> None:
+        if instances != self.target:
+            logging.info(f"Fleet coordinator {'sets' if enforce else 'recommends'} {instances} instance(s) "
+                         f"for this host ({len(self.bot.active_windows)} running).")
+        self.target = instances
+        if enforce and self.bot.config_manager.get(ConfigKeys.EXPECTED_INSTANCES) != instances:
+            self.bot.config_manager.apply_overrides(expected_instances=instances)
+
+    def handle_message(self, message: dict) -> None:
+        if message.get('type') == 'config':
+            self.apply_config(message['version'], message.get('values', {}))
+        elif message.get('type') == 'target':
+            self.apply_target(int(message['instances']), bool(message.get('enforce')))
+
+    async def run(self) -> None:
+        while not self.bot.shutdown_flag:
+            writer = None
+            try:
+                reader, writer = await asyncio.open_connection(self.host, self.port)
+                self.connected = True
+                logging.info(f"Connected to fleet coordinator {self.host}:{self.port} as {self.name}.")
+                receiver = asyncio.create_task(self._receive(reader))
+                try:
+                    while not self.bot.shutdown_flag and not receiver.done():
+                        writer.write(json.dumps(self.report()).encode('utf-8') + b'\n')
+                        await writer.drain()
+                        next_report = time.monotonic() + self.interval
+                        while not self.bot.shutdown_flag and not receiver.done() and time.monotonic() < next_report:
+                            await asyncio.wait([receiver], timeout=min(1.0, next_report - time.monotonic()))
+                finally:
+                    receiver.cancel()
+            except (OSError, ConnectionError) as e:
+                if self.connected:
+                    logging.info(f"Lost connection to fleet coordinator: {e}")
+            finally:
+                self.connected = False
+                if writer is not None:
+                    writer.close()
+            if not self.bot.shutdown_flag:
+                await asyncio.sleep(self.reconnect_delay)
+
+    async def _receive(self, reader: asyncio.StreamReader) -> None:
+        while True:
+            line = await reader.readline()
+            if not line:
+                return
+            try:
+                self.handle_message(json.loads(line))
+            except (ValueError, KeyError, TypeError) as e:
+                logging.error(f"Invalid message from fleet coordinator: {e}")
+
+
+class AgentState:
+    def __init__(self, name: str, writer: asyncio.StreamWriter):
+        self.name = name
+        self.writer = writer
+        self.report: dict = {}
+        self.last_seen = 0.0
+        self.capacity = 0
+        self.target = 0
+
+
+class FleetCoordinator:
+    """Aggregates agent reports, pushes the fleet configuration and assigns instance counts per host.
+
+    The fleet configuration is the JSON object in ``config_path`` (optional), re-read when the file changes; every
+    change gets a new version that agents apply once. Targets are recomputed on every report from each host's
+    measured capacity; with ``enforce`` agents adopt them as ``expected_instances``, otherwise they are advisory.
+    For the first ``warmup`` seconds every host is held at its current count, so the hosts that connect first do
+    not get the whole fleet target before the others have reported.
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = DEFAULT_PORT, config_path: str = '',
+                 fleet_target: int = 0, enforce: bool = False, target_utilisation: float = 0.7,
+                 stale_after: float = 60, warmup: float = 30, clock: Callable[[], float] = time.monotonic):
+        self.host = host
+        self.port = port
+        self.config_path = config_path
+        self.watcher = MtimeConfigWatcher(config_path) if config_path else None
+        self.config_values: dict = {}
+        self.config_version = 0
+        self.fleet_target = fleet_target
+        self.enforce = enforce
+        self.target_utilisation = target_utilisation
+        self.stale_after = stale_after
+        self.warmup = warmup
+        self.clock = clock
+        self.started = clock()
+        self.agents: Dict[str, AgentState] = {}
+        self.server = None
+        if config_path:
+            self.load_config()
+
+    def load_config(self) -> None:
+        try:
+            with open(self.config_path, 'r') as file:
+                values = json.load(file)
+        except (OSError, ValueError) as e:
+            logging.error(f"Could not read fleet configuration {self.config_path}: {e}")
+            return
+        if not isinstance(values, dict):
+            logging.error(f"Fleet configuration {self.config_path} must be a JSON object of config keys.")
+            return
+        if values != self.config_values:
+            self.config_values = values
+            self.config_version += 1
+            logging.info(f"Fleet configuration version {self.config_version}: {len(values)} key(s).")
+
+    async def start(self) -> None:
+        self.server = await asyncio.start_server(self.handle_agent, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        logging.info(f"Fleet coordinator listening on {self.host}:{self.port}")
+
+    async def stop(self) -> None:
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+        for agent in list(self.agents.values()):
+            agent.writer.close()
+
+    async def handle_agent(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        agent = None
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    report = json.loads(line)
+                    name = str(report['agent'])
+                except (ValueError, KeyError, TypeError) as e:
+                    logging.error(f"Invalid message from agent: {e}")
+                    continue
+                if agent is None or agent.name != name:
+                    agent = self.agents[name] = AgentState(name, writer)
+                    logging.info(f"Agent {name} connected.")
+                for message in self.on_report(agent, report):
+                    writer.write(json.dumps(message).encode('utf-8') + b'\n')
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            if agent is not None and self.agents.get(agent.name) is agent:
+                del self.agents[agent.name]
+                logging.info(f"Agent {agent.name} disconnected.")
+            writer.close()
+
+    def on_report(self, agent: AgentState, report: dict) -> list:
+        """Record ``report`` and return the messages to send back to ``agent``."""
+        if self.watcher is not None and self.watcher.changed():
+            self.load_config()
+        agent.report = report
+        agent.last_seen = self.clock()
+        agent.capacity = estimate_capacity(report, self.target_utilisation)
+        self.rebalance()
+        messages = []
+        if self.config_version and report.get('config_version') != self.config_version:
+            messages.append({'type': 'config', 'version': self.config_version, 'values': self.config_values})
+        messages.append({'type': 'target', 'instances': agent.target, 'enforce': self.enforce})
+        return messages
+
+    def live_agents(self) -> Dict[str, AgentState]:
+        now = self.clock()
+        return {name: agent for name, agent in self.agents.items() if now - agent.last_seen <= self.stale_after}
+
+    def rebalance(self) -> None:
+        agents = self.live_agents()
+        if self.clock() - self.started < self.warmup:
+            targets = {name: agent.report.get('instances', 0) for name, agent in agents.items()}
+        else:
+            targets = assign_targets({name: agent.capacity for name, agent in agents.items()}, self.fleet_target,
+                                     {name: max(agent.target, agent.report.get('instances', 0) +
+                                                agent.report.get('booting', 0)) for name, agent in agents.items()})
+        for name, target in targets.items():
+            agents[name].target = target
+
+    def fleet_state(self) -> dict:
+        agents = self.live_agents()
+        slacks = [agent.report['slack'] for agent in agents.values() if agent.report.get('slack') is not None]
+        return {
+            'timestamp': time.time(),
+            'agents': len(agents),
+            'instances': sum(agent.report.get('instances', 0) for agent in agents.values()),
+            'capacity': sum(agent.capacity for agent in agents.values()),
+            'fleet_target': self.fleet_target,
+            'worst_slack': min(slacks) if slacks else None,
+            'config_version': self.config_version,
+            'hosts': {name: {
+                'instances': agent.report.get('instances', 0),
+                'capacity': agent.capacity,
+                'target': agent.target,
+                'slack': agent.report.get('slack'),
+                'cpu_percent': agent.report.get('cpu_percent'),
+                'memory_percent': agent.report.get('memory_percent'),
+                'config_version': agent.report.get('config_version'),
+                'seconds_since_report': round(self.clock() - agent.last_seen, 1),
+            } for name, agent in sorted(agents.items())},
+        }
+
+    def write_state(self, path: str) -> None:
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w') as file:
+            json.dump(self.fleet_state(), file, indent=2)
+        os.replace(temp_path, path)
+
+
+class SimulatedLauncher:
+    """Launcher for the demo fleet: a launch opens another window on the agent's simulated desktop."""
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    async def launch(self) -> None:
+        self.backend.spawn_window()
+
+
+async def run_demo_agents(count: int, address: str, interval: float, seconds: float) -> None:
+    """Run ``count`` bots with simulated desktops in this process, each reporting to the coordinator at ``address``."""
+    from afk_script import RobloxAFKBot
+    from config_manager import ConfigManager
+    from simulated_backend import SimulatedBackend
+
+    config_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config.json")
+    bots = []
+    for index in range(count):
+        config_manager = ConfigManager(config_file=config_path)
+        config_manager.apply_overrides(log_console=False, state_store_path='', metrics_port=0,
+                                       metrics_snapshot_path='', launch_stagger=1, profile_control_file='',
+                                       fleet_report_interval=max(1, int(interval)))
+        backend = SimulatedBackend(window_count=2 + 2 * index, seed=index)
+        bot = RobloxAFKBot(config_manager, backend=backend)
+        bot.supervisor.launcher = SimulatedLauncher(backend)
+        bot.fleet_agent = FleetAgent(bot, address, name=f"demo-{index + 1}", interval=max(1, int(interval)),
+                                     reconnect_delay=1)
+        bots.append(bot)
+    tasks = [asyncio.create_task(bot.run()) for bot in bots]
+    await asyncio.sleep(seconds)
+    for bot in bots:
+        bot.shutdown()
+    await asyncio.gather(*tasks)
+
+
+async def main_async(args) -> None:
+    coordinator = FleetCoordinator(args.host, args.port, config_path=args.config, fleet_target=args.fleet_target,
+                                   enforce=args.enforce, target_utilisation=args.utilisation,
+                                   stale_after=args.stale_after, warmup=args.warmup)
+    await coordinator.start()
+    demo = None
+    if args.demo:
+        demo = asyncio.create_task(run_demo_agents(args.demo, f"127.0.0.1:{coordinator.port}", args.interval,
+                                                   args.demo_seconds))
+    try:
+        while demo is None or not demo.done():
+            await asyncio.sleep(args.interval)
+            state = coordinator.fleet_state()
+            if args.state_path:
+                coordinator.write_state(args.state_path)
+            logging.info(f"Fleet: {state['agents']} agent(s), {state['instances']} instance(s), "
+                         f"capacity {state['capacity']}, worst slack {state['worst_slack']}.")
+            for name, host in state['hosts'].items():
+                logging.info(f"  {name}: {host['instances']} running, capacity {host['capacity']}, "
+                             f"target {host['target']}, slack {host['slack']}")
+        if demo is not None:
+            await demo
+    finally:
+        await coordinator.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Coordinator for a fleet of AFK bot hosts.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help="0 picks a free port")
+    parser.add_argument('--config', default='', help="JSON object of config values pushed to every agent")
+    parser.add_argument('--fleet-target', type=int, default=0,
+                        help="total instances to spread over the hosts; 0 fills every host to its capacity")
+    parser.add_argument('--enforce', action='store_true', help="agents adopt their target as expected_instances")
+    parser.add_argument('--utilisation', type=float, default=0.7, help="share of the reset interval spent on input")
+    parser.add_argument('--stale-after', type=float, default=60, help="seconds without a report before a host is dropped")
+    parser.add_argument('--warmup', type=float, default=30, help="seconds to hold every host at its current count")
+    parser.add_argument('--interval', type=float, default=10, help="seconds between fleet summaries")
+    parser.add_argument('--state-path', default='', help="write the fleet state as JSON here every interval")
+    parser.add_argument('--demo', type=int, default=0, help="also run this many simulated agents in-process")
+    parser.add_argument('--demo-seconds', type=float, default=30)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(message)s')
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
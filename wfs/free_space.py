@@ -0,0 +1,65 @@
+import bisect
+import random
+from typing import Iterable, List, Optional, Sequence, Tuple
+from backends import Rect
+
+
+class NoFreeSpaceError(Exception):
+    """Raised when every pixel of the work areas is covered by managed windows or reserved regions."""
+
+
+def covers(outer: Rect, inner: Rect) -> bool:
+    return (outer.left <= inner.left and outer.top <= inner.top and
+            outer.right >= inner.right and outer.bottom >= inner.bottom)
+
+
+def subtract(rect: Rect, hole: Rect) -> List[Rect]:
+    """Split ``rect`` minus ``hole`` into at most four disjoint rectangles."""
+    left, top = max(rect.left, hole.left), max(rect.top, hole.top)
+    right, bottom = min(rect.right, hole.right), min(rect.bottom, hole.bottom)
+    if left >= right or top >= bottom:
+        return [rect]
+    pieces = [
+        Rect(rect.left, rect.top, rect.right, top),          # above the hole
+        Rect(rect.left, bottom, rect.right, rect.bottom),    # below the hole
+        Rect(rect.left, top, left, bottom),                  # left of the hole
+        Rect(right, top, rect.right, bottom),                # right of the hole
+    ]
+    return [piece for piece in pieces if piece.left < piece.right and piece.top < piece.bottom]
+
+
+class FreeSpaceIndex:
+    """Disjoint free rectangles of the work areas, sampled uniformly by area.
+
+    The index is built once per layout change; ``sample`` picks a rectangle by binary search over cumulative
+    areas and a point inside it, so it always terminates.
+    """
+
+    def __init__(self, work_areas: Sequence[Rect], obstacles: Iterable[Rect] = (), rng: Optional[random.Random] = None):
+        self.work_areas = tuple(work_areas)
+        self.obstacles = tuple(obstacles)
+        self.random = rng or random.Random()
+        free = list(self.work_areas)
+        for obstacle in self.obstacles:
+            free = [piece for rect in free for piece in subtract(rect, obstacle)]
+        self.free_rects = free
+        self.cumulative: List[int] = []
+        total = 0
+        for rect in free:
+            total += (rect.right - rect.left) * (rect.bottom - rect.top)
+            self.cumulative.append(total)
+        self.total_area = total
+
+    def excluding(self, *rects: Rect) -> 'FreeSpaceIndex':
+        """This index with ``rects`` removed as well; the same index when each lies within a known obstacle."""
+        missing = [rect for rect in rects if not any(covers(obstacle, rect) for obstacle in self.obstacles)]
+        if not missing:
+            return self
+        return FreeSpaceIndex(self.work_areas, self.obstacles + tuple(missing), self.random)
+
+    def sample(self) -> Tuple[int, int]:
+        if self.total_area <= 0:
+            raise NoFreeSpaceError("No free screen area outside the managed windows.")
+        target = self.random.randrange(self.total_area)
+        rect = self.free_rects[bisect.bisect_right(self.cumulative, target)]
+        return self.random.randrange(rect.left, rect.right), self.random.randrange(rect.top, rect.bottom)
@@ -0,0 +1,98 @@
+import random
+from typing import List, NamedTuple, Optional
+
+# The keep-alive gesture used before gestures were configurable, with its timing: a one second dwell (the old
+# click_wait_time) before the press and after the release, and jitter moves 0.1 seconds apart.
+DEFAULT_GESTURE = [
+    {'action': 'move', 'x': 148, 'y': 387},
+    {'action': 'wait', 'seconds': 1},
+    {'action': 'press'},
+    {'action': 'jitter', 'count': 5, 'radius': 2, 'interval': 0.1},
+    {'action': 'release'},
+    {'action': 'wait', 'seconds': 1},
+    {'action': 'click'},
+]
+
+ACTIONS = ('move', 'press', 'release', 'click', 'jitter', 'wait')
+# field: whether it must be a whole number
+REQUIRED_FIELDS = {'move': {'x': True, 'y': True}, 'wait': {'seconds': False}}
+OPTIONAL_FIELDS = {'jitter': {'count': True, 'radius': True, 'interval': False}}
+
+
+class GestureError(ValueError):
+    """Raised for a gesture definition that cannot be compiled."""
+
+
+class InputEvent(NamedTuple):
+    kind: str  # 'move', 'down' or 'up'
+    x: int
+    y: int
+    delay: float = 0.0  # seconds to wait before this event
+    pressed: bool = False  # left button held while this event is delivered
+
+
+def validate_gesture(steps) -> List[dict]:
+    if not isinstance(steps, list) or not steps:
+        raise GestureError("A gesture must be a non-empty list of steps.")
+    for index, step in enumerate(steps):
+        if not isinstance(step, dict) or step.get('action') not in ACTIONS:
+            raise GestureError(f"Gesture step {index} must be an object with an action out of {', '.join(ACTIONS)}.")
+        fields = dict(REQUIRED_FIELDS.get(step['action'], {}))
+        fields.update((field, whole) for field, whole in OPTIONAL_FIELDS.get(step['action'], {}).items()
+                      if field in step)
+        for field, whole in fields.items():
+            value = step.get(field)
+            if not isinstance(value, int if whole else (int, float)) or isinstance(value, bool):
+                kind = 'a whole number' if whole else 'a numeric'
+                raise GestureError(f"Gesture step {index} ({step['action']}) needs {kind} '{field}'.")
+        if any(isinstance(value, (int, float)) and value < 0 for key, value in step.items() if key not in ('x', 'y')):
+            raise GestureError(f"Gesture step {index} ({step['action']}) has a negative value.")
+    return steps
+
+
+def compile_gesture(steps: List[dict], origin_x: int = 0, origin_y: int = 0,
+                    rng: Optional[random.Random] = None) -> List[InputEvent]:
+    """Turn a gesture definition into input events at absolute coordinates.
+
+    ``move`` coordinates are relative to ``(origin_x, origin_y)``; ``jitter`` moves ``count`` times to random points
+    within ``radius`` of the current position, ``interval`` seconds apart; ``wait`` delays the next event.
+    """
+    rng = rng or random
+    events = []
+    x, y = origin_x, origin_y
+    pressed = False
+    delay = 0.0
+
+    def emit(kind: str) -> None:
+        nonlocal delay
+        events.append(InputEvent(kind, x, y, delay, pressed))
+        delay = 0.0
+
+    for step in steps:
+        action = step['action']
+        if action == 'move':
+            x, y = origin_x + int(step['x']), origin_y + int(step['y'])
+            emit('move')
+        elif action == 'wait':
+            delay += float(step['seconds'])
+        elif action == 'press':
+            pressed = True
+            emit('down')
+        elif action == 'release':
+            pressed = False
+            emit('up')
+        elif action == 'click':
+            pressed = True
+            emit('down')
+            pressed = False
+            emit('up')
+        elif action == 'jitter':
+            radius = int(step.get('radius', 2))
+            interval = float(step.get('interval', 0.1))
+            center_x, center_y = x, y
+            for _ in range(int(step.get('count', 5))):
+                delay += interval
+                x = center_x + rng.randint(-radius, radius)
+                y = center_y + rng.randint(-radius, radius)
+                emit('move')
+    return events
@@ -0,0 +1,136 @@
+import logging
+import os
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional
+from backends import DesktopBackend
+
+
+class ProcessStats(NamedTuple):
+    pid: int
+    cpu_percent: float
+    rss: int
+    handles: int
+
+
+class ProcessGovernor:
+    """Tracks the Roblox process behind every managed window and keeps idle instances cheap.
+
+    ``sample`` derives per-process CPU usage from the change in cumulative CPU time between two samples, so it
+    never sleeps the way ``psutil.cpu_percent(interval=...)`` does; system-wide usage comes from the backend too. Idle (minimized, already reset) instances run at
+    below-normal priority, pinned to one CPU each in round-robin order, with their working set trimmed; ``restore``
+    undoes that just before the instance gets input. Under CPU or memory pressure ``throttle_delay`` returns a pause
+    to insert between batches, and idle instances are trimmed again, largest first.
+    """
+
+    def __init__(self, backend: DesktopBackend, cpu_pressure: float = 90, memory_pressure: float = 99,
+                 max_delay: float = 5.0, cpus: Optional[List[int]] = None, clock: Callable[[], float] = time.monotonic):
+        self.backend = backend
+        self.cpu_pressure = cpu_pressure
+        self.memory_pressure = memory_pressure
+        self.max_delay = max_delay
+        self.cpus = cpus or list(range(os.cpu_count() or 1))
+        self.clock = clock
+        self.pids: Dict[int, int] = {}
+        self.idle = set()
+        self.last_samples: Dict[int, tuple] = {}
+        self.stats: Dict[int, ProcessStats] = {}
+        self.system_cpu = 0.0
+        self.system_memory = 0.0
+        self._next_cpu = 0
+        backend.system_usage()  # prime the CPU counter; the first non-blocking reading is meaningless
+
+    def track(self, handle: int, pid: int) -> None:
+        if self.pids.get(handle) != pid:
+            self.forget(handle)
+            self.pids[handle] = pid
+
+    def forget(self, handle: int) -> None:
+        """Stop tracking a window whose process is gone; nothing is restored."""
+        pid = self.pids.pop(handle, None)
+        if pid is not None and pid not in self.pids.values():
+            self.idle.discard(pid)
+            self.last_samples.pop(pid, None)
+            self.stats.pop(pid, None)
+
+    def sync(self, pids: Dict[int, int]) -> None:
+        for handle in [h for h in self.pids if h not in pids]:
+            self.forget(handle)
+        for handle, pid in pids.items():
+            self.track(handle, pid)
+
+    def sample(self) -> Dict[int, ProcessStats]:
+        now = self.clock()
+        try:
+            self.system_cpu, self.system_memory = self.backend.system_usage()
+        except Exception as e:
+            logging.info(f"Could not sample system usage: {e}")
+        for pid in set(self.pids.values()):
+            try:
+                sample = self.backend.sample_process(pid)
+            except Exception as e:
+                logging.info(f"Could not sample process {pid}: {e}")
+                continue
+            previous = self.last_samples.get(pid)
+            self.last_samples[pid] = (now, sample.cpu_seconds)
+            cpu_percent = 0.0
+            if previous is not None and now > previous[0]:
+                cpu_percent = 100 * (sample.cpu_seconds - previous[1]) / (now - previous[0]) / len(self.cpus)
+            self.stats[pid] = ProcessStats(pid, cpu_percent, sample.rss, sample.handles)
+        return self.stats
+
+    def under_pressure(self) -> bool:
+        return self.system_cpu > self.cpu_pressure or self.system_memory > self.memory_pressure
+
+    def throttle_delay(self) -> float:
+        """Pause between batches, growing with how far CPU or memory is over its threshold."""
+        over = max((self.system_cpu - self.cpu_pressure) / max(1.0, 100 - self.cpu_pressure),
+                   (self.system_memory - self.memory_pressure) / max(1.0, 100 - self.memory_pressure))
+        return self.max_delay * min(1.0, over) if over > 0 else 0.0
+
+    def make_idle(self, handle: int) -> None:
+        pid = self.pids.get(handle)
+        if pid is None or pid in self.idle:
+            return
+        cpu = self.cpus[self._next_cpu % len(self.cpus)]
+        self._next_cpu += 1
+        try:
+            self.backend.set_process_priority(pid, low=True)
+            self.backend.set_process_affinity(pid, [cpu])
+            self.backend.trim_working_set(pid)
+            self.idle.add(pid)
+        except Exception as e:
+            logging.info(f"Could not apply idle policy to process {pid}: {e}")
+
+    def restore(self, handle: int) -> None:
+        pid = self.pids.get(handle)
+        if pid is None or pid not in self.idle:
+            return
+        self.idle.discard(pid)
+        try:
+            self.backend.set_process_priority(pid, low=False)
+            self.backend.set_process_affinity(pid, None)
+        except Exception as e:
+            logging.info(f"Could not restore process {pid}: {e}")
+
+    def restore_all(self) -> None:
+        for handle in list(self.pids):
+            self.restore(handle)
+
+    def trim_idle(self) -> int:
+        """Trim the working sets of idle instances, largest resident set first; returns how many were trimmed."""
+        trimmed = 0
+        for stats in sorted((self.stats[pid] for pid in self.idle if pid in self.stats), key=lambda s: -s.rss):
+            try:
+                self.backend.trim_working_set(stats.pid)
+                trimmed += 1
+            except Exception as e:
+                logging.info(f"Could not trim process {stats.pid}: {e}")
+        return trimmed
+
+    def totals(self) -> dict:
+        return {
+            'cpu_percent': sum(s.cpu_percent for s in self.stats.values()),
+            'rss_bytes': sum(s.rss for s in self.stats.values()),
+            'handles': sum(s.handles for s in self.stats.values()),
+            'idle_processes': len(self.idle),
+        }
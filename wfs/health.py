@@ -0,0 +1,65 @@
+import time
+from typing import Callable, Dict, Optional
+from backends import DesktopBackend
+
+
+class WindowHealth:
+    """Bounded liveness probes with a per-window circuit breaker.
+
+    ``probe`` asks the backend whether the window's thread answers within ``probe_timeout`` seconds and never waits
+    longer than that. After ``failure_threshold`` consecutive unanswered probes the window is quarantined for
+    ``backoff`` seconds; every further failed probe after a quarantine doubles the backoff up to ``max_backoff``.
+    When the quarantine ends the next probe decides: an answer closes the breaker and resets the backoff.
+    """
+
+    def __init__(self, backend: DesktopBackend, probe_timeout: float = 1.0, failure_threshold: int = 3,
+                 backoff: float = 60, max_backoff: float = 900, clock: Callable[[], float] = time.monotonic):
+        self.backend = backend
+        self.probe_timeout = probe_timeout
+        self.failure_threshold = failure_threshold
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.clock = clock
+        self.failures: Dict[int, int] = {}
+        self.quarantined_until: Dict[int, float] = {}
+        self.current_backoff: Dict[int, float] = {}
+
+    def probe(self, handle: int) -> bool:
+        try:
+            responsive = self.backend.probe_window(handle, self.probe_timeout)
+        except Exception:
+            responsive = False
+        if responsive:
+            self.record_responsive(handle)
+        else:
+            self.record_unresponsive(handle)
+        return responsive
+
+    def record_responsive(self, handle: int) -> None:
+        self.failures.pop(handle, None)
+        self.quarantined_until.pop(handle, None)
+        self.current_backoff.pop(handle, None)
+
+    def record_unresponsive(self, handle: int) -> None:
+        failures = self.failures.get(handle, 0) + 1
+        self.failures[handle] = failures
+        if failures < self.failure_threshold:
+            return
+        backoff = self.current_backoff.get(handle)
+        backoff = self.backoff if backoff is None else min(backoff * 2, self.max_backoff)
+        self.current_backoff[handle] = backoff
+        self.quarantined_until[handle] = self.clock() + backoff
+
+    def is_quarantined(self, handle: int) -> bool:
+        return self.clock() < self.quarantined_until.get(handle, 0)
+
+    def release_time(self, handle: int) -> Optional[float]:
+        """Clock time at which a quarantined window is probed again, or None if it is not quarantined."""
+        return self.quarantined_until.get(handle) if self.is_quarantined(handle) else None
+
+    def quarantined(self) -> int:
+        now = self.clock()
+        return sum(1 for until in self.quarantined_until.values() if until > now)
+
+    def forget(self, handle: int) -> None:
+        self.record_responsive(handle)
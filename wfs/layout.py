@@ -0,0 +1,55 @@
+from collections import OrderedDict
+from typing import List, Sequence
+from backends import Rect
+
+
+class LayoutEngine:
+    """Places windows of a fixed size in row/column grids across the work areas of all monitors.
+
+    Each work area gets as many columns and rows as fit without overlap, with the leftover space spread evenly
+    between them; monitors are filled in order. When more windows are requested than fit, the slots are reused
+    from the start, so only the overflow overlaps. Layouts are cached by (count, work areas, window size).
+    """
+
+    def __init__(self, width: int, height: int, cache_size: int = 64):
+        self.width = width
+        self.height = height
+        self.cache_size = cache_size
+        self.cache: 'OrderedDict[tuple, List[Rect]]' = OrderedDict()
+
+    def set_window_size(self, width: int, height: int) -> None:
+        if (width, height) != (self.width, self.height):
+            self.width, self.height = width, height
+            self.cache.clear()
+
+    def slots(self, area: Rect) -> List[Rect]:
+        area_width, area_height = area.right - area.left, area.bottom - area.top
+        cols = max(1, area_width // self.width) if self.width else 1
+        rows = max(1, area_height // self.height) if self.height else 1
+        x_gap = max(0, (area_width - cols * self.width) // (cols + 1))
+        y_gap = max(0, (area_height - rows * self.height) // (rows + 1))
+        slots = []
+        for row in range(rows):
+            for col in range(cols):
+                x = area.left + x_gap + col * (self.width + x_gap)
+                y = area.top + y_gap + row * (self.height + y_gap)
+                slots.append(Rect(x, y, x + self.width, y + self.height))
+        return slots
+
+    def layout(self, count: int, work_areas: Sequence[Rect]) -> List[Rect]:
+        key = (count, tuple(work_areas), self.width, self.height)
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.cache.move_to_end(key)
+            return cached
+
+        slots = [slot for area in work_areas for slot in self.slots(area)]
+        rects = [slots[i % len(slots)] for i in range(count)] if slots else []
+        self.cache[key] = rects
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return rects
+
+
+def rect_matches(current: Rect, target: Rect, tolerance: int = 1) -> bool:
+    return all(abs(a - b) <= tolerance for a, b in zip(current, target))
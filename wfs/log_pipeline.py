@@ -0,0 +1,109 @@
+import copy
+import json
+import logging
+import queue
+import re
+import sys
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Dict, List, Optional, Tuple
+
+_NUMBER = re.compile(r'\d+(\.\d+)?')
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; ``handle`` is included when the record carries it as an extra."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'msg': record.getMessage(),
+            'thread': record.threadName,
+        }
+        handle = getattr(record, 'handle', None)
+        if handle is not None:
+            entry['handle'] = handle
+        suppressed = getattr(record, 'suppressed', 0)
+        if suppressed:
+            entry['suppressed'] = suppressed
+        exc = record.exc_text or (self.formatException(record.exc_info) if record.exc_info else None)
+        if exc:
+            entry['exc'] = exc
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class StructuredQueueHandler(QueueHandler):
+    """Queue handler that keeps the traceback apart from the message.
+
+    The stock ``prepare`` formats the record, folding the traceback into ``msg``, so formatters on the listener
+    side could no longer tell them apart. Here only the message arguments are merged; the traceback travels as
+    ``exc_text``, which ``JsonFormatter`` writes as ``exc`` and the plain formatter appends as usual.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = record.exc_text or logging.Formatter().formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+
+class RateLimitFilter(logging.Filter):
+    """Lets at most ``burst`` lines of the same shape through per ``interval`` seconds and window.
+
+    Lines have the same shape when they carry the same ``handle`` and are equal after replacing every number
+    (attempts, timings, handles in the text) with ``#``, so one noisy window cannot silence the same message for
+    the others. The next line let through after a quiet period carries the number of lines dropped in between as
+    ``suppressed``.
+    """
+
+    def __init__(self, burst: int = 20, interval: float = 60):
+        super().__init__()
+        self.burst = burst
+        self.interval = interval
+        self.windows: Dict[Tuple[Optional[int], str], List] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.burst <= 0 or record.levelno >= logging.ERROR:
+            return True
+        key = (getattr(record, 'handle', None), _NUMBER.sub('#', str(record.msg)))
+        now = time.monotonic()
+        window = self.windows.get(key)
+        if window is None or now - window[0] >= self.interval:
+            suppressed = window[2] if window is not None else 0
+            self.windows[key] = [now, 1, 0]
+            if suppressed:
+                record.suppressed = suppressed
+                record.msg = f"{record.msg} ({suppressed} similar lines suppressed)"
+            return True
+        if window[1] < self.burst:
+            window[1] += 1
+            return True
+        window[2] += 1
+        return False
+
+
+def start_log_pipeline(log_file_path: str, max_bytes: int, backup_count: int, json_format: bool = True,
+                       console: bool = True, rate_limit: int = 20) -> Tuple[QueueHandler, QueueListener]:
+    """Route the root logger through a queue drained by a background thread that does all the I/O."""
+    file_handler = RotatingFileHandler(log_file_path, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8')
+    file_handler.setFormatter(JsonFormatter() if json_format else
+                              logging.Formatter("%(asctime)s:%(levelname)s:%(message)s"))
+    handlers = [file_handler]
+    if console:
+        console_handler = logging.StreamHandler(sys.stdout)
+        console_handler.setFormatter(logging.Formatter("%(message)s"))
+        handlers.append(console_handler)
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = StructuredQueueHandler(log_queue)
+    queue_handler.setLevel(logging.INFO)
+    queue_handler.addFilter(RateLimitFilter(burst=rate_limit))
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    return queue_handler, listener
@@ -0,0 +1,156 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional, Sequence
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+class Histogram:
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.bucket_counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.bucket_counts[i] += 1
+
+    def snapshot(self) -> dict:
+        return {
+            'count': self.count,
+            'sum': round(self.sum, 6),
+            'buckets': {str(bound): count for bound, count in zip(self.buckets, self.bucket_counts)},
+        }
+
+
+class MetricsRegistry:
+    """Per-phase latency histograms, per-handle event counters and gauges for the AFK cycle."""
+
+    def __init__(self, prefix: str = 'afk', clock: Callable[[], float] = time.perf_counter):
+        self.prefix = prefix
+        self.clock = clock
+        self.phases: Dict[str, Histogram] = {}
+        self.window_events: Dict[int, Counter] = {}
+        self.gauges: Dict[str, float] = {}
+        self.started = time.time()
+
+    def observe(self, phase: str, seconds: float) -> None:
+        histogram = self.phases.get(phase)
+        if histogram is None:
+            histogram = self.phases[phase] = Histogram()
+        histogram.observe(seconds)
+
+    @contextmanager
+    def time(self, phase: str):
+        start = self.clock()
+        try:
+            yield
+        finally:
+            self.observe(phase, self.clock() - start)
+
+    def increment(self, event: str, handle: int, amount: int = 1) -> None:
+        self.window_events.setdefault(handle, Counter())[event] += amount
+
+    def set_gauge(self, name: str, value: Optional[float]) -> None:
+        if value is not None:
+            self.gauges[name] = value
+
+    def forget_window(self, handle: int) -> None:
+        self.window_events.pop(handle, None)
+
+    def snapshot(self) -> dict:
+        return {
+            'timestamp': time.time(),
+            'uptime_seconds': round(time.time() - self.started, 3),
+            'phases': {phase: histogram.snapshot() for phase, histogram in self.phases.items()},
+            'windows': {str(handle): dict(events) for handle, events in self.window_events.items()},
+            'gauges': dict(self.gauges),
+        }
+
+    def render_prometheus(self) -> str:
+        p = self.prefix
+        lines = [f"# HELP {p}_phase_seconds Latency of each phase of processing a window.",
+                 f"# TYPE {p}_phase_seconds histogram"]
+        for phase, histogram in sorted(self.phases.items()):
+            for bound, count in zip(histogram.buckets, histogram.bucket_counts):
+                lines.append(f'{p}_phase_seconds_bucket{{phase="{phase}",le="{bound}"}} {count}')
+            lines.append(f'{p}_phase_seconds_bucket{{phase="{phase}",le="+Inf"}} {histogram.count}')
+            lines.append(f'{p}_phase_seconds_sum{{phase="{phase}"}} {histogram.sum}')
+            lines.append(f'{p}_phase_seconds_count{{phase="{phase}"}} {histogram.count}')
+
+        lines += [f"# HELP {p}_window_events_total Successes, retries and failures per window handle.",
+                  f"# TYPE {p}_window_events_total counter"]
+        for handle, events in sorted(self.window_events.items()):
+            for event, count in sorted(events.items()):
+                lines.append(f'{p}_window_events_total{{handle="{handle}",event="{event}"}} {count}')
+
+        for name, value in sorted(self.gauges.items()):
+            lines += [f"# TYPE {p}_{name} gauge", f"{p}_{name} {value}"]
+        return "\n".join(lines) + "\n"
+
+    def write_snapshot(self, path: str) -> None:
+        """Write the JSON snapshot atomically so readers never see a partial file."""
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w') as file:
+            json.dump(self.snapshot(), file)
+        os.replace(temp_path, path)
+
+
+class MetricsServer:
+    """Minimal local HTTP endpoint: ``/metrics`` serves Prometheus text, ``/metrics.json`` the JSON snapshot.
+
+    ``refresh`` is called before every response so gauges reflect the moment of the scrape.
+    """
+
+    def __init__(self, metrics: MetricsRegistry, host: str = '127.0.0.1', port: int = 9464,
+                 refresh: Optional[Callable[[], None]] = None):
+        self.metrics = metrics
+        self.refresh = refresh
+        self.host = host
+        self.port = port
+        self.server = None
+
+    async def start(self) -> None:
+        self.server = await asyncio.start_server(self.handle_request, self.host, self.port)
+        logging.info(f"Metrics endpoint listening on http://{self.host}:{self.port}/metrics")
+
+    async def stop(self) -> None:
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+
+    async def handle_request(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request_line = (await asyncio.wait_for(reader.readline(), timeout=5)).decode('latin-1').split()
+            while (await asyncio.wait_for(reader.readline(), timeout=5)) not in (b'\r\n', b'\n', b''):
+                pass
+            path = request_line[1] if len(request_line) > 1 else '/'
+            if self.refresh is not None:
+                self.refresh()
+            if path == '/metrics':
+                status, content_type, body = '200 OK', 'text/plain; version=0.0.4', self.metrics.render_prometheus()
+            elif path == '/metrics.json':
+                status, content_type, body = '200 OK', 'application/json', json.dumps(self.metrics.snapshot())
+            else:
+                status, content_type, body = '404 Not Found', 'text/plain', 'not found\n'
+            payload = body.encode('utf-8')
+            writer.write(f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\nContent-Length: {len(payload)}\r\n"
+                         f"Connection: close\r\n\r\n".encode('latin-1') + payload)
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        except Exception as e:
+            # A failing scrape (e.g. a refresh callback raising) must not go unnoticed or take the server down.
+            logging.error(f"Metrics request failed: {e}", exc_info=True)
+        finally:
+            writer.close()
@@ -0,0 +1,195 @@
+import asyncio
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+from typing import Callable, Iterable, Optional
+
+
+class StackSampler:
+    """Samples the stacks of all other threads every ``interval`` seconds into collapsed-stack counts.
+
+    The output is the ``frame;frame;frame count`` format read by flamegraph.pl and speedscope, with the thread name as
+    the root frame, so time spent on worker threads shows up next to the event loop.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        return self.stacks
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                labels = []
+                while frame is not None:
+                    code = frame.f_code
+                    labels.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                labels.append(names.get(ident, str(ident)).replace(' ', '_'))
+                self.stacks[';'.join(reversed(labels))] += 1
+            self.samples += 1
+
+
+class CycleProfiler:
+    """Captures the next ``cycles`` AFK cycles on request, without restarting the bot.
+
+    A cycle is a full pass over the windows: it ends once every window that was open when it began, and still is,
+    has been served. The scheduler usually serves one window per pass of the reset loop, so a cycle spans many of
+    them. While a capture runs, a stack sampler records collapsed stacks and a probe task that wakes every
+    ``lag_interval`` seconds logs how late the event loop resumed it; the loop also reports every callback step
+    (one ``await`` handoff of a task such as ``process_window``) that ran longer than ``slow_callback``. Results
+    are written to ``output_dir`` as ``profile-<time>.collapsed`` and ``profile-<time>-lag.jsonl``.
+    """
+
+    def __init__(self, output_dir: str, interval: float = 0.005, lag_interval: float = 0.01,
+                 slow_callback: float = 0.05):
+        self.output_dir = output_dir
+        self.interval = interval
+        self.lag_interval = lag_interval
+        self.slow_callback = slow_callback
+        self.requested = 0
+        self.reason = ''
+        self.remaining = 0
+        self.sampler: Optional[StackSampler] = None
+        self.lag_task: Optional[asyncio.Task] = None
+        self.lag_file = None
+        self.lag_handler: Optional[logging.Handler] = None
+        self.base_name = ''
+        self.cycle_number = 0
+        self.unserved = set()
+
+    @property
+    def active(self) -> bool:
+        return self.sampler is not None
+
+    def request(self, cycles: int, reason: str) -> None:
+        """Arm a capture of the next ``cycles`` cycles. Only sets attributes, so it is safe in a signal handler."""
+        if cycles > 0 and not self.active:
+            self.requested = cycles
+            self.reason = reason
+
+    def check_control_file(self, path: str, default_cycles: int) -> None:
+        """Arm a capture if ``path`` exists; its content, if any, is the number of cycles. The file is removed."""
+        if not os.path.exists(path):
+            return
+        try:
+            with open(path, 'r') as file:
+                content = file.read().strip()
+            os.remove(path)
+            self.request(int(content) if content else default_cycles, f"control file {path}")
+        except (OSError, ValueError) as e:
+            logging.error(f"Could not read profiling control file {path}: {e}")
+
+    @asynccontextmanager
+    async def cycle(self, windows: Callable[[], Iterable[int]]):
+        """Wrap one pass of the reset loop; ``windows`` returns the handles currently open."""
+        if self.requested and not self.active:
+            self._start()
+            self.unserved = set(windows())
+        try:
+            yield
+        finally:
+            if self.active:
+                # Windows that closed meanwhile do not hold the cycle open.
+                self.unserved &= set(windows())
+                if not self.unserved:
+                    self.cycle_number += 1
+                    self.remaining -= 1
+                    if self.remaining <= 0:
+                        await self._stop()
+                    else:
+                        self.unserved = set(windows())
+
+    def served(self, handle: int) -> None:
+        self.unserved.discard(handle)
+
+    async def close(self) -> None:
+        """Write out a capture that is still running, e.g. at shutdown."""
+        if self.active:
+            logging.info(f"Profiling stopped after {self.cycle_number} of the requested cycle(s).")
+            await self._stop()
+
+    def _start(self) -> None:
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.base_name = os.path.join(self.output_dir, time.strftime('profile-%Y%m%d-%H%M%S'))
+        self.remaining, self.requested, self.cycle_number = self.requested, 0, 0
+        self.lag_file = open(f"{self.base_name}-lag.jsonl", 'w', encoding='utf-8')
+
+        loop = asyncio.get_running_loop()
+        self.lag_handler = _SlowCallbackHandler(self)
+        logging.getLogger('asyncio').addHandler(self.lag_handler)
+        loop.slow_callback_duration = self.slow_callback
+        loop.set_debug(True)
+
+        self.sampler = StackSampler(self.interval)
+        self.sampler.start()
+        self.lag_task = asyncio.create_task(self._probe_lag())
+        logging.info(f"Profiling the next {self.remaining} cycle(s), requested by {self.reason}.")
+
+    async def _stop(self) -> None:
+        self.lag_task.cancel()
+        try:
+            await self.lag_task
+        except asyncio.CancelledError:
+            pass
+        stacks = self.sampler.stop()
+        loop = asyncio.get_running_loop()
+        loop.set_debug(False)
+        logging.getLogger('asyncio').removeHandler(self.lag_handler)
+        self.lag_file.close()
+
+        with open(f"{self.base_name}.collapsed", 'w', encoding='utf-8') as file:
+            for stack, count in stacks.most_common():
+                file.write(f"{stack} {count}\n")
+        logging.info(f"Profile written to {self.base_name}.collapsed ({self.sampler.samples} samples) "
+                     f"and {self.base_name}-lag.jsonl.")
+        self.sampler = None
+        self.lag_task = None
+        self.lag_file = None
+
+    def write_lag(self, entry: dict) -> None:
+        if self.lag_file is not None:
+            entry['cycle'] = self.cycle_number
+            self.lag_file.write(json.dumps(entry) + '\n')
+
+    async def _probe_lag(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.lag_interval)
+            lag = loop.time() - started - self.lag_interval
+            self.write_lag({'t': round(time.time(), 4), 'lag_ms': round(max(0.0, lag) * 1000, 3)})
+
+
+class _SlowCallbackHandler(logging.Handler):
+    """Copies asyncio's slow-callback reports ("Executing <Task ...> took 0.120 seconds") into the lag log."""
+
+    def __init__(self, profiler: CycleProfiler):
+        super().__init__(logging.WARNING)
+        self.profiler = profiler
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.profiler.write_lag({'t': round(record.created, 4), 'slow_callback': record.getMessage()})
@@ -0,0 +1,175 @@
+import heapq
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+
+class DeadlineScheduler:
+    """Keeps one kick deadline per window handle and hands out the windows that need servicing.
+
+    Windows are ordered by deadline (last successful reset + kick timeout) in a heap. Dispatches
+    are paced so that each window is serviced roughly once per ``reset_interval`` and the work is
+    spread evenly over time; a window that is within ``safety_margin`` of its deadline is served
+    immediately regardless of pacing.
+    """
+
+    def __init__(self, kick_timeout: float = 1200, reset_interval: float = 900, safety_margin: float = 120,
+                 min_reset_age: float = 60, retry_delay: float = 30, clock: Callable[[], float] = time.monotonic):
+        self.kick_timeout = kick_timeout
+        self.reset_interval = reset_interval
+        self.safety_margin = safety_margin
+        self.min_reset_age = min_reset_age
+        self.retry_delay = retry_delay
+        self.clock = clock
+
+        self.last_reset: Dict[int, float] = {}
+        self.deadlines: Dict[int, float] = {}
+        self.retry_at: Dict[int, float] = {}
+        self.in_flight = set()
+        self._heap: List[Tuple[float, int, int]] = []
+        self._seq = 0
+        self._last_dispatch: Optional[float] = None
+        self.rotation_dispatches = 0
+
+    def __len__(self):
+        return len(self.deadlines)
+
+    def __contains__(self, handle):
+        return handle in self.deadlines
+
+    @property
+    def spacing(self) -> float:
+        """Seconds between two dispatches so that every window is visited once per reset interval."""
+        return self.reset_interval / max(1, len(self.deadlines))
+
+    def _push(self, handle: int, deadline: float) -> None:
+        self.deadlines[handle] = deadline
+        self._seq += 1
+        heapq.heappush(self._heap, (deadline, self._seq, handle))
+
+    def add_window(self, handle: int, last_reset: Optional[float] = None) -> None:
+        if handle in self.deadlines:
+            return
+        if last_reset is None:
+            # Nothing is known about this window, so assume it is about to be kicked.
+            deadline = self.clock() + self.safety_margin
+        else:
+            self.last_reset[handle] = last_reset
+            deadline = last_reset + self.kick_timeout
+        self._push(handle, deadline)
+
+    def remove_window(self, handle: int) -> None:
+        self.deadlines.pop(handle, None)
+        self.last_reset.pop(handle, None)
+        self.retry_at.pop(handle, None)
+        self.in_flight.discard(handle)
+
+    def sync_windows(self, handles: Iterable[int]) -> Tuple[List[int], List[int]]:
+        """Track exactly ``handles``; returns the (added, removed) handles."""
+        current = set(handles)
+        added = [handle for handle in current if handle not in self.deadlines]
+        removed = [handle for handle in self.deadlines if handle not in current]
+        for handle in removed:
+            self.remove_window(handle)
+        for handle in added:
+            self.add_window(handle)
+        return added, removed
+
+    def _peek(self) -> Optional[Tuple[float, int]]:
+        """Earliest-deadline handle that is queued and not waiting for a retry, dropping stale heap entries."""
+        now = self.clock()
+        for handle in [h for h, retry_time in self.retry_at.items() if retry_time <= now]:
+            # The retry delay is over; from here on the window is paced like any other.
+            del self.retry_at[handle]
+        deferred = []
+        head = None
+        while self._heap:
+            deadline, seq, handle = self._heap[0]
+            if self.deadlines.get(handle) != deadline or handle in self.in_flight:
+                heapq.heappop(self._heap)
+                continue
+            if handle in self.retry_at:
+                deferred.append(heapq.heappop(self._heap))
+                continue
+            head = (deadline, handle)
+            break
+        for entry in deferred:
+            heapq.heappush(self._heap, entry)
+        return head
+
+    def _ready_time(self, deadline: float, handle: int) -> float:
+        if deadline - self.safety_margin <= self.clock():
+            return self.clock()
+        ready = deadline - self.kick_timeout + self.min_reset_age
+        if self._last_dispatch is not None:
+            ready = max(ready, self._last_dispatch + self.spacing)
+        return min(ready, deadline - self.safety_margin)
+
+    def next_dispatch_time(self) -> Optional[float]:
+        """Clock time at which the next window should be served, or None if nothing is queued."""
+        head = self._peek()
+        candidates = []
+        if head is not None:
+            candidates.append(self._ready_time(*head))
+        # _peek dropped the retry times that have passed, so only future ones are left.
+        candidates.extend(t for h, t in self.retry_at.items() if h not in self.in_flight and h in self.deadlines)
+        return min(candidates) if candidates else None
+
+    def time_until_next_dispatch(self) -> Optional[float]:
+        next_time = self.next_dispatch_time()
+        if next_time is None:
+            return None
+        return max(0.0, next_time - self.clock())
+
+    def pop_due(self, limit: int = 1) -> List[int]:
+        """Take up to ``limit`` windows that are due now and mark them as in flight."""
+        due = []
+        while len(due) < limit:
+            head = self._peek()
+            if head is None or self._ready_time(*head) > self.clock():
+                break
+            deadline, handle = head
+            heapq.heappop(self._heap)
+            self.in_flight.add(handle)
+            self._last_dispatch = self.clock()
+            self.rotation_dispatches += 1
+            due.append(handle)
+        return due
+
+    def end_of_rotation(self) -> bool:
+        """True once per rotation, i.e. after as many dispatches as there are windows since it last returned True."""
+        if self.deadlines and self.rotation_dispatches >= len(self.deadlines):
+            self.rotation_dispatches = 0
+            return True
+        return False
+
+    def reschedule(self, handle: int, deadline: float) -> None:
+        """Move a queued window to a new deadline, e.g. after the kick timeout changed."""
+        if handle in self.deadlines and handle not in self.in_flight:
+            self._push(handle, deadline)
+
+    def record_success(self, handle: int, when: Optional[float] = None) -> None:
+        if handle not in self.deadlines:
+            return
+        when = self.clock() if when is None else when
+        self.in_flight.discard(handle)
+        self.retry_at.pop(handle, None)
+        self.last_reset[handle] = when
+        self._push(handle, when + self.kick_timeout)
+
+    def record_failure(self, handle: int, retry_at: Optional[float] = None) -> None:
+        """Requeue a window that could not be reset; it keeps its deadline and is retried after a delay."""
+        if handle not in self.deadlines:
+            return
+        self.in_flight.discard(handle)
+        self.retry_at[handle] = self.clock() + self.retry_delay if retry_at is None else retry_at
+        self._push(handle, self.deadlines[handle])
+
+    def slack(self, handle: int) -> Optional[float]:
+        deadline = self.deadlines.get(handle)
+        return None if deadline is None else deadline - self.clock()
+
+    def worst_case_slack(self) -> Optional[float]:
+        """Smallest time left before any tracked window would be kicked."""
+        if not self.deadlines:
+            return None
+        return min(self.deadlines.values()) - self.clock()
@@ -0,0 +1,352 @@
+import random
+import threading
+import time
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from backends import DesktopBackend, ProcessSample, Rect, WindowNotFoundError
+from window_registry import EVENT_CREATE, EVENT_DESTROY, EVENT_RENAME, WindowEventSource
+
+
+class SimulatedBackendError(Exception):
+    """Injected failure of a simulated desktop call."""
+
+
+class SimulatedWindow:
+    def __init__(self, handle: int, pid: int, thread_id: int, title: str = "Roblox", class_name: str = "WINDOWSCLIENT",
+                 rect: Rect = Rect(0, 0, 816, 638)):
+        self.handle = handle
+        self.pid = pid
+        self.thread_id = thread_id
+        self.title = title
+        self.class_name = class_name
+        self.rect = rect
+        self.iconic = True
+        self.maximized = False
+        self.alive = True
+        self.clicks = 0
+        self.joined = 0.0
+        self.last_input_time: Optional[float] = None
+        self.accepts_background_input = True
+        self.hung = False
+        self.cpu_seconds = 0.0
+        self.rss = 600 * 1024 * 1024
+        self.low_priority = False
+        self.affinity: Optional[List[int]] = None
+        self.pending: Dict[str, Tuple[object, float]] = {}
+
+
+class SimulatedWindowWrapper:
+    """Stand-in for the pywinauto window wrapper returned by ``Win32Backend.connect``."""
+
+    def __init__(self, backend: 'SimulatedBackend', handle: int):
+        self.backend = backend
+        self.handle = handle
+
+    def rectangle(self) -> Rect:
+        return self.backend.get_window_rect(self.handle)
+
+    def set_focus(self) -> None:
+        self.backend.set_foreground_window(self.handle)
+
+    def minimize(self) -> None:
+        self.backend.minimize_window(self.handle)
+
+
+class SimulatedBackend(DesktopBackend):
+    """In-memory desktop with configurable per-call latency and failure rates.
+
+    ``latencies`` and ``failure_rates`` map an operation name (``find_windows``, ``restore``, ``set_window_pos``,
+    ``focus``, ``connect``, ``click``, ...) to seconds and a probability; ``default`` applies to every other
+    operation. A latency given as a ``(low, high)`` pair is drawn uniformly from that range on every call. Latency is spent with a blocking ``sleep`` because the real Win32 calls block their caller too.
+    Calls that send a message to a ``hung`` window block for ``hang_delay`` seconds, like a frozen client does.
+    ``transition_delays`` (``restore``, ``focus``) delay when the new window state becomes observable, the way a
+    real client takes a while to repaint after ``ShowWindow`` returns. ``background_reject_rate`` is the share of
+    windows that refuse posted mouse messages, as happens when UIPI blocks ``PostMessage``.
+    """
+
+    name = 'simulated'
+    SENT_MESSAGE_OPERATIONS = {'restore', 'minimize', 'set_window_pos', 'focus', 'connect'}
+
+    def __init__(self, window_count: int = 10, screen: Tuple[int, int] = (1920, 1080), taskbar_height: int = 40,
+                 latencies: Optional[Dict[str, float]] = None, failure_rates: Optional[Dict[str, float]] = None,
+                 transition_delays: Optional[Dict[str, float]] = None, background_reject_rate: float = 0.0, seed: Optional[int] = None, clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep, hang_delay: float = 10.0):
+        self.screen = screen
+        self.extra_monitors: List[Rect] = []
+        self.taskbar_height = taskbar_height
+        self.latencies = latencies or {}
+        self.failure_rates = failure_rates or {}
+        self.transition_delays = transition_delays or {}
+        self.background_reject_rate = background_reject_rate
+        self.hang_delay = hang_delay
+        self.random = random.Random(seed)
+        self.clock = clock
+        self.sleep = sleep
+        self.windows: Dict[int, SimulatedWindow] = {}
+        self.foreground = 0
+        self.mouse_position = (0, 0)
+        self.mouse_pressed = False
+        # Load from everything but the simulated clients; raise it to put the host under pressure.
+        self.system_cpu_percent = 10.0
+        self.total_memory = 16 * 1024 ** 3
+        self.call_counts = Counter()
+        self.call_counts_by_handle: Dict[int, Counter] = {}
+        self._lock = threading.Lock()
+        self._next_handle = 0x10000
+        self.event_source = WindowEventSource()
+        for _ in range(window_count):
+            self.spawn_window()
+
+    def spawn_window(self, title: str = "Roblox", pid: Optional[int] = None) -> int:
+        with self._lock:
+            handle = self._next_handle
+            self._next_handle += 2
+        pid = pid if pid is not None else 1000 + handle % 100000
+        window = SimulatedWindow(handle, pid, pid + 1, title=title)
+        window.accepts_background_input = self.random.random() >= self.background_reject_rate
+        window.joined = self.clock()
+        self.windows[handle] = window
+        self.event_source.post(EVENT_CREATE, handle)
+        return handle
+
+    def close_window(self, handle: int) -> None:
+        window = self.windows.pop(handle, None)
+        if window is not None:
+            window.alive = False
+            self.event_source.post(EVENT_DESTROY, handle)
+
+    def rename_window(self, handle: int, title: str) -> None:
+        self.windows[handle].title = title
+        self.event_source.post(EVENT_RENAME, handle)
+
+    def reset_counters(self) -> None:
+        self.call_counts.clear()
+        self.call_counts_by_handle.clear()
+
+    def _call(self, operation: str, handle: Optional[int] = None) -> Optional[SimulatedWindow]:
+        with self._lock:
+            self.call_counts[operation] += 1
+            if handle is not None:
+                self.call_counts_by_handle.setdefault(handle, Counter())[operation] += 1
+            fail = self.random.random() < self.failure_rates.get(operation, self.failure_rates.get('default', 0.0))
+        latency = self.latencies.get(operation, self.latencies.get('default', 0.0))
+        if isinstance(latency, tuple):
+            latency = self.random.uniform(*latency)
+        if latency:
+            self.sleep(latency)
+        if fail:
+            raise SimulatedBackendError(f"Simulated failure of {operation} for handle {handle}")
+        if handle is None:
+            return None
+        window = self.windows.get(handle)
+        if window is None:
+            raise WindowNotFoundError(f"Window {handle} does not exist")
+        if window.hung and operation in self.SENT_MESSAGE_OPERATIONS:
+            self.sleep(self.hang_delay)
+        self._settle(window)
+        return window
+
+    def _settle(self, window: SimulatedWindow) -> None:
+        now = self.clock()
+        for attribute, (value, apply_at) in list(window.pending.items()):
+            if apply_at <= now:
+                del window.pending[attribute]
+                if attribute == 'foreground':
+                    self.foreground = window.handle
+                else:
+                    setattr(window, attribute, value)
+
+    def _transition(self, window: SimulatedWindow, operation: str, attribute: str, value) -> None:
+        delay = self.transition_delays.get(operation, 0.0)
+        window.pending[attribute] = (value, self.clock() + delay)
+        if not delay:
+            self._settle(window)
+
+    def find_windows(self, title: str, class_name: str) -> List[int]:
+        self._call('find_windows')
+        return [w.handle for w in self.windows.values() if w.title == title and w.class_name == class_name]
+
+    def is_window(self, handle: int) -> bool:
+        self._call('is_window')
+        return handle in self.windows
+
+    def get_window_text(self, handle: int) -> str:
+        try:
+            return self._call('get_window_text', handle).title
+        except WindowNotFoundError:
+            return ''
+
+    def get_class_name(self, handle: int) -> str:
+        return self._call('get_class_name', handle).class_name
+
+    def get_window_rect(self, handle: int) -> Rect:
+        return self._call('get_window_rect', handle).rect
+
+    def get_window_thread_process_id(self, handle: int) -> Tuple[int, int]:
+        if handle == 0:
+            # No foreground window, as after minimizing the last one.
+            return 0, 0
+        window = self._call('get_window_thread_process_id', handle)
+        return window.thread_id, window.pid
+
+    def is_iconic(self, handle: int) -> bool:
+        return self._call('is_iconic', handle).iconic
+
+    def is_maximized(self, handle: int) -> bool:
+        return self._call('is_maximized', handle).maximized
+
+    def get_foreground_window(self) -> int:
+        self._call('get_foreground_window')
+        for window in self.windows.values():
+            if 'foreground' in window.pending:
+                self._settle(window)
+        return self.foreground
+
+    def restore_window(self, handle: int, activate: bool = True) -> None:
+        window = self._call('restore', handle)
+        window.maximized = False
+        self._transition(window, 'restore', 'iconic', False)
+        if activate:
+            self.foreground = handle
+
+    def minimize_window(self, handle: int) -> None:
+        window = self._call('minimize', handle)
+        window.pending.clear()
+        window.iconic = True
+        if self.foreground == handle:
+            self.foreground = 0
+
+    def set_window_pos(self, handle: int, x: int, y: int, width: int, height: int, activate: bool = True) -> None:
+        window = self._call('set_window_pos', handle)
+        window.rect = Rect(x, y, x + width, y + height)
+        window.iconic = False
+        if activate:
+            self.foreground = handle
+
+    def allow_set_foreground_window(self) -> None:
+        self._call('allow_set_foreground_window')
+
+    def attach_thread_input(self, thread_id: int, target_thread_id: int, attach: bool) -> None:
+        self._call('attach_thread_input')
+
+    def set_foreground_window(self, handle: int) -> None:
+        window = self._call('focus', handle)
+        self._transition(window, 'focus', 'foreground', True)
+
+    def bring_window_to_top(self, handle: int) -> None:
+        self._call('bring_window_to_top', handle)
+
+    def probe_window(self, handle: int, timeout: float) -> bool:
+        window = self._call('probe', handle)
+        if window.hung:
+            self.sleep(timeout)
+            return False
+        return True
+
+    def connect(self, handle: int) -> SimulatedWindowWrapper:
+        self._call('connect', handle)
+        return SimulatedWindowWrapper(self, handle)
+
+    def create_window_event_source(self) -> WindowEventSource:
+        return self.event_source
+
+    def screen_size(self) -> Tuple[int, int]:
+        return self.screen
+
+    def get_taskbar_rect(self) -> Rect:
+        self._call('get_taskbar_rect')
+        width, height = self.screen
+        return Rect(0, height - self.taskbar_height, width, height)
+
+    def monitor_work_areas(self) -> List[Rect]:
+        self._call('monitor_work_areas')
+        width, height = self.screen
+        return [Rect(0, 0, width, height - self.taskbar_height)] + list(self.extra_monitors)
+
+    def window_at(self, x: int, y: int) -> Optional[SimulatedWindow]:
+        # The foreground window is on top of the z-order; the order of the others does not matter here.
+        foreground = self.windows.get(self.foreground)
+        for window in ([foreground] if foreground else []) + list(self.windows.values()):
+            rect = window.rect
+            if not window.iconic and rect.left <= x < rect.right and rect.top <= y < rect.bottom:
+                return window
+        return None
+
+    def move_mouse(self, x: int, y: int) -> None:
+        self._call('move_mouse')
+        self.mouse_position = (x, y)
+
+    def click(self) -> None:
+        self._call('click')
+        self._register_input()
+
+    def send_input(self, events) -> None:
+        self._call('send_input')
+        for event in events:
+            if event.delay:
+                self.sleep(event.delay)
+            self.mouse_position = (event.x, event.y)
+            if event.kind == 'down':
+                self.mouse_pressed = True
+            elif event.kind == 'up':
+                self.mouse_pressed = False
+                self._register_input()
+
+    def post_mouse_event(self, handle: int, kind: str, x: int, y: int, pressed: bool = False) -> bool:
+        window = self._call('post_message', handle)
+        if not window.accepts_background_input:
+            return False
+        if kind == 'up':
+            window.clicks += 1
+            window.last_input_time = self.clock()
+        return True
+
+    def client_size(self, handle: int) -> Tuple[int, int]:
+        window = self._call('client_size', handle)
+        if window.iconic:
+            # As on Windows, a minimized window's client rectangle is empty.
+            return 0, 0
+        return window.rect.width(), window.rect.height()
+
+    def capture_client(self, handle: int, out) -> None:
+        # The frame is a flat colour that changes with every click the window received.
+        window = self._call('capture', handle)
+        view = memoryview(out).cast('B')
+        view[:] = bytes(((window.clicks * 53) % 256, 0x40, 0x40, 0xFF)) * (len(view) // 4)
+
+    def _process_window(self, pid: int) -> SimulatedWindow:
+        for window in self.windows.values():
+            if window.pid == pid:
+                return window
+        raise SimulatedBackendError(f"No simulated process with pid {pid}")
+
+    def system_usage(self) -> Tuple[float, float]:
+        self._call('system_usage')
+        memory = 100 * sum(window.rss for window in self.windows.values()) / self.total_memory
+        return self.system_cpu_percent, min(100.0, memory)
+
+    def sample_process(self, pid: int) -> ProcessSample:
+        self._call('sample_process')
+        window = self._process_window(pid)
+        # An idle client burns less CPU at low priority; enough to make the governor's effect visible.
+        window.cpu_seconds += 0.05 if window.low_priority else 0.2
+        return ProcessSample(window.cpu_seconds, window.rss, 900)
+
+    def set_process_priority(self, pid: int, low: bool) -> None:
+        self._call('set_priority')
+        self._process_window(pid).low_priority = low
+
+    def set_process_affinity(self, pid: int, cpus: Optional[Sequence[int]]) -> None:
+        self._call('set_affinity')
+        self._process_window(pid).affinity = list(cpus) if cpus else None
+
+    def trim_working_set(self, pid: int) -> None:
+        self._call('trim_working_set')
+        window = self._process_window(pid)
+        window.rss = min(window.rss, 150 * 1024 * 1024)
+
+    def _register_input(self) -> None:
+        window = self.window_at(*self.mouse_position)
+        if window is not None and window.handle == self.foreground:
+            window.clicks += 1
+            window.last_input_time = self.clock()
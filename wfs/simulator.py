@@ -0,0 +1,211 @@
+"""Replay hours of AFK operation in seconds on a virtual clock.
+
+Drives the real ``RobloxAFKBot`` main loop against the simulated desktop backend. Time only moves when every task
+is waiting: ``asyncio.sleep`` and every simulated desktop call advance a virtual clock instead of waiting. Each
+simulated instance is kicked once it has been idle for ``--kick-timeout`` seconds and immediately rejoins as a new
+window. Every combination of the list-valued options is run, and kicks, slack before the kick and how busy the
+shared mouse was are reported for each one.
+
+    python simulator.py --windows 10 20 40 --hours 24 --click-wait 0 1 --latency focus=0.01:0.05 --json sim.json
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import selectors
+import statistics
+import time
+from config_manager import ConfigManager
+from blocking_calls import InlineRunner
+from simulated_backend import SimulatedBackend
+from afk_script import Logger, RobloxAFKBot
+
+
+class VirtualClock:
+    def __init__(self, start: float = 0.0):
+        self.current = start
+
+    def now(self) -> float:
+        return self.current
+
+    def advance(self, seconds: float) -> None:
+        if seconds > 0:
+            self.current += seconds
+
+
+class VirtualTimeSelector(selectors.DefaultSelector):
+    """Never blocks: when nothing is ready it jumps the clock to the time asyncio wanted to wait until."""
+
+    def __init__(self, clock: VirtualClock):
+        super().__init__()
+        self.clock = clock
+
+    def select(self, timeout=None):
+        events = super().select(0)
+        if not events and timeout:
+            self.clock.advance(timeout)
+        return events
+
+
+class VirtualTimeLoop(asyncio.SelectorEventLoop):
+    def __init__(self, clock: VirtualClock):
+        super().__init__(VirtualTimeSelector(clock))
+        self.clock = clock
+
+    def time(self) -> float:
+        return self.clock.now()
+
+
+class KickModel:
+    """Kicks every instance that went ``kick_timeout`` seconds without input and relaunches it at once."""
+
+    def __init__(self, backend: SimulatedBackend, clock: VirtualClock, kick_timeout: float):
+        self.backend = backend
+        self.clock = clock
+        self.kick_timeout = kick_timeout
+        self.kicks = 0
+        self.slack_samples = []
+
+    def idle_seconds(self, window) -> float:
+        last_input = window.last_input_time if window.last_input_time is not None else window.joined
+        return self.clock.now() - last_input
+
+    async def run(self, check_interval: float = 5, sample_interval: float = 60):
+        next_sample = self.clock.now()
+        while True:
+            await asyncio.sleep(check_interval)
+            for handle, window in list(self.backend.windows.items()):
+                if self.idle_seconds(window) >= self.kick_timeout:
+                    self.kicks += 1
+                    self.backend.close_window(handle)
+                    self.backend.spawn_window()
+            if self.clock.now() >= next_sample and self.backend.windows:
+                self.slack_samples.append(min(self.kick_timeout - self.idle_seconds(window)
+                                              for window in self.backend.windows.values()))
+                next_sample += sample_interval
+
+
+async def run_simulation(args, windows: int, click_wait: float, windows_per_batch: int, reset_interval: int,
+                         clock: VirtualClock) -> dict:
+    config_manager = ConfigManager(config_file=os.path.join(os.path.dirname(os.path.abspath(__file__)), "config.json"))
+    config_manager.apply_overrides(
+        log_console=False, state_store_path='', metrics_port=0, metrics_snapshot_path='',
+        expected_instances=0, click_wait_time=click_wait, windows_per_batch=windows_per_batch,
+        reset_interval=reset_interval, kick_timeout=args.kick_timeout
+    )
+    backend = SimulatedBackend(window_count=windows, latencies=parse_latencies(args.latency),
+                               failure_rates=parse_pairs(args.failure), transition_delays=parse_pairs(args.transition),
+                               seed=args.seed, clock=clock.now, sleep=clock.advance)
+    bot = RobloxAFKBot(config_manager, backend=backend, runner=InlineRunner(), clock=clock.now)
+    logging.getLogger().setLevel(logging.WARNING)
+    kick_model = KickModel(backend, clock, args.kick_timeout)
+
+    duration = args.hours * 3600
+    world = asyncio.create_task(kick_model.run())
+    main_loop = asyncio.create_task(bot.main_loop())
+    await asyncio.sleep(duration)
+    bot.shutdown()
+    await main_loop
+    world.cancel()
+
+    served = bot.metrics.phases.get('process_window')
+    input_phase = bot.metrics.phases.get('input')
+    slack = sorted(kick_model.slack_samples)
+    return {
+        'windows': windows,
+        'click_wait': click_wait,
+        'windows_per_batch': windows_per_batch,
+        'reset_interval': reset_interval,
+        'hours': args.hours,
+        'kicks': kick_model.kicks,
+        'kicks_per_instance_day': round(kick_model.kicks / windows / (args.hours / 24), 4) if windows else 0.0,
+        'served': served.count if served else 0,
+        'min_slack_seconds': round(slack[0], 1) if slack else None,
+        'p5_slack_seconds': round(slack[len(slack) // 20], 1) if slack else None,
+        'median_slack_seconds': round(statistics.median(slack), 1) if slack else None,
+        'input_utilisation': round(input_phase.sum / duration, 4) if input_phase else 0.0,
+    }
+
+
+def simulate(args, *configuration) -> dict:
+    clock = VirtualClock()
+    loop = VirtualTimeLoop(clock)
+    started = time.perf_counter()
+    try:
+        result = loop.run_until_complete(run_simulation(args, *configuration, clock))
+    finally:
+        loop.close()
+        Logger.shutdown()
+    result['real_seconds'] = round(time.perf_counter() - started, 2)
+    return result
+
+
+def parse_pairs(pairs):
+    values = {}
+    for pair in pairs or []:
+        key, _, value = pair.partition('=')
+        values[key] = float(value)
+    return values
+
+
+def parse_latencies(pairs):
+    """``OP=SECONDS`` for a fixed latency, ``OP=LOW:HIGH`` for one drawn uniformly per call."""
+    values = {}
+    for pair in pairs or []:
+        key, _, value = pair.partition('=')
+        low, _, high = value.partition(':')
+        values[key] = (float(low), float(high)) if high else float(low)
+    return values
+
+
+def capacity(results):
+    """Largest simulated window count without kicks, per combination of the other settings."""
+    best = {}
+    for result in results:
+        key = (result['click_wait'], result['windows_per_batch'], result['reset_interval'])
+        if result['kicks'] == 0:
+            best[key] = max(best.get(key, 0), result['windows'])
+        else:
+            best.setdefault(key, 0)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--windows', type=int, nargs='+', default=[10, 20, 40])
+    parser.add_argument('--click-wait', type=float, nargs='+', default=[1.0])
+    parser.add_argument('--windows-per-batch', type=int, nargs='+', default=[1])
+    parser.add_argument('--reset-interval', type=int, nargs='+', default=[900])
+    parser.add_argument('--kick-timeout', type=int, default=1200, help="idle seconds before an instance is kicked")
+    parser.add_argument('--hours', type=float, default=24)
+    parser.add_argument('--latency', action='append', metavar='OP=SECONDS[:MAX]', help="per-call latency")
+    parser.add_argument('--failure', action='append', metavar='OP=RATE', help="per-call failure rate")
+    parser.add_argument('--transition', action='append', metavar='OP=SECONDS', help="restore/focus state delay")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', help="write the results to this file")
+    args = parser.parse_args()
+
+    results = []
+    for configuration in itertools.product(args.windows, args.click_wait, args.windows_per_batch,
+                                           args.reset_interval):
+        result = simulate(args, *configuration)
+        results.append(result)
+        print(f"{result['windows']:>4} windows, click_wait {result['click_wait']:g}s, "
+              f"batch {result['windows_per_batch']}, interval {result['reset_interval']}s: "
+              f"{result['kicks']} kicks ({result['kicks_per_instance_day']:.3f}/instance/day), "
+              f"slack min {result['min_slack_seconds']}s p5 {result['p5_slack_seconds']}s, "
+              f"input busy {result['input_utilisation']:.1%} [{result['real_seconds']}s]")
+
+    for (click_wait, batch, interval), windows in sorted(capacity(results).items()):
+        print(f"Capacity without kicks (click_wait {click_wait:g}s, batch {batch}, interval {interval}s): "
+              f"{windows} instances")
+
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
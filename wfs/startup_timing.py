@@ -0,0 +1,75 @@
+import importlib
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, List, Tuple
+
+
+class StartupTimer:
+    """Startup checkpoints and timed phases, reported once the bot is fully up.
+
+    ``mark`` closes a step of the main startup sequence (imports, config, bot init, first gesture, ...) and records
+    the time since the previous mark; only the first mark of each name counts, so several bots in one process do
+    not repeat it. ``phase`` times work that runs beside that sequence, such as lazy imports on worker threads.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.perf_counter):
+        self.clock = clock
+        self.started = clock()
+        self.wall_started = time.time()
+        self.last_mark = self.started
+        self.marks: List[Tuple[str, float]] = []
+        self.phases: List[Tuple[str, float, float]] = []
+        self.reported = False
+        self._lock = threading.Lock()
+
+    def mark(self, name: str) -> None:
+        with self._lock:
+            if any(mark == name for mark, _ in self.marks):
+                return
+            now = self.clock()
+            self.marks.append((name, now - self.last_mark))
+            self.last_mark = now
+
+    @contextmanager
+    def phase(self, name: str):
+        start = self.clock()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.phases.append((name, start - self.started, self.clock() - start))
+
+    def before_python(self):
+        """Seconds from process creation to the first script import (PyInstaller bootloader and interpreter)."""
+        try:
+            import psutil
+            return max(0.0, self.wall_started - psutil.Process().create_time())
+        except Exception:
+            return None
+
+    def report(self) -> List[str]:
+        lines = []
+        before = self.before_python()
+        if before is not None:
+            lines.append(f"Startup: {before:.3f}s from process start to the first script import.")
+        elapsed = 0.0
+        for name, seconds in self.marks:
+            elapsed += seconds
+            lines.append(f"Startup: {name} took {seconds:.3f}s (done at {elapsed:.3f}s).")
+        for name, offset, seconds in self.phases:
+            lines.append(f"Startup: {name} took {seconds:.3f}s (started at {offset:.3f}s).")
+        return lines
+
+
+STARTUP = StartupTimer()
+
+
+def timed_import(name: str):
+    """Import ``name``, recording the time of the first, uncached import as a startup phase."""
+    module = sys.modules.get(name)
+    if module is None:
+        with STARTUP.phase(f"import {name}"):
+            module = importlib.import_module(name)
+    return module
@@ -0,0 +1,118 @@
+import json
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+Key = Tuple[int, int]
+
+
+class WindowState:
+    def __init__(self, pid: int, handle: int, last_reset: Optional[float] = None, failure_streak: int = 0,
+                 timings: Optional[dict] = None):
+        self.pid = pid
+        self.handle = handle
+        self.last_reset = last_reset
+        self.failure_streak = failure_streak
+        self.timings = timings or {}
+
+
+class WindowStateStore:
+    """Per-window scheduling state kept in a local SQLite file so a restart can resume instead of sweeping.
+
+    Rows are keyed by (pid, handle), so a handle reused by a new Roblox process starts fresh. ``last_reset`` is
+    stored as wall-clock time because the monotonic clock does not survive a restart. Updates are collected in
+    memory and written by ``flush`` in one transaction; the database runs in WAL mode, so a crash loses at most the
+    updates since the last flush and never leaves a torn file.
+    """
+
+    def __init__(self, path: str, wall_clock: Callable[[], float] = time.time):
+        self.path = path
+        self.wall_clock = wall_clock
+        self.lock = threading.Lock()
+        self.states: Dict[Key, WindowState] = {}
+        self.dirty = set()
+        self.deleted = set()
+        self.missing_since: Dict[Key, float] = {}
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        with self.connection:
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("PRAGMA synchronous=NORMAL")
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS windows ("
+                " pid INTEGER NOT NULL, handle INTEGER NOT NULL, last_reset REAL, failure_streak INTEGER NOT NULL,"
+                " timings TEXT NOT NULL, updated REAL NOT NULL, PRIMARY KEY (pid, handle))")
+        for pid, handle, last_reset, failure_streak, timings in self.connection.execute(
+                "SELECT pid, handle, last_reset, failure_streak, timings FROM windows"):
+            self.states[(pid, handle)] = WindowState(pid, handle, last_reset, failure_streak, json.loads(timings))
+
+    def __len__(self):
+        return len(self.states)
+
+    def get(self, pid: int, handle: int) -> Optional[WindowState]:
+        with self.lock:
+            return self.states.get((pid, handle))
+
+    def _state(self, pid: int, handle: int) -> WindowState:
+        key = (pid, handle)
+        state = self.states.get(key)
+        if state is None:
+            state = self.states[key] = WindowState(pid, handle)
+        self.deleted.discard(key)
+        self.missing_since.pop(key, None)
+        self.dirty.add(key)
+        return state
+
+    def record_success(self, pid: int, handle: int, timings: Optional[dict] = None) -> None:
+        with self.lock:
+            state = self._state(pid, handle)
+            state.last_reset = self.wall_clock()
+            state.failure_streak = 0
+            if timings:
+                state.timings.update(timings)
+
+    def record_failure(self, pid: int, handle: int) -> None:
+        with self.lock:
+            self._state(pid, handle).failure_streak += 1
+
+    def seconds_since_reset(self, pid: int, handle: int) -> Optional[float]:
+        state = self.get(pid, handle)
+        if state is None or state.last_reset is None:
+            return None
+        return max(0.0, self.wall_clock() - state.last_reset)
+
+    def retain(self, keys: Iterable[Key], grace: float = 0) -> None:
+        """Drop the state of every window that has been missing from ``keys`` for at least ``grace`` seconds.
+
+        The grace period keeps a transient gap in the window enumeration from wiping the state of live windows.
+        """
+        keep = set(keys)
+        now = self.wall_clock()
+        with self.lock:
+            for key in keep:
+                self.missing_since.pop(key, None)
+            for key in [key for key in self.states if key not in keep]:
+                if now - self.missing_since.setdefault(key, now) < grace:
+                    continue
+                del self.states[key]
+                del self.missing_since[key]
+                self.dirty.discard(key)
+                self.deleted.add(key)
+
+    def flush(self) -> None:
+        with self.lock:
+            rows = [(s.pid, s.handle, s.last_reset, s.failure_streak, json.dumps(s.timings), self.wall_clock())
+                    for s in (self.states[key] for key in self.dirty)]
+            deleted = list(self.deleted)
+            self.dirty.clear()
+            self.deleted.clear()
+            if not rows and not deleted:
+                return
+            with self.connection:
+                self.connection.executemany("INSERT OR REPLACE INTO windows VALUES (?, ?, ?, ?, ?, ?)", rows)
+                self.connection.executemany("DELETE FROM windows WHERE pid = ? AND handle = ?", deleted)
+
+    def close(self) -> None:
+        self.flush()
+        with self.lock:
+            self.connection.close()
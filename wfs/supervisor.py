@@ -0,0 +1,120 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Callable, Deque, List, Optional, Sequence, Set, Tuple
+
+
+class CommandLauncher:
+    """Starts one instance by running ``command``; the process is reaped in the background."""
+
+    def __init__(self, command: Sequence[str]):
+        self.command = list(command)
+        # The event loop keeps only weak references to tasks, so the reapers are held here until they finish.
+        self.reapers: Set[asyncio.Task] = set()
+
+    async def launch(self) -> None:
+        process = await asyncio.create_subprocess_exec(*self.command, stdout=asyncio.subprocess.DEVNULL,
+                                                       stderr=asyncio.subprocess.DEVNULL)
+        reaper = asyncio.create_task(self._reap(process))
+        self.reapers.add(reaper)
+        reaper.add_done_callback(self.reapers.discard)
+
+    def close(self) -> None:
+        """Stop waiting for launched processes; the instances themselves keep running."""
+        for reaper in list(self.reapers):
+            reaper.cancel()
+
+    async def _reap(self, process) -> None:
+        returncode = await process.wait()
+        if returncode:
+            logging.info(f"Launch command {self.command[0]} exited with code {returncode}.")
+
+
+class PendingLaunch:
+    def __init__(self, started: float):
+        self.started = started
+
+
+class InstanceSupervisor:
+    """Keeps ``expected`` instances running by relaunching missing ones, a few at a time.
+
+    At most ``max_concurrent`` launches are booting at once and two launches are at least ``stagger`` seconds
+    apart, so clients do not all load at the same time. A launch is booting until a new window shows up, which is
+    then claimed by the oldest booting launch; a launch without a window after ``startup_timeout`` seconds is given
+    up on. ``launcher`` is any object with an ``async launch()`` method, so tests can swap in a stub.
+    """
+
+    def __init__(self, launcher, expected: int = 0, max_concurrent: int = 1, stagger: float = 30,
+                 startup_timeout: float = 300, clock: Callable[[], float] = time.monotonic):
+        self.launcher = launcher
+        self.expected = expected
+        self.max_concurrent = max_concurrent
+        self.stagger = stagger
+        self.startup_timeout = startup_timeout
+        self.clock = clock
+        self.pending: Deque[PendingLaunch] = deque()
+        self.last_launch: Optional[float] = None
+        self.startup_times: Deque[float] = deque(maxlen=100)
+        self.launched = 0
+        self.failed = 0
+
+    def claim(self, handles: Sequence[int]) -> List[Tuple[int, float]]:
+        """Match newly appeared windows to booting launches; returns (handle, startup seconds) per launched one."""
+        claimed = []
+        for handle in handles:
+            if not self.pending:
+                break
+            launch = self.pending.popleft()
+            startup = self.clock() - launch.started
+            self.startup_times.append(startup)
+            claimed.append((handle, startup))
+            logging.info(f"Launched instance came up as window {handle} after {startup:.1f} seconds.")
+        return claimed
+
+    def expire(self) -> None:
+        now = self.clock()
+        while self.pending and now - self.pending[0].started > self.startup_timeout:
+            self.pending.popleft()
+            self.failed += 1
+            logging.info(f"Launched instance did not show a window within {self.startup_timeout:.0f} seconds.")
+
+    def launches_needed(self, running: int) -> int:
+        self.expire()
+        missing = self.expected - running - len(self.pending)
+        if missing <= 0 or len(self.pending) >= self.max_concurrent:
+            return 0
+        if self.last_launch is not None and self.clock() - self.last_launch < self.stagger:
+            return 0
+        return 1
+
+    async def maintain(self, running: int) -> int:
+        """Start the next launch if instances are missing and the limits allow; returns the number started."""
+        if not self.launches_needed(running):
+            return 0
+        self.last_launch = self.clock()
+        try:
+            await self.launcher.launch()
+        except Exception as e:
+            self.failed += 1
+            logging.error(f"Launching an instance failed: {e}", exc_info=True)
+            return 0
+        self.launched += 1
+        self.pending.append(PendingLaunch(self.last_launch))
+        logging.info(f"Launching an instance ({running} running, {self.expected} expected, "
+                     f"{len(self.pending)} booting).")
+        return 1
+
+    def close(self) -> None:
+        close = getattr(self.launcher, 'close', None)
+        if close is not None:
+            close()
+
+    def stats(self) -> dict:
+        return {
+            'expected': self.expected,
+            'booting': len(self.pending),
+            'launched': self.launched,
+            'failed': self.failed,
+            'last_startup_seconds': self.startup_times[-1] if self.startup_times else None,
+        }
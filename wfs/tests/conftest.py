@@ -0,0 +1,16 @@
+import os
+import sys
+
+# The bot's modules import each other as top-level modules (``from scheduler import ...``), as when run from wfs/.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class FakeClock:
+    def __init__(self, now: float = 0.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
@@ -0,0 +1,115 @@
+import json
+import os
+import sys
+
+import pytest
+
+from config_manager import ConfigError, ConfigKeys, ConfigManager, coerce_value
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config.json')
+
+
+@pytest.fixture
+def config_file(tmp_path):
+    path = tmp_path / 'config.json'
+    with open(CONFIG_PATH, 'r') as file:
+        path.write_text(file.read())
+    return path
+
+
+def rewrite(path, **values):
+    config = json.loads(path.read_text())
+    config.update(values)
+    path.write_text(json.dumps(config))
+    # The watcher compares (mtime, size); make sure a rewrite within the same clock tick is still seen.
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+
+@pytest.mark.parametrize('key, text, expected', [
+    (ConfigKeys.WINDOWS_PER_BATCH, ' 3 ', 3),
+    (ConfigKeys.LOG_CONSOLE, 'off', False),
+    (ConfigKeys.VERIFY_GESTURE, 'Yes', True),
+    (ConfigKeys.PROBE_TIMEOUT, 2, 2.0),
+    (ConfigKeys.LAUNCH_COMMAND, '["roblox.exe", "--fast"]', ['roblox.exe', '--fast']),
+])
+def test_values_are_coerced_to_the_schema_type(key, text, expected):
+    value = coerce_value(key, text)
+    assert value == expected and type(value) is type(expected)
+
+
+@pytest.mark.parametrize('key, value', [
+    (ConfigKeys.WINDOWS_PER_BATCH, 'two'),
+    (ConfigKeys.WINDOWS_PER_BATCH, True),
+    (ConfigKeys.WINDOWS_PER_BATCH, 0),
+    (ConfigKeys.LOG_CONSOLE, 'maybe'),
+])
+def test_invalid_values_are_rejected(key, value):
+    with pytest.raises(ConfigError):
+        coerce_value(key, value)
+
+
+def test_overrides_beat_the_environment_which_beats_the_file(config_file, monkeypatch):
+    rewrite(config_file, reset_interval=800)
+    monkeypatch.setenv('RESET_INTERVAL', '700')
+    config = ConfigManager(config_file=str(config_file))
+    assert config.get(ConfigKeys.RESET_INTERVAL) == 700
+
+    config.apply_overrides(reset_interval=600)
+    assert config.get(ConfigKeys.RESET_INTERVAL) == 600
+    config.remove_overrides('reset_interval')
+    assert config.get(ConfigKeys.RESET_INTERVAL) == 700
+
+
+def test_reset_interval_must_be_below_the_kick_timeout(config_file):
+    config = ConfigManager(config_file=str(config_file))
+    with pytest.raises(ConfigError):
+        config.apply_overrides(reset_interval=1200)
+    assert config.get(ConfigKeys.RESET_INTERVAL) == 900
+    assert 'reset_interval' not in config.overrides
+
+
+def test_reload_publishes_only_the_changed_keys(config_file):
+    config = ConfigManager(config_file=str(config_file))
+    published = []
+    config.subscribe(lambda snapshot, changed_keys: published.append(changed_keys))
+    assert not config.check_for_changes()
+
+    rewrite(config_file, click_wait_time=3)
+    assert config.check_for_changes()
+    assert published == [{ConfigKeys.CLICK_WAIT_TIME}]
+    assert config.get(ConfigKeys.CLICK_WAIT_TIME) == 3
+
+
+def test_invalid_reload_keeps_the_current_configuration(config_file):
+    config = ConfigManager(config_file=str(config_file))
+    version = config.snapshot.version
+    rewrite(config_file, reset_interval=1500)
+    assert config.check_for_changes() is False
+    assert config.snapshot.version == version
+    assert config.get(ConfigKeys.RESET_INTERVAL) == 900
+
+
+def test_logging_is_rebuilt_when_its_settings_change(config_file, monkeypatch):
+    from afk_script import Logger
+
+    builds = []
+    monkeypatch.setattr(Logger, 'initialize_logging', lambda self: builds.append(self.config_manager.snapshot))
+    config = ConfigManager(config_file=str(config_file))
+    Logger(config)
+    config.apply_overrides(click_wait_time=2)
+    assert len(builds) == 1
+    config.apply_overrides(log_rate_limit=5, log_console=False)
+    assert len(builds) == 2
+    assert builds[-1].get(ConfigKeys.LOG_RATE_LIMIT) == 5
+
+
+def test_frozen_build_writes_to_the_user_data_dir(config_file, tmp_path, monkeypatch):
+    monkeypatch.setattr(sys, 'frozen', True, raising=False)
+    monkeypatch.setattr(sys, '_MEIPASS', str(tmp_path / 'bundle'), raising=False)
+    monkeypatch.setenv('LOCALAPPDATA', str(tmp_path / 'local'))
+    config = ConfigManager(config_file=str(config_file))
+    data_dir = str(tmp_path / 'local' / 'roblox_afk')
+    assert config.data_dir == data_dir and os.path.isdir(data_dir)
+    assert config.resolve_data_path('afk_state.sqlite3') == os.path.join(data_dir, 'afk_state.sqlite3')
+    assert config.get(ConfigKeys.LOG_FILE_PATH).startswith(data_dir)
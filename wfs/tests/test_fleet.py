@@ -0,0 +1,140 @@
+import asyncio
+import os
+from types import SimpleNamespace
+
+from config_manager import ConfigKeys, ConfigManager
+from fleet import FleetAgent, FleetCoordinator, assign_targets, estimate_capacity, split_proportionally
+
+from conftest import FakeClock
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config.json')
+
+
+def make_bot():
+    return SimpleNamespace(
+        config_manager=ConfigManager(config_file=CONFIG_PATH),
+        metrics=SimpleNamespace(phases={'input': SimpleNamespace(sum=10.0, count=10)}),
+        active_windows=[1, 2, 3],
+        supervisor=SimpleNamespace(expected=0, pending=[]),
+        health=SimpleNamespace(quarantined=lambda: 0),
+        scheduler=SimpleNamespace(worst_case_slack=lambda: 300.0, reset_interval=900),
+        throughput=0.0,
+        governor=None,
+        shutdown_flag=False,
+    )
+
+
+def test_capacity_is_bounded_by_input_time_and_pressure():
+    report = {'instances': 10, 'service_seconds': 1.0, 'reset_interval': 100,
+              'cpu_percent': 45, 'cpu_pressure': 90, 'memory_percent': 10, 'memory_pressure': 99}
+    assert estimate_capacity(report, target_utilisation=0.5) == 20
+    report['service_seconds'] = 10.0
+    assert estimate_capacity(report, target_utilisation=0.5) == 5
+
+
+def test_host_missing_deadlines_gets_no_more_instances():
+    report = {'instances': 4, 'service_seconds': 1.0, 'reset_interval': 900, 'slack': -5}
+    assert estimate_capacity(report) == 4
+
+
+def test_split_proportionally_hands_out_every_instance():
+    shares = split_proportionally(7, {'a': 1, 'b': 1, 'c': 1})
+    assert sum(shares.values()) == 7
+    assert max(shares.values()) - min(shares.values()) <= 1
+
+
+def test_assign_targets_keeps_current_placement():
+    capacities = {'a': 10, 'b': 10}
+    assert assign_targets(capacities) == capacities
+    assert assign_targets(capacities, fleet_target=12, current={'a': 8, 'b': 2}) == {'a': 8, 'b': 4}
+    assert assign_targets(capacities, fleet_target=6, current={'a': 8, 'b': 4}) == {'a': 4, 'b': 2}
+
+
+def test_agent_refuses_keys_outside_the_allow_list():
+    bot = make_bot()
+    agent = FleetAgent(bot, '127.0.0.1:1')
+    agent.apply_config(1, {'reset_interval': 600, 'launch_command': ['calc.exe'],
+                           'log_file_path': '/tmp/evil.log', 'profile_dir': '/etc', 'no_such_key': 1})
+    config = bot.config_manager
+    assert config.get(ConfigKeys.RESET_INTERVAL) == 600
+    assert config.get(ConfigKeys.LAUNCH_COMMAND) == []
+    assert config.get(ConfigKeys.PROFILE_DIR) == 'profiles'
+    assert os.path.basename(config.get(ConfigKeys.LOG_FILE_PATH)) == 'afk_script.log'
+    assert agent.config_version == 1
+
+
+def test_agent_drops_overrides_removed_from_the_fleet_config():
+    bot = make_bot()
+    agent = FleetAgent(bot, '127.0.0.1:1')
+    agent.apply_config(1, {'reset_interval': 600, 'safety_margin': 60})
+    agent.apply_config(2, {'safety_margin': 90})
+    config = bot.config_manager
+    assert config.get(ConfigKeys.RESET_INTERVAL) == 900
+    assert config.get(ConfigKeys.SAFETY_MARGIN) == 90
+    agent.apply_config(3, {})
+    assert config.get(ConfigKeys.SAFETY_MARGIN) == 120
+
+
+def test_agent_ignores_invalid_values():
+    bot = make_bot()
+    agent = FleetAgent(bot, '127.0.0.1:1')
+    agent.apply_config(1, {'reset_interval': 'soon', 'windows_per_batch': 2})
+    assert bot.config_manager.get(ConfigKeys.RESET_INTERVAL) == 900
+    assert bot.config_manager.get(ConfigKeys.WINDOWS_PER_BATCH) == 2
+
+
+def test_agent_ignores_a_config_that_fails_validation():
+    bot = make_bot()
+    agent = FleetAgent(bot, '127.0.0.1:1')
+    agent.apply_config(1, {'safety_margin': 60})
+    agent.apply_config(2, {'safety_margin': 90, 'reset_interval': 1500})
+    config = bot.config_manager
+    assert config.get(ConfigKeys.RESET_INTERVAL) == 900
+    assert config.get(ConfigKeys.SAFETY_MARGIN) == 60
+    assert agent.config_version == 1
+
+
+def test_coordinator_pushes_config_once_and_holds_targets_during_warmup():
+    clock = FakeClock()
+    coordinator = FleetCoordinator(port=0, warmup=30, clock=clock)
+    coordinator.config_values, coordinator.config_version = {'reset_interval': 600}, 1
+    agent = SimpleNamespace(name='a', report={}, last_seen=0.0, capacity=0, target=0)
+    coordinator.agents['a'] = agent
+    report = {'agent': 'a', 'instances': 3, 'service_seconds': 1.0, 'reset_interval': 900, 'config_version': None}
+
+    messages = coordinator.on_report(agent, report)
+    assert [message['type'] for message in messages] == ['config', 'target']
+    assert messages[-1]['instances'] == 3
+
+    clock.advance(31)
+    messages = coordinator.on_report(agent, dict(report, config_version=1))
+    assert [message['type'] for message in messages] == ['target']
+    assert messages[-1]['instances'] == estimate_capacity(report)
+
+
+def test_agent_and_coordinator_round_trip():
+    async def scenario():
+        coordinator = FleetCoordinator(port=0, fleet_target=2, enforce=True, warmup=0)
+        coordinator.config_values = {'safety_margin': 60, 'launch_command': ['calc.exe']}
+        coordinator.config_version = 1
+        await coordinator.start()
+        bot = make_bot()
+        agent = FleetAgent(bot, f"127.0.0.1:{coordinator.port}", name='host-1', interval=0.05, reconnect_delay=0.05)
+        task = asyncio.create_task(agent.run())
+        try:
+            for _ in range(100):
+                if agent.config_version == 1 and agent.target is not None:
+                    break
+                await asyncio.sleep(0.02)
+        finally:
+            bot.shutdown_flag = True
+            await asyncio.wait_for(task, timeout=5)
+            await coordinator.stop()
+        return bot, agent, coordinator
+
+    bot, agent, coordinator = asyncio.run(scenario())
+    assert agent.config_version == 1
+    assert agent.target == 2
+    assert bot.config_manager.get(ConfigKeys.SAFETY_MARGIN) == 60
+    assert bot.config_manager.get(ConfigKeys.LAUNCH_COMMAND) == []
+    assert bot.config_manager.get(ConfigKeys.EXPECTED_INSTANCES) == 2
@@ -0,0 +1,26 @@
+import random
+
+import pytest
+
+from backends import Rect
+from free_space import FreeSpaceIndex, NoFreeSpaceError
+
+
+def test_excluding_a_layout_slot_reuses_the_index():
+    slot = Rect(0, 0, 816, 638)
+    index = FreeSpaceIndex([Rect(0, 0, 1920, 1040)], [slot])
+    assert index.excluding(slot) is index
+    assert index.excluding(Rect(10, 10, 800, 600)) is index
+
+
+def test_excluding_an_unknown_rect_removes_it_from_the_samples():
+    index = FreeSpaceIndex([Rect(0, 0, 100, 100)], rng=random.Random(1))
+    narrowed = index.excluding(Rect(0, 0, 100, 90))
+    assert narrowed is not index
+    assert all(narrowed.sample()[1] >= 90 for _ in range(100))
+
+
+def test_sample_fails_when_everything_is_covered():
+    index = FreeSpaceIndex([Rect(0, 0, 100, 100)], [Rect(0, 0, 100, 100)])
+    with pytest.raises(NoFreeSpaceError):
+        index.sample()
@@ -0,0 +1,34 @@
+import random
+
+import pytest
+
+from gestures import DEFAULT_GESTURE, GestureError, compile_gesture, validate_gesture
+
+
+def test_default_gesture_keeps_the_original_timing():
+    events = compile_gesture(DEFAULT_GESTURE, 100, 200, rng=random.Random(0))
+    assert [event.kind for event in events] == ['move', 'down'] + ['move'] * 5 + ['up', 'down', 'up']
+    assert events[0][:3] == ('move', 248, 587)
+    assert events[1].delay == 1
+    assert [event.delay for event in events[2:7]] == [0.1] * 5
+    assert all(event.pressed for event in events[2:7])
+    assert events[8].delay == 1
+
+
+@pytest.mark.parametrize('step', [
+    {'action': 'jitter', 'count': 'five'},
+    {'action': 'jitter', 'count': 2.5},
+    {'action': 'jitter', 'radius': True},
+    {'action': 'jitter', 'interval': None},
+    {'action': 'jitter', 'interval': -0.1},
+    {'action': 'move', 'x': 1},
+    {'action': 'wait', 'seconds': '1'},
+    {'action': 'drag'},
+])
+def test_invalid_steps_are_rejected(step):
+    with pytest.raises(GestureError):
+        validate_gesture([step])
+
+
+def test_jitter_fields_are_optional():
+    assert validate_gesture([{'action': 'jitter'}, {'action': 'jitter', 'interval': 0.05}])
@@ -0,0 +1,51 @@
+import asyncio
+import logging
+import os
+from types import SimpleNamespace
+
+from blocking_calls import InlineRunner
+from config_manager import ConfigManager
+from governor import ProcessGovernor
+from simulated_backend import SimulatedBackend
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config.json')
+
+
+def make_governor(windows=2):
+    backend = SimulatedBackend(window_count=windows, seed=1)
+    governor = ProcessGovernor(backend, cpu_pressure=80, memory_pressure=90, cpus=[0, 1])
+    governor.sync({handle: window.pid for handle, window in backend.windows.items()})
+    return backend, governor
+
+
+def test_system_usage_comes_from_the_backend():
+    backend, governor = make_governor()
+    backend.system_cpu_percent = 90.0
+    governor.sample()
+    assert governor.system_cpu == 90.0
+    assert governor.under_pressure()
+    assert governor.throttle_delay() == governor.max_delay * 0.5
+
+
+def test_idle_policy_is_undone_by_restore():
+    backend, governor = make_governor()
+    handle = next(iter(backend.windows))
+    window = backend.windows[handle]
+    governor.make_idle(handle)
+    assert window.low_priority and window.affinity == [0]
+    governor.restore(handle)
+    assert not window.low_priority and window.affinity is None
+
+
+def test_usage_is_still_logged_with_the_governor_disabled(caplog):
+    from afk_script import RobloxAFKBot
+
+    backend = SimulatedBackend(window_count=1, seed=1)
+    config_manager = ConfigManager(config_file=CONFIG_PATH)
+    bot = SimpleNamespace(runner=InlineRunner(), backend=backend, config_manager=config_manager)
+    with caplog.at_level(logging.INFO):
+        assert asyncio.run(RobloxAFKBot.log_system_usage(bot)) == 1800
+        backend.system_cpu_percent = 95.0
+        assert asyncio.run(RobloxAFKBot.log_system_usage(bot)) == 30
+    assert "CPU usage: 95.0%" in caplog.text
+    assert backend.call_counts['system_usage'] == 2
@@ -0,0 +1,36 @@
+import asyncio
+import os
+
+from afk_script import Logger, RobloxAFKBot
+from blocking_calls import InlineRunner
+from config_manager import ConfigManager
+from simulated_backend import SimulatedBackend
+
+from conftest import FakeClock
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config.json')
+
+
+def make_bot(monkeypatch):
+    monkeypatch.setattr(Logger, 'initialize_logging', lambda self: None)
+    clock = FakeClock(1000.0)
+    backend = SimulatedBackend(window_count=1, seed=1, clock=clock, sleep=clock.advance)
+    config_manager = ConfigManager(config_file=CONFIG_PATH)
+    config_manager.apply_overrides(state_store_path='', metrics_snapshot_path='', profile_control_file='')
+    bot = RobloxAFKBot(config_manager, backend=backend, runner=InlineRunner(), clock=clock)
+    return backend, bot, clock
+
+
+def test_hung_window_is_quarantined_without_being_messaged(monkeypatch):
+    backend, bot, clock = make_bot(monkeypatch)
+    handle = next(iter(backend.windows))
+    backend.windows[handle].hung = True
+    start = clock()
+
+    for _ in range(bot.health.failure_threshold):
+        assert not asyncio.run(bot.process_window(handle))
+
+    assert bot.health.is_quarantined(handle)
+    # Only the bounded probes took time; nothing waited for the frozen client to answer a message.
+    assert clock() - start == bot.health.failure_threshold * bot.health.probe_timeout
+    assert backend.call_counts_by_handle[handle]['get_window_text'] == 0
@@ -0,0 +1,39 @@
+import json
+import logging
+import queue
+import sys
+
+from log_pipeline import JsonFormatter, RateLimitFilter, StructuredQueueHandler
+
+
+def make_record(msg, handle=None):
+    record = logging.LogRecord('test', logging.INFO, __file__, 1, msg, None, None)
+    if handle is not None:
+        record.handle = handle
+    return record
+
+
+def test_rate_limit_counts_each_window_separately():
+    limiter = RateLimitFilter(burst=2)
+    assert all(limiter.filter(make_record(f"Retry {attempt} for window 1", handle=1)) for attempt in range(2))
+    assert not limiter.filter(make_record("Retry 3 for window 1", handle=1))
+    assert limiter.filter(make_record("Retry 1 for window 2", handle=2))
+
+
+def test_rate_limit_normalises_numbers_in_the_text():
+    limiter = RateLimitFilter(burst=1)
+    assert limiter.filter(make_record("Gesture took 12 ms."))
+    assert not limiter.filter(make_record("Gesture took 340 ms."))
+
+
+def test_queued_record_keeps_the_traceback_for_the_json_formatter():
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        record = logging.LogRecord('test', logging.ERROR, __file__, 1, "Failed %s", ('window',), sys.exc_info())
+    handler = StructuredQueueHandler(queue.SimpleQueue())
+    prepared = handler.prepare(record)
+    entry = json.loads(JsonFormatter().format(prepared))
+    assert entry['msg'] == "Failed window"
+    assert 'ValueError: boom' in entry['exc']
+    assert 'Traceback' not in entry['msg']
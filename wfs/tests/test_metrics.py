@@ -0,0 +1,38 @@
+import asyncio
+import logging
+
+from metrics import MetricsRegistry, MetricsServer
+
+
+async def scrape(server: MetricsServer, path: str) -> bytes:
+    port = server.server.sockets[0].getsockname()[1]
+    reader, writer = await asyncio.open_connection(server.host, port)
+    writer.write(f"GET {path} HTTP/1.1\r\n\r\n".encode('latin-1'))
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    return response
+
+
+def test_failed_scrape_is_logged_and_the_server_keeps_serving(caplog):
+    calls = []
+
+    def refresh():
+        calls.append(None)
+        if len(calls) == 1:
+            raise RuntimeError("gauge callback broke")
+
+    async def run():
+        server = MetricsServer(MetricsRegistry(), port=0, refresh=refresh)
+        await server.start()
+        try:
+            return await scrape(server, '/metrics'), await scrape(server, '/metrics')
+        finally:
+            await server.stop()
+
+    with caplog.at_level(logging.ERROR):
+        failed, served = asyncio.run(run())
+    assert failed == b''
+    assert served.startswith(b'HTTP/1.1 200 OK')
+    assert [record.getMessage() for record in caplog.records if record.name == 'root'] == \
+        ["Metrics request failed: gauge callback broke"]
@@ -0,0 +1,45 @@
+import asyncio
+import os
+
+from profiler import CycleProfiler
+
+
+async def serve(profiler, windows, handle):
+    async with profiler.cycle(lambda: windows):
+        await asyncio.sleep(0)
+        profiler.served(handle)
+
+
+def test_a_cycle_ends_once_every_window_was_served(tmp_path):
+    async def scenario():
+        profiler = CycleProfiler(str(tmp_path))
+        profiler.request(2, 'test')
+        windows = [1, 2]
+        await serve(profiler, windows, 1)
+        assert profiler.active and profiler.cycle_number == 0
+        await serve(profiler, windows, 2)
+        assert profiler.cycle_number == 1
+        await serve(profiler, windows, 2)
+        windows.remove(1)  # a window that closes does not hold the cycle open
+        await serve(profiler, windows, 2)
+        return profiler
+
+    profiler = asyncio.run(scenario())
+    assert not profiler.active
+    assert profiler.cycle_number == 2
+    assert any(name.endswith('.collapsed') for name in os.listdir(tmp_path))
+
+
+def test_close_writes_a_running_capture(tmp_path):
+    async def scenario():
+        profiler = CycleProfiler(str(tmp_path))
+        profiler.request(5, 'test')
+        await serve(profiler, [1, 2], 1)
+        await profiler.close()
+        return profiler
+
+    profiler = asyncio.run(scenario())
+    assert not profiler.active
+    names = os.listdir(tmp_path)
+    assert any(name.endswith('.collapsed') for name in names)
+    assert any(name.endswith('-lag.jsonl') for name in names)
@@ -0,0 +1,125 @@
+import pytest
+from conftest import FakeClock
+from scheduler import DeadlineScheduler
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def make_scheduler(clock, **kwargs):
+    options = dict(kick_timeout=1200, reset_interval=900, safety_margin=120, min_reset_age=60, retry_delay=30)
+    options.update(kwargs)
+    return DeadlineScheduler(clock=clock, **options)
+
+
+def test_windows_are_dispatched_earliest_deadline_first(clock):
+    scheduler = make_scheduler(clock)
+    scheduler.add_window(1, last_reset=-100)
+    scheduler.add_window(2, last_reset=-300)
+    scheduler.add_window(3, last_reset=-200)
+    clock.now = 1000
+    assert scheduler.pop_due(limit=3) == [2, 3, 1]
+
+
+def test_unknown_window_is_due_within_the_safety_margin(clock):
+    scheduler = make_scheduler(clock)
+    scheduler.add_window(1)
+    assert scheduler.deadlines[1] == 120
+    assert scheduler.pop_due() == [1]
+
+
+def test_dispatches_are_paced_over_the_reset_interval(clock):
+    scheduler = make_scheduler(clock)
+    for handle in range(3):
+        scheduler.add_window(handle, last_reset=0)
+    clock.now = 60
+    assert scheduler.pop_due() == [0]
+    assert scheduler.pop_due() == []
+    assert scheduler.time_until_next_dispatch() == pytest.approx(300)
+    clock.advance(300)
+    assert scheduler.pop_due() == [1]
+
+
+def test_window_near_its_deadline_skips_pacing(clock):
+    scheduler = make_scheduler(clock)
+    scheduler.add_window(1, last_reset=0)
+    scheduler.add_window(2, last_reset=0)
+    clock.now = 60
+    assert scheduler.pop_due() == [1]
+    clock.now = 1100
+    assert scheduler.pop_due() == [2]
+
+
+def test_in_flight_window_is_not_dispatched_twice(clock):
+    scheduler = make_scheduler(clock)
+    scheduler.add_window(1)
+    assert scheduler.pop_due() == [1]
+    assert scheduler.pop_due() == []
+    assert scheduler.next_dispatch_time() is None
+
+
+def test_success_moves_the_deadline(clock):
+    scheduler = make_scheduler(clock)
+    scheduler.add_window(1)
+    scheduler.pop_due()
+    clock.now = 10
+    scheduler.record_success(1)
+    assert scheduler.deadlines[1] == 1210
+    assert scheduler.last_reset[1] == 10
+
+
+def test_failed_window_waits_for_its_retry_time(clock):
+    scheduler = make_scheduler(clock)
+    scheduler.add_window(1, last_reset=-1150)
+    assert scheduler.pop_due() == [1]
+    scheduler.record_failure(1)
+    assert scheduler.pop_due() == []
+    assert scheduler.time_until_next_dispatch() == pytest.approx(30)
+    clock.advance(30)
+    assert scheduler.pop_due() == [1]
+
+
+def test_passed_retry_time_does_not_make_the_window_due_early(clock):
+    # Regression: an expired retry time stayed a dispatch candidate, so main_loop got a sleep of 0 while pop_due
+    # returned nothing and spun until the window's ready time.
+    scheduler = make_scheduler(clock)
+    scheduler.add_window(1, last_reset=0)
+    clock.now = 900
+    assert scheduler.pop_due() == [1]
+    scheduler.record_failure(1, retry_at=930)
+    clock.now = 931
+    assert scheduler.pop_due() == []
+    assert scheduler.time_until_next_dispatch() == pytest.approx(1080 - 931)
+    assert 1 not in scheduler.retry_at
+    clock.now = 1080
+    assert scheduler.pop_due() == [1]
+
+
+def test_removed_window_is_never_dispatched(clock):
+    scheduler = make_scheduler(clock)
+    scheduler.add_window(1)
+    scheduler.add_window(2)
+    scheduler.remove_window(1)
+    assert scheduler.pop_due(limit=2) == [2]
+    assert 1 not in scheduler
+
+
+def test_sync_windows_adds_and_removes(clock):
+    scheduler = make_scheduler(clock)
+    scheduler.sync_windows([1, 2])
+    added, removed = scheduler.sync_windows([2, 3])
+    assert added == [3]
+    assert removed == [1]
+    assert sorted(scheduler.deadlines) == [2, 3]
+
+
+def test_rotation_ends_after_one_dispatch_per_window(clock):
+    scheduler = make_scheduler(clock)
+    scheduler.sync_windows([1, 2, 3])
+    assert len(scheduler.pop_due(limit=2)) == 2
+    assert not scheduler.end_of_rotation()
+    assert len(scheduler.pop_due(limit=3)) == 1
+    assert scheduler.end_of_rotation()
+    assert not scheduler.end_of_rotation()
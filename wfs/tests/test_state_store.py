@@ -0,0 +1,37 @@
+from state_store import WindowStateStore
+
+from conftest import FakeClock
+
+
+def test_state_survives_a_restart(tmp_path):
+    clock = FakeClock(1000.0)
+    store = WindowStateStore(str(tmp_path / 'state.sqlite3'), wall_clock=clock)
+    store.record_success(10, 1, {'restore': 0.4})
+    store.close()
+
+    clock.advance(60)
+    reopened = WindowStateStore(str(tmp_path / 'state.sqlite3'), wall_clock=clock)
+    assert reopened.seconds_since_reset(10, 1) == 60
+    assert reopened.get(10, 1).timings == {'restore': 0.4}
+    reopened.close()
+
+
+def test_retain_keeps_missing_windows_for_the_grace_period(tmp_path):
+    clock = FakeClock(1000.0)
+    store = WindowStateStore(str(tmp_path / 'state.sqlite3'), wall_clock=clock)
+    store.record_success(10, 1)
+    store.record_success(20, 2)
+
+    store.retain([(10, 1)], grace=300)
+    assert store.get(20, 2) is not None
+    clock.advance(200)
+    store.retain([(10, 1), (20, 2)], grace=300)
+    clock.advance(200)
+    store.retain([(10, 1)], grace=300)
+    assert store.get(20, 2) is not None
+
+    clock.advance(300)
+    store.retain([(10, 1)], grace=300)
+    assert store.get(20, 2) is None
+    assert store.get(10, 1) is not None
+    store.close()
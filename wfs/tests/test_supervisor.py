@@ -0,0 +1,102 @@
+import asyncio
+import sys
+
+from supervisor import CommandLauncher, InstanceSupervisor
+
+from conftest import FakeClock
+
+
+class FakeLauncher:
+    def __init__(self, fail: bool = False):
+        self.launches = 0
+        self.fail = fail
+        self.closed = False
+
+    async def launch(self) -> None:
+        if self.fail:
+            raise OSError("no such program")
+        self.launches += 1
+
+    def close(self) -> None:
+        self.closed = True
+
+
+def maintain(supervisor, running):
+    return asyncio.run(supervisor.maintain(running))
+
+
+def test_launches_are_staggered():
+    clock = FakeClock()
+    launcher = FakeLauncher()
+    supervisor = InstanceSupervisor(launcher, expected=3, max_concurrent=3, stagger=30, clock=clock)
+    assert maintain(supervisor, 0) == 1
+    assert maintain(supervisor, 0) == 0
+    clock.advance(29)
+    assert maintain(supervisor, 0) == 0
+    clock.advance(1)
+    assert maintain(supervisor, 0) == 1
+    assert launcher.launches == 2
+
+
+def test_booting_launches_are_bounded():
+    clock = FakeClock()
+    supervisor = InstanceSupervisor(FakeLauncher(), expected=5, max_concurrent=2, stagger=0, clock=clock)
+    assert maintain(supervisor, 0) == 1
+    assert maintain(supervisor, 0) == 1
+    assert maintain(supervisor, 0) == 0
+    assert len(supervisor.pending) == 2
+
+    clock.advance(40)
+    assert supervisor.claim([101]) == [(101, 40)]
+    assert maintain(supervisor, 1) == 1
+
+
+def test_booting_launches_count_towards_expected():
+    supervisor = InstanceSupervisor(FakeLauncher(), expected=2, max_concurrent=5, stagger=0, clock=FakeClock())
+    assert maintain(supervisor, 1) == 1
+    assert maintain(supervisor, 1) == 0
+    assert maintain(supervisor, 2) == 0
+
+
+def test_launch_without_window_expires():
+    clock = FakeClock()
+    supervisor = InstanceSupervisor(FakeLauncher(), expected=1, max_concurrent=1, stagger=0, startup_timeout=300,
+                                    clock=clock)
+    assert maintain(supervisor, 0) == 1
+    clock.advance(301)
+    assert maintain(supervisor, 0) == 1
+    assert supervisor.failed == 1
+
+
+def test_failed_launch_is_counted_and_retried_after_the_stagger():
+    clock = FakeClock()
+    supervisor = InstanceSupervisor(FakeLauncher(fail=True), expected=1, stagger=30, clock=clock)
+    assert maintain(supervisor, 0) == 0
+    assert supervisor.failed == 1 and not supervisor.pending
+    assert maintain(supervisor, 0) == 0
+    supervisor.launcher.fail = False
+    clock.advance(30)
+    assert maintain(supervisor, 0) == 1
+
+
+def test_close_reaches_the_launcher():
+    supervisor = InstanceSupervisor(FakeLauncher())
+    supervisor.close()
+    assert supervisor.launcher.closed
+
+
+def test_command_launcher_holds_reapers_until_the_process_exits():
+    async def scenario():
+        launcher = CommandLauncher([sys.executable, '-c', 'import time; time.sleep(0.2)'])
+        await launcher.launch()
+        await launcher.launch()
+        assert len(launcher.reapers) == 2
+        await asyncio.wait(set(launcher.reapers))
+        finished = len(launcher.reapers)
+        await launcher.launch()
+        reapers = set(launcher.reapers)
+        launcher.close()
+        await asyncio.gather(*reapers, return_exceptions=True)
+        return finished, len(launcher.reapers), all(reaper.cancelled() for reaper in reapers)
+
+    assert asyncio.run(scenario()) == (0, 0, True)
@@ -0,0 +1,53 @@
+import asyncio
+import os
+
+import pytest
+
+from blocking_calls import InlineRunner
+from config_manager import ConfigManager
+from simulated_backend import SimulatedBackend
+
+pytest.importorskip('numpy')
+from verification import GestureVerifier  # noqa: E402
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config.json')
+
+
+def make_backend(window_count=2):
+    backend = SimulatedBackend(window_count=window_count, seed=1)
+    return backend, list(backend.windows)
+
+
+def test_minimized_window_has_nothing_to_capture():
+    backend, (handle, _) = make_backend()
+    assert backend.windows[handle].iconic
+    assert backend.client_size(handle) == (0, 0)
+    assert not GestureVerifier(backend).capture_before(handle)
+
+
+def test_gestures_in_flight_keep_their_own_before_frames():
+    backend, handles = make_backend()
+    for handle in handles:
+        backend.windows[handle].iconic = False
+    verifier = GestureVerifier(backend)
+    first, second = handles
+    assert verifier.capture_before(first)
+    assert verifier.capture_before(second)
+    backend.windows[first].clicks += 1
+    assert verifier.verify(first).ok
+    assert not verifier.verify(second).ok
+    # Both frames went back to the pool and are reused by the next gestures.
+    assert verifier.capture_before(first) and verifier.capture_before(second)
+    assert not verifier.spare_frames[backend.client_size(first)]
+
+
+def test_minimized_window_is_served_in_the_foreground_without_being_rejected():
+    from afk_script import MouseActionHandler
+
+    backend, (handle, _) = make_backend()
+    handler = MouseActionHandler(ConfigManager(config_file=CONFIG_PATH), backend, InlineRunner())
+    handler.input_mode = 'background'
+    handler.verifier = GestureVerifier(backend)
+    assert not asyncio.run(handler.background_keep_alive(handle))
+    assert backend.windows[handle].clicks == 0
+    assert handler.uses_background_input(handle)
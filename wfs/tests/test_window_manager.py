@@ -0,0 +1,41 @@
+import asyncio
+import logging
+import os
+
+from afk_script import RobloxWindowManager
+from blocking_calls import InlineRunner
+from config_manager import ConfigManager
+from simulated_backend import SimulatedBackend
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config.json')
+
+
+def make_manager(window_count=2):
+    backend = SimulatedBackend(window_count=window_count, seed=1)
+    manager = RobloxWindowManager(ConfigManager(config_file=CONFIG_PATH), backend, InlineRunner())
+    return backend, manager, list(backend.windows)
+
+
+def test_preparing_a_window_leaves_the_input_window_in_front():
+    backend, manager, (served, prepared) = make_manager()
+    asyncio.run(manager.ensure_window_active(served))
+    assert backend.get_foreground_window() == served
+
+    backend.windows[prepared].maximized = True
+    asyncio.run(manager.restore_and_resize_window(prepared, 100, 50))
+    window = backend.windows[prepared]
+    assert not window.iconic and not window.maximized
+    assert (window.rect.left, window.rect.top) == (100, 50)
+    assert backend.get_foreground_window() == served
+
+
+def test_per_window_log_lines_carry_their_handle(caplog):
+    backend, manager, handles = make_manager()
+    with caplog.at_level(logging.INFO):
+        asyncio.run(manager.restore_and_resize_window(handles[0], 0, 0))
+        backend.failure_rates['set_window_pos'] = 1.0
+        asyncio.run(manager.restore_and_resize_window(handles[1], 900, 0))
+    records = [record for record in caplog.records if 'handle' in record.getMessage()]
+    assert {record.handle for record in records} == set(handles)
+    assert all(str(record.handle) in record.getMessage() for record in records)
+    assert any(record.levelno == logging.ERROR and record.handle == handles[1] for record in records)
@@ -0,0 +1,87 @@
+from simulated_backend import SimulatedBackend
+from window_registry import EVENT_CREATE, EVENT_DESTROY, EVENT_RENAME, WindowEventSource, WindowRegistry
+
+from conftest import FakeClock
+
+
+def make_registry(window_count=2, event_source=None):
+    backend = SimulatedBackend(window_count=window_count, seed=1)
+    source = event_source if event_source is not None else WindowEventSource()
+    registry = WindowRegistry(backend, source, poll_interval=60, clock=FakeClock())
+    return backend, source, registry
+
+
+def test_first_update_enumerates_the_open_windows():
+    backend, source, registry = make_registry()
+    added, removed = registry.update()
+    assert sorted(added) == sorted(backend.windows)
+    assert removed == []
+
+
+def test_create_and_destroy_events_add_and_remove_windows():
+    backend, source, registry = make_registry()
+    registry.update()
+    backend.reset_counters()
+
+    handle = backend.spawn_window()
+    source.post(EVENT_CREATE, handle)
+    assert registry.update() == ([handle], [])
+
+    backend.close_window(handle)
+    source.post(EVENT_DESTROY, handle)
+    assert registry.update() == ([], [handle])
+    assert handle not in registry.handles()
+    assert backend.call_counts['find_windows'] == 0
+
+
+def test_create_event_for_another_window_is_ignored():
+    backend, source, registry = make_registry()
+    registry.update()
+    other = backend.spawn_window(title="Notepad")
+    source.post(EVENT_CREATE, other)
+    assert registry.update() == ([], [])
+
+
+def test_name_change_refilters_by_title():
+    backend, source, registry = make_registry()
+    registry.update()
+    handle = registry.handles()[0]
+
+    backend.windows[handle].title = "Roblox - Disconnected"
+    source.post(EVENT_RENAME, handle)
+    assert registry.update() == ([], [handle])
+
+    backend.windows[handle].title = "Roblox"
+    source.post(EVENT_RENAME, handle)
+    assert registry.update() == ([handle], [])
+
+
+def test_duplicate_events_are_reported_once():
+    backend, source, registry = make_registry(window_count=0)
+    registry.update()
+    handle = backend.spawn_window()
+    source.post(EVENT_CREATE, handle)
+    source.post(EVENT_RENAME, handle)
+    assert registry.update() == ([handle], [])
+
+
+class BrokenEventSource(WindowEventSource):
+    def start(self) -> None:
+        raise OSError("SetWinEventHook failed")
+
+
+def test_polls_on_every_update_when_the_hook_cannot_be_installed():
+    backend, source, registry = make_registry(event_source=BrokenEventSource())
+    assert registry.event_source is None
+    registry.update()
+    handle = backend.spawn_window()
+    assert registry.update() == ([handle], [])
+
+
+def test_falls_back_to_polling_when_the_source_fails():
+    backend, source, registry = make_registry()
+    registry.update()
+    source.failed = True
+    handle = backend.spawn_window()
+    assert registry.update() == ([handle], [])
+    assert registry.event_source is None
@@ -0,0 +1,134 @@
+import logging
+import threading
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from backends import DesktopBackend
+
+try:
+    import numpy as np
+except ImportError:  # verification is optional; the bot runs without it
+    np = None
+
+
+class VerificationResult(NamedTuple):
+    ok: bool
+    changed_fraction: float
+    disconnected: bool = False
+
+
+class GestureVerifier:
+    """Checks from two captures of the client area that the keep-alive gesture visibly reached the window.
+
+    Each window being verified holds its own frame from before the gesture, taken from a pool of frames kept per
+    client size, so gestures on several windows can be in flight at once. The frame after the gesture and the
+    scratch arrays of the comparison are allocated once per client size and shared, so only the capture after the
+    gesture and the comparison itself are serialised. A minimized window has no client area and presents no frames,
+    so ``capture_before`` returns False for it and the gesture cannot be verified. The gesture counts as delivered when more than ``min_changed_fraction`` of the pixels differ by more
+    than ``tolerance`` in any channel. If a template of the disconnect dialog is given (a BGRA ``.npy`` array), the
+    centre of the frame after the gesture is compared against it as well.
+    """
+
+    def __init__(self, backend: DesktopBackend, min_changed_fraction: float = 0.01, tolerance: int = 16,
+                 template_path: str = '', template_threshold: float = 12.0):
+        if np is None:
+            raise RuntimeError("Gesture verification needs NumPy, which is not installed.")
+        self.backend = backend
+        self.min_changed_fraction = min_changed_fraction
+        self.tolerance = tolerance
+        self.template_threshold = template_threshold
+        self.template = np.load(template_path).astype(np.uint8) if template_path else None
+        self.buffers: Dict[Tuple[int, int], dict] = {}
+        self.spare_frames: Dict[Tuple[int, int], List] = {}
+        self.before: Dict[int, Tuple[Tuple[int, int], object]] = {}
+        self.lock = threading.Lock()
+
+    def _buffers(self, size: Tuple[int, int]) -> dict:
+        buffers = self.buffers.get(size)
+        if buffers is None:
+            width, height = size
+            shape = (height, width, 4)
+            buffers = self.buffers[size] = {
+                'after': np.zeros(shape, np.uint8),
+                'high': np.zeros(shape, np.uint8),
+                'low': np.zeros(shape, np.uint8),
+                'mask': np.zeros(shape, np.bool_),
+                'pixels': np.zeros(shape[:2], np.bool_),
+            }
+            if self.template is not None:
+                buffers['template_diff'] = np.zeros(self.template.shape, np.int16)
+        return buffers
+
+    def _release(self, handle: int) -> None:
+        held = self.before.pop(handle, None)
+        if held is not None:
+            size, frame = held
+            self.spare_frames.setdefault(size, []).append(frame)
+
+    def capture_before(self, handle: int) -> bool:
+        """Capture the frame before the gesture; False when the window has no client area to capture."""
+        size = self.backend.client_size(handle)
+        with self.lock:
+            self._release(handle)
+            if not size[0] or not size[1]:
+                return False
+            spare = self.spare_frames.get(size)
+            frame = spare.pop() if spare else np.zeros((size[1], size[0], 4), np.uint8)
+            self.before[handle] = (size, frame)
+        self.backend.capture_client(handle, frame)
+        return True
+
+    def verify(self, handle: int) -> VerificationResult:
+        """Capture the frame after the gesture and compare it with the one from ``capture_before``."""
+        with self.lock:
+            try:
+                return self._compare(handle)
+            finally:
+                self._release(handle)
+
+    def _compare(self, handle: int) -> VerificationResult:
+        size, before = self.before.get(handle, (None, None))
+        if size is None or self.backend.client_size(handle) != size:
+            # The window was resized between the captures; nothing to compare, so do not force a retry.
+            logging.info(f"Window {handle} changed size during verification; skipping the check.")
+            return VerificationResult(True, 0.0)
+        buffers = self._buffers(size)
+        after = buffers['after']
+        self.backend.capture_client(handle, after)
+
+        if self._matches_template(after, buffers):
+            return VerificationResult(False, 0.0, disconnected=True)
+
+        high, low, mask, pixels = buffers['high'], buffers['low'], buffers['mask'], buffers['pixels']
+        np.maximum(before, after, out=high)
+        np.minimum(before, after, out=low)
+        np.subtract(high, low, out=high)
+        np.greater(high, self.tolerance, out=mask)
+        # A pixel changed if any of its channels did; the alpha channel is always opaque.
+        np.any(mask[:, :, :3], axis=2, out=pixels)
+        changed = float(np.count_nonzero(pixels)) / (size[0] * size[1] or 1)
+        return VerificationResult(changed >= self.min_changed_fraction, changed)
+
+    def _matches_template(self, frame, buffers) -> bool:
+        if self.template is None:
+            return False
+        template_height, template_width = self.template.shape[:2]
+        frame_height, frame_width = frame.shape[:2]
+        if template_height > frame_height or template_width > frame_width:
+            return False
+        top, left = (frame_height - template_height) // 2, (frame_width - template_width) // 2
+        diff = buffers['template_diff']
+        np.subtract(frame[top:top + template_height, left:left + template_width], self.template, out=diff,
+                     dtype=np.int16)
+        np.abs(diff, out=diff)
+        return float(diff.mean()) < self.template_threshold
+
+
+def create_verifier(backend: DesktopBackend, **kwargs) -> Optional[GestureVerifier]:
+    """Return a verifier, or None with a log line when NumPy or the template is unavailable."""
+    if np is None:
+        logging.info("Gesture verification is enabled but NumPy is not installed; continuing without it.")
+        return None
+    try:
+        return GestureVerifier(backend, **kwargs)
+    except Exception as e:
+        logging.error(f"Gesture verification could not be set up: {e}", exc_info=True)
+        return None
@@ -0,0 +1,349 @@
+import ctypes
+import ctypes.wintypes
+import logging
+import sys
+import threading
+import time
+from typing import List, Optional, Sequence, Tuple
+import win32api
+import win32gui
+import win32con
+import win32process
+import comtypes_cache
+from backends import DesktopBackend, ProcessSample, Rect, WindowNotFoundError
+from startup_timing import timed_import
+from window_registry import EVENT_CREATE, EVENT_DESTROY, EVENT_RENAME, WindowEventSource
+
+EVENT_OBJECT_CREATE = 0x8000
+EVENT_OBJECT_DESTROY = 0x8001
+EVENT_OBJECT_NAMECHANGE = 0x800C
+WINEVENT_OUTOFCONTEXT = 0x0000
+OBJID_WINDOW = 0
+WM_QUIT = 0x0012
+MOUSE_MESSAGES = {
+    'move': win32con.WM_MOUSEMOVE,
+    'down': win32con.WM_LBUTTONDOWN,
+    'up': win32con.WM_LBUTTONUP,
+}
+
+INPUT_MOUSE = 0
+MOUSEEVENTF_MOVE = 0x0001
+MOUSEEVENTF_LEFTDOWN = 0x0002
+MOUSEEVENTF_LEFTUP = 0x0004
+MOUSEEVENTF_VIRTUALDESK = 0x4000
+MOUSEEVENTF_ABSOLUTE = 0x8000
+SM_XVIRTUALSCREEN, SM_YVIRTUALSCREEN, SM_CXVIRTUALSCREEN, SM_CYVIRTUALSCREEN = 76, 77, 78, 79
+MOUSE_EVENT_FLAGS = {
+    'move': MOUSEEVENTF_MOVE,
+    'down': MOUSEEVENTF_MOVE | MOUSEEVENTF_LEFTDOWN,
+    'up': MOUSEEVENTF_MOVE | MOUSEEVENTF_LEFTUP,
+}
+WM_NULL = 0x0000
+SMTO_ABORTIFHUNG = 0x0002
+PW_CLIENTONLY = 0x1
+PW_RENDERFULLCONTENT = 0x2
+DIB_RGB_COLORS = 0
+SM_CXSCREEN, SM_CYSCREEN = 0, 1
+
+
+class BITMAPINFOHEADER(ctypes.Structure):
+    _fields_ = [
+        ('biSize', ctypes.wintypes.DWORD), ('biWidth', ctypes.wintypes.LONG), ('biHeight', ctypes.wintypes.LONG),
+        ('biPlanes', ctypes.wintypes.WORD), ('biBitCount', ctypes.wintypes.WORD),
+        ('biCompression', ctypes.wintypes.DWORD), ('biSizeImage', ctypes.wintypes.DWORD),
+        ('biXPelsPerMeter', ctypes.wintypes.LONG), ('biYPelsPerMeter', ctypes.wintypes.LONG),
+        ('biClrUsed', ctypes.wintypes.DWORD), ('biClrImportant', ctypes.wintypes.DWORD),
+    ]
+
+
+class MOUSEINPUT(ctypes.Structure):
+    _fields_ = [
+        ('dx', ctypes.wintypes.LONG), ('dy', ctypes.wintypes.LONG), ('mouseData', ctypes.wintypes.DWORD),
+        ('dwFlags', ctypes.wintypes.DWORD), ('time', ctypes.wintypes.DWORD), ('dwExtraInfo', ctypes.c_size_t),
+    ]
+
+
+class INPUT(ctypes.Structure):
+    class _INPUT(ctypes.Union):
+        # MOUSEINPUT is the largest member of the union, so it alone gives INPUT its Win32 size.
+        _fields_ = [('mi', MOUSEINPUT)]
+
+    _anonymous_ = ('u',)
+    _fields_ = [('type', ctypes.wintypes.DWORD), ('u', _INPUT)]
+
+
+WinEventProc = ctypes.WINFUNCTYPE(None, ctypes.wintypes.HANDLE, ctypes.wintypes.DWORD, ctypes.wintypes.HWND,
+                                  ctypes.wintypes.LONG, ctypes.wintypes.LONG, ctypes.wintypes.DWORD,
+                                  ctypes.wintypes.DWORD)
+
+
+class Win32WindowEventSource(WindowEventSource):
+    """Receives window create/destroy/name-change notifications through ``SetWinEventHook``.
+
+    Out-of-context hooks are delivered through the message queue of the thread that installed them, so the hook
+    lives on its own thread running a message loop and hands events over through the base class queue.
+    """
+
+    EVENT_KINDS = {
+        EVENT_OBJECT_CREATE: EVENT_CREATE,
+        EVENT_OBJECT_DESTROY: EVENT_DESTROY,
+        EVENT_OBJECT_NAMECHANGE: EVENT_RENAME,
+    }
+
+    def __init__(self):
+        super().__init__()
+        self._thread: Optional[threading.Thread] = None
+        self._thread_id = None
+        self._callback = WinEventProc(self._on_event)
+
+    def _on_event(self, hook, event, hwnd, id_object, id_child, event_thread, event_time):
+        if id_object == OBJID_WINDOW and id_child == 0 and hwnd:
+            self.post(self.EVENT_KINDS[event], hwnd)
+
+    def _run(self):
+        user32 = ctypes.windll.user32
+        self._thread_id = ctypes.windll.kernel32.GetCurrentThreadId()
+        hooks = [
+            user32.SetWinEventHook(EVENT_OBJECT_CREATE, EVENT_OBJECT_DESTROY, 0, self._callback, 0, 0,
+                                   WINEVENT_OUTOFCONTEXT),
+            user32.SetWinEventHook(EVENT_OBJECT_NAMECHANGE, EVENT_OBJECT_NAMECHANGE, 0, self._callback, 0, 0,
+                                   WINEVENT_OUTOFCONTEXT),
+        ]
+        if not any(hooks):
+            logging.error("SetWinEventHook failed; window events are unavailable.")
+            self.failed = True
+            return
+        message = ctypes.wintypes.MSG()
+        while user32.GetMessageW(ctypes.byref(message), 0, 0, 0) > 0:
+            user32.TranslateMessage(ctypes.byref(message))
+            user32.DispatchMessageW(ctypes.byref(message))
+        for hook in hooks:
+            user32.UnhookWinEvent(hook)
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="win-event-hook", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is not None and self._thread_id:
+            ctypes.windll.user32.PostThreadMessageW(self._thread_id, WM_QUIT, 0, 0)
+            self._thread.join(timeout=2)
+        self._thread = None
+
+
+def pywinauto_application():
+    """pywinauto and the comtypes wrappers it generates are the slowest import by far, so they load on first use."""
+    if 'pywinauto' not in sys.modules:
+        try:
+            comtypes_cache.configure()
+        except Exception as e:
+            logging.info(f"comtypes wrapper cache unavailable, wrappers are generated in memory: {e}")
+    return timed_import('pywinauto.application')
+
+
+class Win32Backend(DesktopBackend):
+    """Win32 desktop through pywin32 and ctypes.
+
+    pywinauto (window wrappers and focus), pyautogui (foreground clicks outside windows) and psutil (process
+    sampling) are imported on first use; ``preload`` imports them on a worker thread while the first windows are
+    still being found and prepared.
+    """
+
+    name = 'win32'
+
+    def preload(self) -> None:
+        pywinauto_application()
+        timed_import('pyautogui')
+
+    def find_windows(self, title: str, class_name: str) -> List[int]:
+        # Visible top-level windows with exactly this title and class, as pywinauto's find_windows matches them.
+        handles = []
+
+        def collect(handle, _):
+            if (win32gui.IsWindowVisible(handle) and win32gui.GetClassName(handle) == class_name
+                    and win32gui.GetWindowText(handle) == title):
+                handles.append(handle)
+            return True
+
+        win32gui.EnumWindows(collect, None)
+        return handles
+
+    def is_window(self, handle: int) -> bool:
+        return bool(win32gui.IsWindow(handle))
+
+    def get_window_text(self, handle: int) -> str:
+        return win32gui.GetWindowText(handle)
+
+    def get_class_name(self, handle: int) -> str:
+        return win32gui.GetClassName(handle)
+
+    def get_window_rect(self, handle: int) -> Rect:
+        return Rect(*win32gui.GetWindowRect(handle))
+
+    def get_window_thread_process_id(self, handle: int) -> Tuple[int, int]:
+        return tuple(win32process.GetWindowThreadProcessId(handle))
+
+    def is_iconic(self, handle: int) -> bool:
+        return bool(win32gui.IsIconic(handle))
+
+    def is_maximized(self, handle: int) -> bool:
+        return win32gui.GetWindowPlacement(handle)[1] == win32con.SW_MAXIMIZE
+
+    def get_foreground_window(self) -> int:
+        return win32gui.GetForegroundWindow()
+
+    def restore_window(self, handle: int, activate: bool = True) -> None:
+        win32gui.ShowWindow(handle, win32con.SW_RESTORE if activate else win32con.SW_SHOWNOACTIVATE)
+
+    def minimize_window(self, handle: int) -> None:
+        win32gui.ShowWindow(handle, win32con.SW_MINIMIZE)
+
+    def set_window_pos(self, handle: int, x: int, y: int, width: int, height: int, activate: bool = True) -> None:
+        flags = win32con.SWP_SHOWWINDOW
+        if not activate:
+            # Neither activate the window nor raise it over the one that currently has the input.
+            flags |= win32con.SWP_NOACTIVATE | win32con.SWP_NOZORDER
+        win32gui.SetWindowPos(handle, win32con.HWND_TOP, x, y, width, height, flags)
+
+    def allow_set_foreground_window(self) -> None:
+        ctypes.windll.user32.AllowSetForegroundWindow(ctypes.windll.kernel32.GetCurrentProcessId())
+
+    def attach_thread_input(self, thread_id: int, target_thread_id: int, attach: bool) -> None:
+        ctypes.windll.user32.AttachThreadInput(thread_id, target_thread_id, attach)
+
+    def set_foreground_window(self, handle: int) -> None:
+        win32gui.SetForegroundWindow(handle)
+
+    def bring_window_to_top(self, handle: int) -> None:
+        win32gui.BringWindowToTop(handle)
+
+    def probe_window(self, handle: int, timeout: float) -> bool:
+        user32 = ctypes.windll.user32
+        if user32.IsHungAppWindow(handle):
+            return False
+        result = ctypes.c_size_t()
+        return bool(user32.SendMessageTimeoutW(handle, WM_NULL, 0, 0, SMTO_ABORTIFHUNG, max(1, int(timeout * 1000)),
+                                               ctypes.byref(result)))
+
+    def connect(self, handle: int):
+        application = pywinauto_application()
+        findwindows = timed_import('pywinauto.findwindows')
+        try:
+            # top_window() is a WindowSpecification that searches for the window again on every attribute access;
+            # the resolved wrapper talks to the handle directly, which is what makes caching it worthwhile.
+            return application.Application().connect(handle=handle).top_window().wrapper_object()
+        except findwindows.ElementNotFoundError as e:
+            raise WindowNotFoundError(str(e)) from e
+
+    def create_window_event_source(self) -> Win32WindowEventSource:
+        return Win32WindowEventSource()
+
+    def screen_size(self) -> Tuple[int, int]:
+        user32 = ctypes.windll.user32
+        return user32.GetSystemMetrics(SM_CXSCREEN), user32.GetSystemMetrics(SM_CYSCREEN)
+
+    def get_taskbar_rect(self) -> Rect:
+        return Rect(*win32gui.GetWindowRect(win32gui.FindWindow("Shell_TrayWnd", None)))
+
+    def monitor_work_areas(self) -> List[Rect]:
+        areas = []
+        for monitor, _, _ in win32api.EnumDisplayMonitors():
+            info = win32api.GetMonitorInfo(monitor)
+            area = Rect(*info['Work'])
+            if info.get('Flags', 0) & win32con.MONITORINFOF_PRIMARY:
+                areas.insert(0, area)
+            else:
+                areas.append(area)
+        return areas
+
+    def move_mouse(self, x: int, y: int) -> None:
+        timed_import('pyautogui').moveTo(x, y)
+
+    def click(self) -> None:
+        timed_import('pyautogui').click()
+
+    def send_input(self, events) -> None:
+        user32 = ctypes.windll.user32
+        left, top = user32.GetSystemMetrics(SM_XVIRTUALSCREEN), user32.GetSystemMetrics(SM_YVIRTUALSCREEN)
+        width = max(2, user32.GetSystemMetrics(SM_CXVIRTUALSCREEN))
+        height = max(2, user32.GetSystemMetrics(SM_CYVIRTUALSCREEN))
+
+        def submit(batch):
+            inputs = (INPUT * len(batch))(*batch)
+            if user32.SendInput(len(batch), inputs, ctypes.sizeof(INPUT)) != len(batch):
+                raise OSError("SendInput was blocked by another thread or UIPI")
+
+        batch = []
+        for event in events:
+            if event.delay > 0:
+                if batch:
+                    submit(batch)
+                    batch = []
+                time.sleep(event.delay)
+            flags = MOUSE_EVENT_FLAGS[event.kind] | MOUSEEVENTF_ABSOLUTE | MOUSEEVENTF_VIRTUALDESK
+            mouse = MOUSEINPUT(((event.x - left) * 65535) // (width - 1), ((event.y - top) * 65535) // (height - 1),
+                               0, flags, 0, 0)
+            batch.append(INPUT(type=INPUT_MOUSE, mi=mouse))
+        if batch:
+            submit(batch)
+
+    def post_mouse_event(self, handle: int, kind: str, x: int, y: int, pressed: bool = False) -> bool:
+        wparam = win32con.MK_LBUTTON if pressed or kind == 'down' else 0
+        lparam = ((y & 0xFFFF) << 16) | (x & 0xFFFF)
+        try:
+            # PostMessage only queues the message; whether the client acted on it has to be verified separately.
+            win32gui.PostMessage(handle, MOUSE_MESSAGES[kind], wparam, lparam)
+            return True
+        except win32gui.error:
+            return False
+
+    def client_size(self, handle: int) -> Tuple[int, int]:
+        left, top, right, bottom = win32gui.GetClientRect(handle)
+        return right - left, bottom - top
+
+    def capture_client(self, handle: int, out) -> None:
+        # Roblox renders with DirectX, so BitBlt from the window DC reads black; PrintWindow asks for the full
+        # content and GetDIBits writes it straight into the caller's buffer.
+        user32, gdi32 = ctypes.windll.user32, ctypes.windll.gdi32
+        width, height = self.client_size(handle)
+        window_dc = user32.GetDC(handle)
+        memory_dc = gdi32.CreateCompatibleDC(window_dc)
+        bitmap = gdi32.CreateCompatibleBitmap(window_dc, width, height)
+        previous = gdi32.SelectObject(memory_dc, bitmap)
+        try:
+            user32.PrintWindow(handle, memory_dc, PW_CLIENTONLY | PW_RENDERFULLCONTENT)
+            header = BITMAPINFOHEADER(ctypes.sizeof(BITMAPINFOHEADER), width, -height, 1, 32, 0, 0, 0, 0, 0, 0)
+            target = (ctypes.c_char * (width * height * 4)).from_buffer(out)
+            if not gdi32.GetDIBits(memory_dc, bitmap, 0, height, target, ctypes.byref(header), DIB_RGB_COLORS):
+                raise OSError(f"GetDIBits failed for window {handle}")
+        finally:
+            gdi32.SelectObject(memory_dc, previous)
+            gdi32.DeleteObject(bitmap)
+            gdi32.DeleteDC(memory_dc)
+            user32.ReleaseDC(handle, window_dc)
+
+    def system_usage(self) -> Tuple[float, float]:
+        psutil = timed_import('psutil')
+        return psutil.cpu_percent(interval=None), psutil.virtual_memory().percent
+
+    def sample_process(self, pid: int) -> ProcessSample:
+        process = timed_import('psutil').Process(pid)
+        with process.oneshot():
+            cpu = process.cpu_times()
+            return ProcessSample(cpu.user + cpu.system, process.memory_info().rss, process.num_handles())
+
+    def set_process_priority(self, pid: int, low: bool) -> None:
+        psutil = timed_import('psutil')
+        psutil.Process(pid).nice(psutil.BELOW_NORMAL_PRIORITY_CLASS if low else psutil.NORMAL_PRIORITY_CLASS)
+
+    def set_process_affinity(self, pid: int, cpus: Optional[Sequence[int]]) -> None:
+        timed_import('psutil').Process(pid).cpu_affinity(list(cpus) if cpus else [])
+
+    def trim_working_set(self, pid: int) -> None:
+        access = win32con.PROCESS_SET_QUOTA | win32con.PROCESS_QUERY_INFORMATION
+        process = win32api.OpenProcess(access, False, pid)
+        try:
+            win32process.SetProcessWorkingSetSize(process, -1, -1)
+        finally:
+            win32api.CloseHandle(process)
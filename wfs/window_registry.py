@@ -0,0 +1,151 @@
+import logging
+import queue
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+from backends import DesktopBackend, WindowNotFoundError
+
+EVENT_CREATE = 'create'
+EVENT_DESTROY = 'destroy'
+EVENT_RENAME = 'rename'
+
+
+class WindowEvent(NamedTuple):
+    kind: str
+    handle: int
+
+
+class WindowInfo:
+    def __init__(self, handle: int, pid: int, title: str, first_seen: float):
+        self.handle = handle
+        self.pid = pid
+        self.title = title
+        self.first_seen = first_seen
+
+
+class WindowEventSource:
+    """Thread-safe queue of window events; backends push into it from their hook thread.
+
+    This base class is also the synthetic source: call ``post`` to inject events. A source that cannot deliver
+    events (e.g. its hooks could not be installed) sets ``failed``, and the registry falls back to polling.
+    """
+
+    def __init__(self):
+        self.events = queue.Queue()
+        self.failed = False
+
+    def start(self) -> None:
+        pass
+
+    def stop(self) -> None:
+        pass
+
+    def post(self, kind: str, handle: int) -> None:
+        self.events.put(WindowEvent(kind, handle))
+
+    def drain(self) -> List[WindowEvent]:
+        drained = []
+        while True:
+            try:
+                drained.append(self.events.get_nowait())
+            except queue.Empty:
+                return drained
+
+
+class WindowRegistry:
+    """Live set of Roblox window handles kept up to date from window events.
+
+    Events are applied incrementally on every ``update``; a full ``find_windows`` enumeration only runs on the first
+    update and then every ``poll_interval`` seconds, as a fallback for missed events. Without a working event source
+    (none given, ``start`` raised, or the source reports ``failed``) every ``update`` enumerates.
+
+    ``update`` makes desktop calls and runs on a worker thread while the event loop may call ``forget``; the
+    window map is therefore only changed with single dict operations and iterated over a copy.
+    """
+
+    def __init__(self, backend: DesktopBackend, event_source: Optional[WindowEventSource] = None,
+                 title: str = "Roblox", class_name: str = "WINDOWSCLIENT", poll_interval: float = 60,
+                 clock: Callable[[], float] = time.monotonic):
+        self.backend = backend
+        self.event_source = event_source
+        self.title = title
+        self.class_name = class_name
+        self.poll_interval = poll_interval
+        self.clock = clock
+        self.windows: Dict[int, WindowInfo] = {}
+        self.last_poll: Optional[float] = None
+        if self.event_source is not None:
+            try:
+                self.event_source.start()
+            except Exception as e:
+                logging.error(f"Window events unavailable, polling for windows instead: {e}")
+                self.event_source = None
+
+    def handles(self) -> List[int]:
+        return list(self.windows)
+
+    def get(self, handle: int) -> Optional[WindowInfo]:
+        return self.windows.get(handle)
+
+    def forget(self, handle: int) -> None:
+        self.windows.pop(handle, None)
+
+    def stop(self) -> None:
+        if self.event_source is not None:
+            self.event_source.stop()
+
+    def _matches(self, handle: int) -> bool:
+        try:
+            return (self.backend.is_window(handle) and self.backend.get_class_name(handle) == self.class_name
+                    and self.backend.get_window_text(handle) == self.title)
+        except WindowNotFoundError:
+            return False
+        except Exception as e:
+            logging.debug(f"Could not inspect window {handle}: {e}")
+            return False
+
+    def _add(self, handle: int) -> bool:
+        try:
+            pid = self.backend.get_window_thread_process_id(handle)[1]
+        except Exception:
+            return False
+        known = self.windows.get(handle)
+        if known is not None and known.pid == pid:
+            return False
+        self.windows[handle] = WindowInfo(handle, pid, self.title, self.clock())
+        return True
+
+    def poll(self) -> Tuple[List[int], List[int]]:
+        """Full enumeration; returns the (added, removed) handles."""
+        self.last_poll = self.clock()
+        found = self.backend.find_windows(title=self.title, class_name=self.class_name) or []
+        found_set = set(found)
+        removed = [handle for handle in list(self.windows) if handle not in found_set]
+        for handle in removed:
+            self.windows.pop(handle, None)
+        added = [handle for handle in found if self._add(handle)]
+        return added, removed
+
+    def update(self) -> Tuple[List[int], List[int]]:
+        """Apply pending events (or poll when due); returns the (added, removed) handles."""
+        if self.event_source is not None and self.event_source.failed:
+            logging.error("Window event source stopped delivering events, polling for windows instead.")
+            self.event_source.stop()
+            self.event_source = None
+        if self.event_source is None or self.last_poll is None or self.clock() - self.last_poll >= self.poll_interval:
+            if self.event_source is not None:
+                self.event_source.drain()
+            return self.poll()
+
+        added, removed = [], []
+        for event in self.event_source.drain():
+            handle = event.handle
+            if event.kind == EVENT_DESTROY:
+                if self.windows.pop(handle, None) is not None:
+                    removed.append(handle)
+            elif self._matches(handle):
+                if self._add(handle):
+                    added.append(handle)
+            elif event.kind == EVENT_RENAME and self.windows.pop(handle, None) is not None:
+                removed.append(handle)
+        return ([h for h in dict.fromkeys(added) if h in self.windows],
+                [h for h in dict.fromkeys(removed) if h not in self.windows])